@@ -0,0 +1,32 @@
+"""add app settings
+
+Revision ID: b3d9f1e27c60
+Revises: 53574804a1da
+Create Date: 2026-10-17 07:17:58.204117+00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3d9f1e27c60'
+down_revision = '53574804a1da'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # A bot that ran the new code before migrating already created it (init_db)
+    if sa.inspect(op.get_bind()).has_table('app_settings'):
+        return
+    op.create_table('app_settings',
+    sa.Column('key', sa.String(length=100), nullable=False),
+    sa.Column('value', sa.Text(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('key')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('app_settings')
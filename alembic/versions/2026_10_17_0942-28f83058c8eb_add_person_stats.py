@@ -0,0 +1,92 @@
+"""add person stats
+
+Revision ID: 28f83058c8eb
+Revises: 786f05728456
+Create Date: 2026-10-17 09:42:05.118204+00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '28f83058c8eb'
+down_revision = '786f05728456'
+branch_labels = None
+depends_on = None
+
+
+# Same as src.person_stats.REBUILD_SQL at the time of this migration
+BACKFILL_SQL = """
+WITH events AS (
+    SELECT task_instance_id, person_id, action, timestamp,
+           lead(action) OVER (PARTITION BY task_instance_id ORDER BY timestamp, id) AS next_action
+    FROM completion_log
+),
+completions AS (
+    SELECT e.person_id,
+           coalesce(tt.category, 'other') AS category,
+           date_trunc('week', w.start_date)::date AS week_start,
+           e.timestamp
+    FROM events e
+    JOIN task_instances ti ON ti.id = e.task_instance_id
+    JOIN task_types tt ON tt.id = ti.task_type_id
+    JOIN weeks w ON w.id = ti.week_id
+    WHERE e.action = 'completed'
+      AND e.person_id IS NOT NULL
+      AND e.next_action IS DISTINCT FROM 'amended'
+),
+totals AS (
+    SELECT person_id, count(*) AS total_completions, max(timestamp) AS last_completed_at
+    FROM completions
+    GROUP BY person_id
+),
+categories AS (
+    SELECT person_id, jsonb_object_agg(category, completions) AS category_counts
+    FROM (
+        SELECT person_id, category, count(*) AS completions
+        FROM completions
+        GROUP BY person_id, category
+    ) AS per_category
+    GROUP BY person_id
+),
+runs AS (
+    -- Consecutive weeks share the same run value
+    SELECT person_id, week_start,
+           week_start - 7 * row_number() OVER (PARTITION BY person_id ORDER BY week_start)::int AS run
+    FROM (SELECT DISTINCT person_id, week_start FROM completions) AS active_weeks
+),
+streaks AS (
+    SELECT DISTINCT ON (person_id)
+           person_id, count(*) AS current_streak, max(week_start) AS last_week_start
+    FROM runs
+    GROUP BY person_id, run
+    ORDER BY person_id, run DESC
+)
+INSERT INTO person_stats (person_id, total_completions, category_counts, current_streak,
+                          last_week_start, last_completed_at)
+SELECT person_id, t.total_completions, c.category_counts, s.current_streak,
+       s.last_week_start, t.last_completed_at
+FROM totals t
+JOIN categories c USING (person_id)
+JOIN streaks s USING (person_id)
+"""
+
+
+def upgrade() -> None:
+    op.create_table('person_stats',
+    sa.Column('person_id', sa.Integer(), nullable=False),
+    sa.Column('total_completions', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('category_counts', postgresql.JSONB(astext_type=sa.Text()), server_default='{}', nullable=False),
+    sa.Column('current_streak', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('last_week_start', sa.Date(), nullable=True),
+    sa.Column('last_completed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['person_id'], ['people.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('person_id')
+    )
+    op.execute(BACKFILL_SQL)
+
+
+def downgrade() -> None:
+    op.drop_table('person_stats')
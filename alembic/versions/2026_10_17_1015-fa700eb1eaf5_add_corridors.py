@@ -0,0 +1,94 @@
+"""add corridors
+
+Revision ID: fa700eb1eaf5
+Revises: 28f83058c8eb
+Create Date: 2026-10-17 10:15:54.756739+00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from src.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision = 'fa700eb1eaf5'
+down_revision = '28f83058c8eb'
+branch_labels = None
+depends_on = None
+
+# Tables scoped to a corridor
+SCOPED_TABLES = ['people', 'task_types', 'weeks', 'task_opt_outs']
+
+
+def upgrade() -> None:
+    op.create_table('corridors',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('chat_id', sa.BIGINT(), nullable=False),
+    sa.Column('category_amounts', postgresql.JSONB(astext_type=sa.Text()), server_default='{}', nullable=False),
+    sa.Column('active', sa.Boolean(), server_default=sa.text('true'), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('chat_id')
+    )
+    for table in SCOPED_TABLES:
+        op.add_column(table, sa.Column('corridor_id', sa.Integer(), nullable=True))
+
+    # Everything that exists so far belongs to the group in TELEGRAM_CHAT_ID
+    conn = op.get_bind()
+    has_data = any(
+        conn.execute(sa.text(f"SELECT EXISTS (SELECT 1 FROM {table})")).scalar()
+        for table in SCOPED_TABLES
+    )
+    if has_data and not settings.telegram_chat_id:
+        raise RuntimeError("Set TELEGRAM_CHAT_ID to the group the existing data belongs to")
+    if settings.telegram_chat_id:
+        corridor_id = conn.execute(
+            sa.text(
+                "INSERT INTO corridors (name, chat_id, created_at) "
+                "VALUES ('Corridor', :chat_id, now()) RETURNING id"
+            ),
+            {"chat_id": int(settings.telegram_chat_id)},
+        ).scalar()
+        for table in SCOPED_TABLES:
+            conn.execute(sa.text(f"UPDATE {table} SET corridor_id = :id"), {"id": corridor_id})
+
+    for table in SCOPED_TABLES:
+        op.alter_column(table, 'corridor_id', nullable=False)
+        op.create_foreign_key(
+            f'{table}_corridor_id_fkey', table, 'corridors', ['corridor_id'], ['id'], ondelete='CASCADE'
+        )
+
+    op.create_index('ix_people_corridor_active', 'people', ['corridor_id', 'active'], unique=False)
+    # ix_task_opt_outs_task_type_id stays: the composite can't serve lookups
+    # by task type alone (e.g. the cascade when a task type is deleted)
+    op.create_index('ix_task_opt_outs_corridor_task_type', 'task_opt_outs', ['corridor_id', 'task_type_id'], unique=False)
+    op.drop_constraint('task_types_name_key', 'task_types', type_='unique')
+    op.create_unique_constraint('uq_corridor_task_type_name', 'task_types', ['corridor_id', 'name'])
+    op.drop_index('ix_weeks_closed_deadline', table_name='weeks')
+    op.drop_index('ix_weeks_open_deadline', table_name='weeks', postgresql_where=sa.text('closed = false'))
+    op.drop_constraint('uq_year_week', 'weeks', type_='unique')
+    op.create_index('ix_weeks_corridor_closed_deadline', 'weeks', ['corridor_id', 'closed', 'deadline'], unique=False)
+    op.create_index('ix_weeks_corridor_open_deadline', 'weeks', ['corridor_id', 'deadline'], unique=False, postgresql_where=sa.text('closed = false'))
+    op.create_unique_constraint('uq_corridor_year_week', 'weeks', ['corridor_id', 'year', 'week_number'])
+
+
+def downgrade() -> None:
+    # Only works while a single corridor is left: week numbers and task type
+    # names are unique again afterwards
+    op.drop_constraint('uq_corridor_year_week', 'weeks', type_='unique')
+    op.drop_index('ix_weeks_corridor_open_deadline', table_name='weeks', postgresql_where=sa.text('closed = false'))
+    op.drop_index('ix_weeks_corridor_closed_deadline', table_name='weeks')
+    op.create_unique_constraint('uq_year_week', 'weeks', ['year', 'week_number'])
+    op.create_index('ix_weeks_open_deadline', 'weeks', ['deadline'], unique=False, postgresql_where=sa.text('closed = false'))
+    op.create_index('ix_weeks_closed_deadline', 'weeks', ['closed', 'deadline'], unique=False)
+    op.drop_constraint('uq_corridor_task_type_name', 'task_types', type_='unique')
+    op.create_unique_constraint('task_types_name_key', 'task_types', ['name'])
+    op.drop_index('ix_task_opt_outs_corridor_task_type', table_name='task_opt_outs')
+    op.drop_index('ix_people_corridor_active', table_name='people')
+    for table in SCOPED_TABLES:
+        op.drop_constraint(f'{table}_corridor_id_fkey', table, type_='foreignkey')
+        op.drop_column(table, 'corridor_id')
+    op.drop_table('corridors')
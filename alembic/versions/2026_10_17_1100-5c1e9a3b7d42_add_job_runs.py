@@ -0,0 +1,37 @@
+"""add job runs
+
+Revision ID: 5c1e9a3b7d42
+Revises: fa700eb1eaf5
+Create Date: 2026-10-17 11:00:12.408315+00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c1e9a3b7d42'
+down_revision = 'fa700eb1eaf5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('job_runs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('job_id', sa.String(length=191), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('worker', sa.Integer(), nullable=True),
+    sa.Column('scheduled_at', sa.DateTime(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_job_runs_job_scheduled', 'job_runs', ['job_id', 'scheduled_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_job_runs_job_scheduled', table_name='job_runs')
+    op.drop_table('job_runs')
@@ -0,0 +1,32 @@
+"""add job claims
+
+Revision ID: 9e2b6c4d8a13
+Revises: 5c1e9a3b7d42
+Create Date: 2026-10-17 11:30:41.226907+00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9e2b6c4d8a13'
+down_revision = '5c1e9a3b7d42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('job_claims',
+    sa.Column('job', sa.String(length=100), nullable=False),
+    sa.Column('corridor_id', sa.Integer(), nullable=False),
+    sa.Column('scheduled_at', sa.DateTime(), nullable=False),
+    sa.Column('worker', sa.Integer(), nullable=True),
+    sa.Column('claimed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['corridor_id'], ['corridors.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('job', 'corridor_id', 'scheduled_at')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('job_claims')
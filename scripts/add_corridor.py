@@ -0,0 +1,82 @@
+"""Add a corridor (a group chat with its own residents, tasks and weeks).
+
+The new corridor gets the default task types of populate_db.py, or a copy of
+another corridor's with ``--copy-from``, and its current week. A running bot
+picks it up within a minute (see src/corridors.py); residents then register
+with /start in the new group.
+
+    uv run python scripts/add_corridor.py --name "Corridor B" --chat-id -1001234567890
+    uv run python scripts/add_corridor.py --name "Corridor C" --chat-id -100987 --copy-from 1
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import argparse
+import json
+import logging
+
+from populate_db import create_corridor, create_current_week, create_task_types
+from src.database import get_db
+from src.models import Corridor, TaskType
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# TaskType columns copied with --copy-from
+COPIED_COLUMNS = [
+    "name", "category", "description", "instructions", "media_file_id",
+    "frequency", "estimated_duration_minutes", "location",
+]
+
+
+def copy_task_types(db, source_id: int, corridor_id: int) -> int:
+    """Copy the task types of corridor ``source_id``; returns how many."""
+    task_types = db.query(TaskType).filter_by(corridor_id=source_id).all()
+    for task_type in task_types:
+        values = {column: getattr(task_type, column) for column in COPIED_COLUMNS}
+        db.add(TaskType(corridor_id=corridor_id, **values))
+    db.commit()
+    return len(task_types)
+
+
+def add_corridor(args) -> int:
+    with get_db() as db:
+        if db.query(Corridor).filter_by(chat_id=args.chat_id).first():
+            logger.error(f"❌ Group {args.chat_id} already is a corridor")
+            return 1
+        if args.copy_from and not db.get(Corridor, args.copy_from):
+            logger.error(f"❌ No corridor with id {args.copy_from}")
+            return 1
+
+        corridor = create_corridor(db, args.name, args.chat_id)
+        if args.category_amounts:
+            corridor.category_amounts = json.loads(args.category_amounts)
+            db.commit()
+
+        if args.copy_from:
+            copied = copy_task_types(db, args.copy_from, corridor.id)
+            logger.info(f"Copied {copied} task types from corridor {args.copy_from}")
+        else:
+            create_task_types(db, corridor.id)
+        create_current_week(db, corridor.id)
+
+        logger.info(f"✅ Corridor {corridor.name} added with id {corridor.id}")
+    return 0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--name", required=True, help="shown in messages, e.g. 'Corridor B'")
+    parser.add_argument("--chat-id", type=int, required=True, help="id of the corridor's group chat")
+    parser.add_argument("--copy-from", type=int, help="copy the task types of this corridor id")
+    parser.add_argument("--category-amounts", help='tasks per week by category, e.g. \'{"toilet": 2}\'')
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    sys.exit(add_corridor(parse_args()))
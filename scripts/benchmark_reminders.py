@@ -0,0 +1,110 @@
+"""Benchmark the reminder job across many corridors.
+
+Creates a scratch database (``<POSTGRES_DB>_reminders``, dropped afterwards)
+with N corridors and a few residents each, then runs ``send_reminders()``
+once against scripts/fake_bot_api.py, which answers every call after
+``--api-latency-ms``. Reports the job's wall time, its DB queries and the
+send rate; the outbox keeps that at or below the global Telegram limit.
+
+    uv run python scripts/benchmark_reminders.py --corridors 200 --api-latency-ms 100
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import argparse
+import asyncio
+import logging
+import time
+
+from sqlalchemy import event
+
+from fake_bot_api import FakeBotApi
+from load_test import FIRST_CORRIDOR_CHAT_ID, FIRST_RESIDENT_ID, create_scratch_database, drop_scratch_database, seed
+from src.config import settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+logging.getLogger("apscheduler").setLevel(logging.WARNING)
+
+# Residents per corridor (they show up as non-contributors)
+RESIDENTS_PER_CORRIDOR = 5
+
+
+async def run_benchmark(args) -> int:
+    fake_api = FakeBotApi(latency=args.api_latency_ms / 1000)
+    api_port = await fake_api.start()
+
+    # Must be in place before src.database creates its engines
+    scratch_db = f"{settings.postgres_db}_reminders"
+    settings.postgres_db = scratch_db
+    settings.telegram_api_base_url = f"http://127.0.0.1:{api_port}/bot"
+
+    create_scratch_database(scratch_db)
+    try:
+        seed({
+            FIRST_RESIDENT_ID + corridor * RESIDENTS_PER_CORRIDOR + i: FIRST_CORRIDOR_CHAT_ID - corridor
+            for corridor in range(args.corridors)
+            for i in range(RESIDENTS_PER_CORRIDOR)
+        })
+        return await _measure(args, fake_api)
+    finally:
+        from src.database import async_engine, engine
+
+        await async_engine.dispose()
+        engine.dispose()
+        await fake_api.stop()
+        drop_scratch_database(scratch_db)
+
+
+async def _measure(args, fake_api: FakeBotApi) -> int:
+    from telegram.ext import Application
+
+    from src.corridors import invalidate_corridors
+    from src.database import async_engine
+    from src.reminders import send_reminders
+
+    queries = 0
+
+    def count_query(*_):
+        nonlocal queries
+        queries += 1
+
+    app = Application.builder().token(settings.telegram_bot_token).base_url(settings.telegram_api_base_url).build()
+    async with app:
+        invalidate_corridors()
+        event.listen(async_engine.sync_engine, "before_cursor_execute", count_query)
+        started = time.perf_counter()
+        await send_reminders(app)
+        elapsed = time.perf_counter() - started
+        event.remove(async_engine.sync_engine, "before_cursor_execute", count_query)
+
+    sent = fake_api.calls["sendMessage"]
+    logger.info("=" * 60)
+    logger.info(f"Corridors:     {args.corridors} (Bot API latency {args.api_latency_ms:.0f} ms)")
+    logger.info(f"Wall time:     {elapsed:.2f}s")
+    logger.info(f"Reminders:     {sent} ({sent / elapsed:.1f}/s)")
+    logger.info(f"DB queries:    {queries}")
+
+    if sent != args.corridors:
+        logger.error(f"❌ Expected {args.corridors} reminders")
+        return 1
+    logger.info("✅ Every corridor was reminded")
+    return 0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corridors", type=int, default=200, help="corridor group chats")
+    parser.add_argument("--api-latency-ms", type=float, default=100, help="time every Bot API call takes")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run_benchmark(parse_args())))
@@ -0,0 +1,143 @@
+"""Benchmark generate_week_summary and check its query count stays constant.
+
+Seeds weeks of increasing size inside a transaction that is rolled back at
+the end, so it is safe to run against a real database. tests/test_benchmarks.py
+runs the same measurement as a pytest check.
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import List, Tuple
+
+from sqlalchemy import event, insert
+
+from src.corridors import CorridorInfo
+from src.database import AsyncSessionLocal, async_engine
+from src.menus import CATEGORY_AMOUNTS
+from src.models import Corridor, Person, TaskInstance, TaskType, Week
+from src.week_manager import generate_week_summary
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# (task instances, people) per benchmark run
+SIZES = [(50, 10), (1_000, 100), (5_000, 500)]
+
+# Maximum time a single summary may take on the largest dataset
+MAX_SUMMARY_SECONDS = 1.0
+
+
+class QueryCounter:
+    """Counts statements sent through the async engine."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+async def seed_week(db, week_number: int, instances: int, people: int) -> Tuple[Week, CorridorInfo]:
+    """Create a corridor and its week with ``instances`` tasks, two thirds of them completed."""
+    now = datetime.now()
+    corridor = Corridor(name=f"Bench {week_number}", chat_id=-(10**15 + week_number))
+    db.add(corridor)
+    await db.flush()
+    
+    week = Week(
+        corridor_id=corridor.id,
+        year=1900,  # Far away from any real week
+        week_number=week_number,
+        start_date=now.date(),
+        deadline=now + timedelta(days=7),
+        closed=False,
+    )
+    db.add(week)
+    await db.flush()
+
+    person_ids = list(await db.scalars(
+        insert(Person).returning(Person.id),
+        [
+            {"corridor_id": corridor.id, "telegram_id": -(week_number * 100_000 + i),
+             "name": f"Bench {week_number}-{i}"}
+            for i in range(people)
+        ],
+    ))
+    task_type_ids = list(await db.scalars(
+        insert(TaskType).returning(TaskType.id),
+        [
+            {"corridor_id": corridor.id, "name": f"Bench task {week_number}-{i}", "category": "other"}
+            for i in range(instances)
+        ],
+    ))
+    await db.execute(
+        insert(TaskInstance),
+        [
+            {
+                "week_id": week.id,
+                "task_type_id": task_type_id,
+                "status": "completed" if i % 3 else "pending",
+                "completed_by": person_ids[i % (people // 2)] if i % 3 else None,
+                "completed_at": now if i % 3 else None,
+            }
+            for i, task_type_id in enumerate(task_type_ids)
+        ],
+    )
+    return week, CorridorInfo(corridor.id, corridor.name, corridor.chat_id, dict(CATEGORY_AMOUNTS))
+
+
+async def measure_summaries() -> List[Tuple[int, int, int, float]]:
+    """Time the summary of every size; returns (instances, people, queries, seconds) per size."""
+    counter = QueryCounter()
+    results = []
+
+    async with AsyncSessionLocal() as db:
+        try:
+            for week_number, (instances, people) in enumerate(SIZES, start=1):
+                week, corridor = await seed_week(db, week_number, instances, people)
+
+                event.listen(async_engine.sync_engine, "before_cursor_execute", counter)
+                counter.count = 0
+                started = time.perf_counter()
+                await generate_week_summary(db, week, corridor)
+                elapsed = time.perf_counter() - started
+                event.remove(async_engine.sync_engine, "before_cursor_execute", counter)
+
+                results.append((instances, people, counter.count, elapsed))
+                logger.info(
+                    f"   {instances:>6} instances / {people:>4} people: "
+                    f"{counter.count} queries in {elapsed * 1000:.1f} ms"
+                )
+        finally:
+            await db.rollback()
+    return results
+
+
+async def run_benchmark() -> int:
+    """Run the summary against every size and compare query counts."""
+    results = await measure_summaries()
+    query_counts = {queries for _, _, queries, _ in results}
+    slowest = max(elapsed for _, _, _, elapsed in results)
+
+    logger.info("=" * 60)
+    if len(query_counts) != 1:
+        logger.error(f"❌ Query count grows with the data: {sorted(query_counts)}")
+        return 1
+    if slowest > MAX_SUMMARY_SECONDS:
+        logger.error(f"❌ Summary took {slowest:.2f}s (limit {MAX_SUMMARY_SECONDS}s)")
+        return 1
+    logger.info(f"✅ Constant query count ({query_counts.pop()}) across all sizes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run_benchmark()))
@@ -0,0 +1,203 @@
+"""Check that the hot lookups are served by their indexes.
+
+Seeds a few corridors with a few years' worth of weeks, task instances,
+completion logs, opt-outs and person stats inside a transaction that is rolled back at the
+end, runs ANALYZE and EXPLAINs each lookup. Fails if a lookup stops using its index (e.g.
+after a migration drops it or a query is rewritten).
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import asyncio
+import logging
+from typing import Dict, Set
+
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects import postgresql
+
+from src.database import AsyncSessionLocal
+from src.models import CompletionLog, Person, PersonStats, TaskInstance, TaskOptOut, Week
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Size of the seeded dataset (people, task types and weeks are spread over the corridors)
+SEED_CORRIDORS = 4
+SEED_WEEKS = 1_000
+SEED_TASK_TYPES = 50
+SEED_PEOPLE = 2_000
+
+# Statements that seed the dataset (ids are offset to stay clear of real rows)
+SEED_SQL = [
+    f"""
+    INSERT INTO corridors (id, name, chat_id, created_at)
+    SELECT 1000000 + i, 'Plan corridor ' || i, -1000000000000 - i, now()
+    FROM generate_series(1, {SEED_CORRIDORS}) AS i
+    """,
+    f"""
+    INSERT INTO people (id, corridor_id, telegram_id, name, active)
+    SELECT 1000000 + i, 1000000 + 1 + i % {SEED_CORRIDORS}, -1000000 - i, 'Plan person ' || i, i % 10 > 0
+    FROM generate_series(1, {SEED_PEOPLE}) AS i
+    """,
+    f"""
+    INSERT INTO task_types (id, corridor_id, name, category)
+    SELECT 1000000 + i, 1000000 + 1 + i % {SEED_CORRIDORS}, 'Plan task ' || i, 'other'
+    FROM generate_series(1, {SEED_TASK_TYPES}) AS i
+    """,
+    f"""
+    INSERT INTO weeks (id, corridor_id, year, week_number, start_date, deadline, closed)
+    SELECT 1000000 + i, 1000000 + 1 + i % {SEED_CORRIDORS}, 1000 + i, 1,
+           DATE '1000-01-01' + i * 7, TIMESTAMP '1000-01-05' + i * INTERVAL '7 days', true
+    FROM generate_series(1, {SEED_WEEKS}) AS i
+    """,
+    f"""
+    INSERT INTO task_instances (week_id, task_type_id, status, completed_by, completed_at)
+    SELECT 1000000 + w, 1000000 + t,
+           CASE WHEN (w + t) % 3 = 0 THEN 'pending' ELSE 'completed' END,
+           CASE WHEN (w + t) % 3 = 0 THEN NULL ELSE 1000000 + 1 + (w * t) % {SEED_PEOPLE} END,
+           CASE WHEN (w + t) % 3 = 0 THEN NULL ELSE TIMESTAMP '1000-01-01' END
+    FROM generate_series(1, {SEED_WEEKS}) AS w, generate_series(1, {SEED_TASK_TYPES}) AS t
+    """,
+    """
+    INSERT INTO completion_log (task_instance_id, person_id, action, timestamp)
+    SELECT id, completed_by, 'completed', completed_at
+    FROM task_instances WHERE week_id > 1000000 AND status = 'completed'
+    """,
+    f"""
+    INSERT INTO task_opt_outs (corridor_id, person_id, task_type_id, reason)
+    SELECT 1000000 + 1 + p % {SEED_CORRIDORS}, 1000000 + p, 1000000 + 1 + (p * 7 + k) % {SEED_TASK_TYPES}, 'plan check'
+    FROM generate_series(1, {SEED_PEOPLE}) AS p, generate_series(1, 5) AS k
+    """,
+    """
+    INSERT INTO person_stats (person_id, total_completions, category_counts)
+    SELECT completed_by, count(*), jsonb_build_object('other', count(*))
+    FROM task_instances WHERE week_id > 1000000 AND status = 'completed'
+    GROUP BY completed_by
+    """,
+]
+
+CORRIDOR_ID = 1_000_002
+PERSON_ID = 1_000_007
+WEEK_ID = 1_000_500
+TASK_TYPE_ID = 1_000_003
+
+# (description, statement, index that must appear in the plan)
+CHECKS = [
+    (
+        "all-time stats of a person (/mystats)",
+        select(PersonStats).where(PersonStats.person_id == PERSON_ID),
+        "person_stats_pkey",
+    ),
+    (
+        "completions of a person in a week (/mystats)",
+        select(func.count(TaskInstance.id)).where(
+            TaskInstance.completed_by == PERSON_ID, TaskInstance.week_id == WEEK_ID
+        ),
+        "ix_task_instances_completed_by_week",
+    ),
+    (
+        "completed tasks of a week (/status, menus)",
+        select(func.count(TaskInstance.id)).where(
+            TaskInstance.week_id == WEEK_ID, TaskInstance.status == "completed"
+        ),
+        "ix_task_instances_week_status",
+    ),
+    (
+        "open week of a corridor",
+        select(Week.id)
+        .where(Week.corridor_id == CORRIDOR_ID, Week.closed == False)
+        .order_by(Week.deadline.desc())
+        .limit(1),
+        "ix_weeks_corridor_open_deadline",
+    ),
+    (
+        "last closed weeks of a corridor (frequency filter)",
+        select(Week.id)
+        .where(Week.corridor_id == CORRIDOR_ID, Week.closed == True)
+        .order_by(Week.deadline.desc())
+        .limit(3),
+        "ix_weeks_corridor_closed_deadline",
+    ),
+    (
+        "active residents of a corridor (reminders, non-contributors)",
+        select(Person.id).where(Person.corridor_id == CORRIDOR_ID, Person.active == True),
+        "ix_people_corridor_active",
+    ),
+    (
+        "completion log of a task instance",
+        select(CompletionLog.id).where(
+            CompletionLog.task_instance_id == select(func.min(TaskInstance.id))
+            .where(TaskInstance.week_id == WEEK_ID)
+            .scalar_subquery()
+        ),
+        "ix_completion_log_task_instance_id",
+    ),
+    (
+        "opt-outs of a task type (/whooptedout)",
+        select(TaskOptOut.person_id).where(
+            TaskOptOut.corridor_id == CORRIDOR_ID, TaskOptOut.task_type_id == TASK_TYPE_ID
+        ),
+        "ix_task_opt_outs_corridor_task_type",
+    ),
+]
+
+
+def _index_names(plan: dict) -> set:
+    """Collect the index names used anywhere in a JSON plan tree."""
+    names = {plan["Index Name"]} if "Index Name" in plan else set()
+    for child in plan.get("Plans", []):
+        names |= _index_names(child)
+    return names
+
+
+async def explain_checks() -> Dict[str, Set[str]]:
+    """Seed, analyze and EXPLAIN every check; return the indexes each plan used, by description."""
+    used = {}
+
+    async with AsyncSessionLocal() as db:
+        try:
+            for statement in SEED_SQL:
+                await db.execute(text(statement))
+            await db.execute(text("ANALYZE"))
+
+            for description, statement, _ in CHECKS:
+                sql = str(statement.compile(
+                    dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+                ))
+                plan = (await db.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))).scalar()[0]["Plan"]
+                used[description] = _index_names(plan)
+        finally:
+            await db.rollback()
+
+    return used
+
+
+async def check_plans() -> int:
+    """Run every check and log the result; return the number of failures."""
+    failures = 0
+    used = await explain_checks()
+
+    for description, _, index in CHECKS:
+        if index in used[description]:
+            logger.info(f"✅ {description}: {index}")
+        else:
+            failures += 1
+            logger.error(
+                f"❌ {description}: expected {index}, plan used {sorted(used[description]) or 'no index'}"
+            )
+
+    logger.info("=" * 60)
+    if failures:
+        logger.error(f"❌ {failures} of {len(CHECKS)} lookups no longer use their index")
+    else:
+        logger.info(f"✅ All {len(CHECKS)} lookups use their index")
+    return failures
+
+
+if __name__ == "__main__":
+    sys.exit(1 if asyncio.run(check_plans()) else 0)
@@ -0,0 +1,84 @@
+"""Minimal stand-in for the Telegram Bot API, for local load tests.
+
+Answers every Bot API method the bot uses with a plausible result, counts
+the calls and records the messages sent and edited, so the bot can run at
+full speed without Telegram.
+Point the bot at it with TELEGRAM_API_BASE_URL=http://127.0.0.1:<port>/bot
+"""
+
+import asyncio
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import List, Optional
+
+from aiohttp import web
+
+BOT_USER = {
+    "id": 1,
+    "is_bot": True,
+    "first_name": "Pablito",
+    "username": "pablito_test_bot",
+    "can_join_groups": True,
+    "can_read_all_group_messages": False,
+    "supports_inline_queries": False,
+}
+
+# Methods that return a Message; everything else returns True
+MESSAGE_METHODS = {"sendMessage", "editMessageText", "sendPhoto", "editMessageReplyMarkup"}
+
+
+@dataclass
+class RecordedMessage:
+    method: str
+    chat_id: int
+    text: str
+
+
+class FakeBotApi:
+    """aiohttp server answering ``/bot<token>/<method>`` requests."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency  # seconds every call takes, like a real round-trip
+        self.calls: Counter = Counter()
+        self.messages: List[RecordedMessage] = []
+        self._message_id = 0
+        self._runner: Optional[web.AppRunner] = None
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        self.calls[method] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if method == "getMe":
+            result = BOT_USER
+        elif method in MESSAGE_METHODS:
+            self._message_id += 1
+            data = await request.post()
+            chat_id = int(data.get("chat_id") or 0)
+            self.messages.append(RecordedMessage(method, chat_id, data.get("text", "")))
+            result = {
+                "message_id": self._message_id,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private" if chat_id > 0 else "group"},
+                "text": data.get("text", ""),
+            }
+        else:
+            result = True
+
+        return web.json_response({"ok": True, "result": result})
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """Start serving; returns the port actually bound."""
+        app = web.Application()
+        app.router.add_route("*", "/bot{token}/{method}", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        return site._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
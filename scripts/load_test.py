@@ -0,0 +1,354 @@
+"""Offline load test: simulated residents tapping through the bot.
+
+Creates a scratch database (``<POSTGRES_DB>_loadtest``, dropped afterwards),
+seeds N residents split over M corridor group chats, and feeds generated
+updates straight into the bot's handlers (``Application.process_update``)
+with the Bot API replaced by scripts/fake_bot_api.py. Each resident does
+one visit: menu → complete a task → my stats → group /status → status, and
+some of them amend their completion again.
+
+Reports updates/sec, p50/p99 handler latency and DB queries per update.
+With thresholds the exit code is 1 when one is exceeded; ``--json`` prints
+the numbers to stdout for tests/test_load.py, which runs this scenario as
+a pytest check (``make loadtest``):
+
+    uv run python scripts/load_test.py --residents 200 --corridors 4
+    uv run python scripts/load_test.py --max-p99-ms 250 --max-queries-per-update 4
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import random
+import time
+from typing import Dict, List
+
+import psycopg2
+from psycopg2 import sql
+from sqlalchemy import event
+
+from fake_bot_api import FakeBotApi
+from src.config import settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Keep the bot's own per-update logging out of the measurements
+logging.getLogger("httpx").setLevel(logging.WARNING)
+logging.getLogger("aiohttp.access").setLevel(logging.WARNING)
+logging.getLogger("apscheduler").setLevel(logging.WARNING)
+
+# ========== CONFIGURATION ==========
+
+# Telegram ids of the simulated residents start here
+FIRST_RESIDENT_ID = 10_000
+# Group chat ids of the simulated corridors count down from here
+FIRST_CORRIDOR_CHAT_ID = -1_000_000
+
+# Share of residents that amend their completion after the visit
+AMEND_RATIO = 0.2
+
+# ====================================
+
+
+def _admin_connection():
+    conn = psycopg2.connect(
+        dbname="postgres",
+        user=settings.postgres_user,
+        password=settings.postgres_password,
+        host=settings.postgres_host,
+        port=settings.postgres_port,
+    )
+    conn.autocommit = True
+    return conn
+
+
+def _run_admin(*statements):
+    # Not "with conn": that would wrap the statements in a transaction
+    conn = _admin_connection()
+    try:
+        with conn.cursor() as cur:
+            for statement in statements:
+                cur.execute(statement)
+    finally:
+        conn.close()
+
+
+def create_scratch_database(name: str):
+    _run_admin(
+        sql.SQL("DROP DATABASE IF EXISTS {}").format(sql.Identifier(name)),
+        sql.SQL("CREATE DATABASE {}").format(sql.Identifier(name)),
+    )
+
+
+def drop_scratch_database(name: str):
+    _run_admin(sql.SQL("DROP DATABASE IF EXISTS {}").format(sql.Identifier(name)))
+
+
+def seed(residents: Dict[int, int]) -> Dict[int, Dict[str, List[int]]]:
+    """Create a corridor per group chat with its task types and current week, and
+    the residents (telegram id -> group chat id); returns task ids per category of
+    each group chat's corridor."""
+    from populate_db import create_corridor, create_current_week, create_task_types
+    from src.database import get_db, init_db
+    from src.models import Corridor, Person, TaskInstance, TaskType, Week
+
+    init_db()
+    with get_db() as db:
+        corridor_ids = {}
+        for n, chat_id in enumerate(sorted(set(residents.values()), reverse=True)):
+            corridor = create_corridor(db, f"Corridor {n + 1}", chat_id)
+            create_task_types(db, corridor.id)
+            create_current_week(db, corridor.id)
+            corridor_ids[chat_id] = corridor.id
+
+        db.add_all(
+            Person(corridor_id=corridor_ids[chat_id], telegram_id=telegram_id, name=f"Resident {i}")
+            for i, (telegram_id, chat_id) in enumerate(residents.items())
+        )
+        db.commit()
+
+        tasks: Dict[int, Dict[str, List[int]]] = {chat_id: {} for chat_id in corridor_ids}
+        rows = (
+            db.query(Corridor.chat_id, TaskType.category, TaskInstance.id)
+            .join(TaskType, TaskType.corridor_id == Corridor.id)
+            .join(TaskInstance, TaskInstance.task_type_id == TaskType.id)
+            .join(Week, Week.id == TaskInstance.week_id)
+            .filter(Week.closed == False)
+        )
+        for chat_id, category, task_id in rows:
+            tasks[chat_id].setdefault(category or "other", []).append(task_id)
+    return tasks
+
+
+def corridor_chat_id(resident: int, corridors: int) -> int:
+    """Group chat of the ``resident``-th simulated resident's corridor."""
+    return FIRST_CORRIDOR_CHAT_ID - resident % corridors
+
+
+class UpdateFactory:
+    """Builds Update dicts with increasing ids."""
+
+    def __init__(self):
+        self._ids = itertools.count(1)
+        self.now = int(time.time())
+
+    def _user(self, user_id: int) -> dict:
+        return {"id": user_id, "is_bot": False, "first_name": f"Resident {user_id - FIRST_RESIDENT_ID}"}
+
+    def _chat(self, user_id: int, group_chat_id: int = None) -> dict:
+        if group_chat_id:
+            return {"id": group_chat_id, "type": "supergroup", "title": "Corridor"}
+        return {"id": user_id, "type": "private", "first_name": f"Resident {user_id}"}
+
+    def command(self, user_id: int, text: str, group_chat_id: int = None) -> dict:
+        update_id = next(self._ids)
+        return {
+            "update_id": update_id,
+            "message": {
+                "message_id": update_id,
+                "date": self.now,
+                "chat": self._chat(user_id, group_chat_id),
+                "from": self._user(user_id),
+                "text": text,
+                "entities": [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}],
+            },
+        }
+
+    def callback(self, user_id: int, data: str, group_chat_id: int = None) -> dict:
+        update_id = next(self._ids)
+        chat = self._chat(user_id, group_chat_id)
+        return {
+            "update_id": update_id,
+            "callback_query": {
+                "id": str(update_id),
+                "from": self._user(user_id),
+                "chat_instance": str(chat["id"]),
+                "data": data,
+                "message": {"message_id": update_id, "date": self.now, "chat": chat, "text": "menu"},
+            },
+        }
+
+
+def build_visits(residents: int, corridors: int, tasks: Dict[int, Dict[str, List[int]]],
+                 rng: random.Random) -> List[List[dict]]:
+    """One list of updates per resident, to be processed in order."""
+    factory = UpdateFactory()
+    visits = []
+
+    for i in range(residents):
+        user_id = FIRST_RESIDENT_ID + i
+        group_chat_id = corridor_chat_id(i, corridors)
+        corridor_tasks = tasks[group_chat_id]
+        category = rng.choice(sorted(corridor_tasks))
+        task_id = rng.choice(corridor_tasks[category])
+
+        visit = [
+            factory.callback(user_id, "menu"),
+            factory.callback(user_id, "complete:categories"),
+            factory.callback(user_id, f"complete:category:{category}"),
+            factory.callback(user_id, f"complete:task:{task_id}"),
+            factory.callback(user_id, "mystats"),
+            factory.command(user_id, "/status", group_chat_id),
+        ]
+        if rng.random() < AMEND_RATIO:
+            visit += [
+                factory.callback(user_id, "amend:categories"),
+                factory.callback(user_id, f"amend:task:{task_id}"),
+            ]
+        visit.append(factory.callback(user_id, "status", group_chat_id))
+        visits.append(visit)
+
+    return visits
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+async def run_visits(application, visits: List[List[dict]], concurrency: int) -> List[float]:
+    """Process the visits, ``concurrency`` residents at a time; returns latencies."""
+    from telegram import Update
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def visit(updates: List[dict]):
+        async with semaphore:
+            for data in updates:
+                update = Update.de_json(data, application.bot)
+                started = time.perf_counter()
+                await application.process_update(update)
+                latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*[visit(updates) for updates in visits])
+    return latencies
+
+
+def check_thresholds(args, summary: Dict[str, float]) -> bool:
+    ok = True
+    if args.min_throughput is not None and summary["throughput"] < args.min_throughput:
+        logger.error(f"❌ Throughput {summary['throughput']:.1f}/s is below {args.min_throughput}/s")
+        ok = False
+    if args.max_p99_ms is not None and summary["p99_ms"] > args.max_p99_ms:
+        logger.error(f"❌ p99 latency {summary['p99_ms']:.1f} ms is above {args.max_p99_ms} ms")
+        ok = False
+    if args.max_queries_per_update is not None and summary["queries_per_update"] > args.max_queries_per_update:
+        logger.error(
+            f"❌ {summary['queries_per_update']:.2f} queries/update is above {args.max_queries_per_update}"
+        )
+        ok = False
+    return ok
+
+
+async def run_load_test(args) -> int:
+    fake_api = FakeBotApi()
+    api_port = await fake_api.start()
+
+    # Must be in place before src.database creates its engines
+    scratch_db = f"{settings.postgres_db}_loadtest"
+    settings.postgres_db = scratch_db
+    settings.telegram_api_base_url = f"http://127.0.0.1:{api_port}/bot"
+
+    create_scratch_database(scratch_db)
+    try:
+        tasks = seed({FIRST_RESIDENT_ID + i: corridor_chat_id(i, args.corridors) for i in range(args.residents)})
+        visits = build_visits(args.residents, args.corridors, tasks, random.Random(args.seed))
+        summary = await _measure(args, fake_api, visits)
+    finally:
+        from src.database import async_engine, engine
+
+        await async_engine.dispose()
+        engine.dispose()
+        await fake_api.stop()
+        if not args.keep_db:
+            drop_scratch_database(scratch_db)
+
+    if args.json:
+        print(json.dumps(summary))
+    if not check_thresholds(args, summary):
+        return 1
+    logger.info("✅ Within thresholds")
+    return 0
+
+
+async def _measure(args, fake_api: FakeBotApi, visits: List[List[dict]]) -> Dict[str, float]:
+    """Process the visits; returns throughput, p50/p99 latency (ms) and queries per update."""
+    from src.bot import CorridorBot
+    from src.database import async_engine
+
+    queries = 0
+
+    def count_query(*_):
+        nonlocal queries
+        queries += 1
+
+    bot = CorridorBot()
+    async with bot.app:
+        await bot.app.post_init(bot.app)
+
+        event.listen(async_engine.sync_engine, "before_cursor_execute", count_query)
+        total = sum(len(updates) for updates in visits)
+        logger.info(
+            f"Processing {total} updates from {args.residents} residents in {args.corridors} corridors "
+            f"(concurrency {args.concurrency})"
+        )
+
+        started = time.perf_counter()
+        latencies = sorted(await run_visits(bot.app, visits, args.concurrency))
+        elapsed = time.perf_counter() - started
+        event.remove(async_engine.sync_engine, "before_cursor_execute", count_query)
+
+    # Group notifications still queued in the outbox are irrelevant here
+    for task in asyncio.all_tasks() - {asyncio.current_task()}:
+        if task.get_name().startswith("outbox-"):
+            task.cancel()
+
+    throughput = len(latencies) / elapsed
+    p50_ms = percentile(latencies, 0.50) * 1000
+    p99_ms = percentile(latencies, 0.99) * 1000
+    queries_per_update = queries / len(latencies)
+
+    logger.info("=" * 60)
+    logger.info(f"Updates:      {len(latencies)} in {elapsed:.2f}s")
+    logger.info(f"Throughput:   {throughput:.1f} updates/sec")
+    logger.info(f"Latency p50:  {p50_ms:.1f} ms")
+    logger.info(f"Latency p99:  {p99_ms:.1f} ms")
+    logger.info(f"DB queries:   {queries} ({queries_per_update:.2f} per update)")
+    logger.info(f"Bot API calls: {dict(fake_api.calls)}")
+    logger.info(f"Messages sent/edited: {len(fake_api.messages)}")
+
+    return {
+        "updates": len(latencies),
+        "throughput": throughput,
+        "p50_ms": p50_ms,
+        "p99_ms": p99_ms,
+        "queries_per_update": queries_per_update,
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--residents", type=int, default=200, help="simulated residents")
+    parser.add_argument("--corridors", type=int, default=1, help="corridor group chats")
+    parser.add_argument("--concurrency", type=int, default=50, help="residents active at once")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for task choices")
+    parser.add_argument("--keep-db", action="store_true", help="don't drop the scratch database")
+    parser.add_argument("--min-throughput", type=float, help="fail below this many updates/sec")
+    parser.add_argument("--max-p99-ms", type=float, help="fail above this p99 latency")
+    parser.add_argument("--max-queries-per-update", type=float, help="fail above this many queries/update")
+    parser.add_argument("--json", action="store_true", help="print the results to stdout as JSON")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run_load_test(parse_args())))
@@ -8,16 +8,26 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from datetime import datetime, timedelta
+from src.config import settings
 from src.database import get_db, init_db
-from src.models import Person, TaskType, TaskOptOut, Week, TaskInstance
+from src.models import Corridor, Person, TaskType, TaskOptOut, Week, insert_week_statement, insert_week_tasks_statement
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def create_task_types(db):
-    """Create all task type definitions."""
+def create_corridor(db, name: str, chat_id: int) -> Corridor:
+    """Create a corridor served in the group ``chat_id``."""
+    logger.info(f"Creating corridor {name} (group {chat_id})...")
+    corridor = Corridor(name=name, chat_id=chat_id)
+    db.add(corridor)
+    db.commit()
+    return corridor
+
+
+def create_task_types(db, corridor_id: int):
+    """Create all task type definitions for a corridor."""
     logger.info("Creating task types...")
     
     task_definitions = [
@@ -189,14 +199,14 @@ def create_task_types(db):
     ]
     
     for task_def in task_definitions:
-        task = TaskType(**task_def)
+        task = TaskType(corridor_id=corridor_id, **task_def)
         db.add(task)
     
     db.commit()
     logger.info(f"Created {len(task_definitions)} task types")
 
 
-def create_test_people(db):
+def create_test_people(db, corridor_id: int):
     """Create test users for development."""
     logger.info("Creating test people...")
     
@@ -208,7 +218,7 @@ def create_test_people(db):
     ]
     
     for user_data in test_users:
-        person = Person(**user_data)
+        person = Person(corridor_id=corridor_id, **user_data)
         db.add(person)
     
     db.commit()
@@ -225,6 +235,7 @@ def create_test_opt_outs(db):
     
     for fridge in fridges:
         opt_out = TaskOptOut(
+            corridor_id=alice.corridor_id,
             person_id=alice.id,
             task_type_id=fridge.id,
             reason="Has own fridge in room"
@@ -235,8 +246,8 @@ def create_test_opt_outs(db):
     logger.info("Created test opt-outs")
 
 
-def create_current_week(db):
-    """Create the current week with all task instances."""
+def create_current_week(db, corridor_id: int):
+    """Create the corridor's current week with all task instances."""
     logger.info("Creating current week...")
     
     # Get current week number
@@ -249,38 +260,14 @@ def create_current_week(db):
     
     deadline = start_of_week + timedelta(days=4, hours=12)  # Friday 12:00
     
-    # Create week
-    week = Week(
-        year=year,
-        week_number=week_num,
-        start_date=start_of_week.date(),
-        deadline=deadline,
-        closed=False
-    )
-    db.add(week)
-    db.commit()
+    # Create week (no-op if it already exists)
+    week_id = db.scalar(insert_week_statement(corridor_id, year, week_num, start_of_week.date(), deadline))
+    if week_id is None:
+        week_id = db.query(Week.id).filter_by(corridor_id=corridor_id, year=year, week_number=week_num).scalar()
     
-    # Get all task types and active people
-    task_types = db.query(TaskType).all()
-    people = db.query(Person).filter_by(active=True).all()
-    
-    # Create task instances (excluding opted-out combinations)
-    created_count = 0
-    for task_type in task_types:
-        # Check if this is an optional task with opt-outs
-        opt_out_person_ids = [
-            opt.person_id 
-            for opt in db.query(TaskOptOut).filter_by(task_type_id=task_type.id).all()
-        ]
-        
-        # Always create the task instance (eligible people can claim it)
-        instance = TaskInstance(
-            week_id=week.id,
-            task_type_id=task_type.id,
-            status="pending"
-        )
-        db.add(instance)
-        created_count += 1
+    # Create task instances for all task types in one INSERT ... SELECT
+    # (eligible people can claim them; existing instances are kept)
+    created_count = db.execute(insert_week_tasks_statement(week_id)).rowcount
     
     db.commit()
     logger.info(f"Created week {week_num}/{year} with {created_count} task instances")
@@ -300,11 +287,18 @@ def populate_database():
             logger.info("To reset, run: python scripts/reset_db.py")
             return
         
+        if not settings.telegram_chat_id:
+            logger.error("❌ Set TELEGRAM_CHAT_ID to the group of the first corridor")
+            return
+        
         # Create all data
-        create_task_types(db)
-        #create_test_people(db)
+        corridor = db.query(Corridor).filter_by(chat_id=int(settings.telegram_chat_id)).first()
+        if corridor is None:
+            corridor = create_corridor(db, "Corridor", int(settings.telegram_chat_id))
+        create_task_types(db, corridor.id)
+        #create_test_people(db, corridor.id)
         #create_test_opt_outs(db)
-        create_current_week(db)
+        create_current_week(db, corridor.id)
     
     logger.info("Database population completed successfully!")
     logger.info("\nTest users created:")
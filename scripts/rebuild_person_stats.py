@@ -0,0 +1,73 @@
+"""Recompute the person_stats table from the completion log.
+
+The table is kept up to date as tasks are completed and amended; run this
+after changing task_instances or completion_log by hand, or to check the
+stats (``--check`` reports rows that differ without changing anything).
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import argparse
+import asyncio
+import logging
+
+from sqlalchemy import select
+
+from src.database import AsyncSessionLocal, async_engine
+from src.models import PersonStats
+from src.person_stats import rebuild_person_stats
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+COMPARED = ["total_completions", "category_counts", "current_streak", "last_week_start"]
+
+
+async def _snapshot(db):
+    rows = await db.execute(
+        select(PersonStats.person_id, *(getattr(PersonStats, column) for column in COMPARED))
+    )
+    return {row.person_id: {column: getattr(row, column) for column in COMPARED} for row in rows}
+
+
+async def rebuild(check: bool) -> int:
+    async with AsyncSessionLocal() as db:
+        before = await _snapshot(db)
+        rows = await rebuild_person_stats(db)
+        after = await _snapshot(db)
+        if check:
+            await db.rollback()
+        else:
+            await db.commit()
+    await async_engine.dispose()
+
+    differing = sorted(
+        person_id for person_id in before.keys() | after.keys()
+        if before.get(person_id) != after.get(person_id)
+    )
+    for person_id in differing:
+        logger.warning(f"Person {person_id}: stored {before.get(person_id)}, rebuilt {after.get(person_id)}")
+
+    if check and differing:
+        logger.error(f"❌ Stats of {len(differing)} of {rows} people differ from the completion log")
+        return 1
+    if differing:
+        logger.info(f"✅ Rebuilt stats of {rows} people ({len(differing)} changed)")
+    else:
+        logger.info(f"✅ Stats of {rows} people match the completion log")
+    return 0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--check", action="store_true", help="only report differences, keep the stored stats")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(rebuild(parse_args().check)))
@@ -0,0 +1,214 @@
+"""Replay a recording of real updates against a fresh database.
+
+Reads a recording made with RECORD_UPDATES_PATH (src/recorder.py), creates
+a scratch database (``<POSTGRES_DB>_replay``, dropped afterwards) with a
+corridor per recorded group, the recorded residents (each in the corridor of
+the group they wrote in most) and current weeks, and feeds the updates through
+CorridorBot's handlers with the Bot API replaced by scripts/fake_bot_api.py.
+
+Updates are sent at their recorded pace (``--speed 1``), faster
+(``--speed 10``) or as fast as possible (``--speed max``). Task ids in
+button data are mapped onto the tasks of the sender's corridor in the
+scratch database. The latency
+distribution can be saved and compared with an earlier run:
+
+    uv run python scripts/replay_updates.py sunday.jsonl.gz --speed 10 --output v1.json
+    uv run python scripts/replay_updates.py sunday.jsonl.gz --speed 10 --compare v1.json
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import argparse
+import asyncio
+import json
+import logging
+import re
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from fake_bot_api import FakeBotApi
+from load_test import FIRST_CORRIDOR_CHAT_ID, create_scratch_database, drop_scratch_database, percentile, seed
+from src.config import settings
+from src.recorder import read_recording
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Keep the bot's own per-update logging out of the measurements
+logging.getLogger("httpx").setLevel(logging.WARNING)
+logging.getLogger("aiohttp.access").setLevel(logging.WARNING)
+logging.getLogger("apscheduler").setLevel(logging.WARNING)
+
+# Percentiles reported and compared
+PERCENTILES = [0.50, 0.90, 0.99]
+
+TASK_ID = re.compile(r":task:(\d+)$")
+
+
+def _sender(update: dict) -> Tuple[Optional[int], Optional[int]]:
+    """(user id, chat id) of a message or callback update."""
+    if "message" in update:
+        message = update["message"]
+        return message.get("from", {}).get("id"), message["chat"]["id"]
+    if "callback_query" in update:
+        query = update["callback_query"]
+        return query["from"]["id"], query.get("message", {}).get("chat", {}).get("id")
+    return None, None
+
+
+def assign_corridors(senders: List[Tuple[Optional[int], Optional[int]]]) -> Dict[int, int]:
+    """Group chat whose corridor each user is put in: the one they wrote in most."""
+    by_user: Dict[int, Counter] = {}
+    for user_id, chat_id in senders:
+        if user_id:
+            counts = by_user.setdefault(user_id, Counter())
+            if chat_id and chat_id < 0:
+                counts[chat_id] += 1
+
+    everywhere = Counter(chat_id for _, chat_id in senders if chat_id and chat_id < 0)
+    fallback = everywhere.most_common(1)[0][0] if everywhere else FIRST_CORRIDOR_CHAT_ID
+    return {
+        user_id: counts.most_common(1)[0][0] if counts else fallback
+        for user_id, counts in by_user.items()
+    }
+
+
+def remap_task_ids(updates: List[dict], residents: Dict[int, int], tasks: Dict[int, List[int]]):
+    """Point ``...:task:<id>`` button data at tasks of the sender's corridor."""
+    for update in updates:
+        query = update.get("callback_query")
+        if query and query.get("data"):
+            task_ids = tasks[residents[query["from"]["id"]]]
+            query["data"] = TASK_ID.sub(
+                lambda m: f":task:{task_ids[int(m.group(1)) % len(task_ids)]}", query["data"]
+            )
+
+
+async def replay(application, timed_updates: List[Tuple[Optional[float], dict]], speed: Optional[float],
+                 concurrency: int) -> List[float]:
+    """Process the updates at ``speed`` (None: as fast as possible); returns latencies."""
+    from telegram import Update
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    first = next((t for t, _ in timed_updates if t is not None), None)
+    started = time.monotonic()
+
+    async def process(t: Optional[float], data: dict):
+        if speed and t is not None and first is not None:
+            await asyncio.sleep(max(0.0, started + (t - first) / speed - time.monotonic()))
+        async with semaphore:
+            update = Update.de_json(data, application.bot)
+            begin = time.perf_counter()
+            await application.process_update(update)
+            latencies.append(time.perf_counter() - begin)
+
+    await asyncio.gather(*[process(t, data) for t, data in timed_updates])
+    return latencies
+
+
+def summarize(latencies: List[float], elapsed: float) -> Dict[str, float]:
+    latencies = sorted(latencies)
+    summary = {"updates": len(latencies), "seconds": round(elapsed, 3)}
+    for q in PERCENTILES:
+        summary[f"p{int(q * 100)}_ms"] = round(percentile(latencies, q) * 1000, 2)
+    summary["max_ms"] = round(latencies[-1] * 1000, 2)
+    return summary
+
+
+def report(summary: Dict[str, float], baseline: Optional[Dict[str, float]]):
+    logger.info("=" * 60)
+    logger.info(f"Updates:      {summary['updates']} in {summary['seconds']:.2f}s")
+    for key, value in summary.items():
+        if not key.endswith("_ms"):
+            continue
+        line = f"Latency {key[:-3]:<5} {value:8.1f} ms"
+        if baseline and baseline.get(key):
+            change = (value - baseline[key]) / baseline[key] * 100
+            line += f"   (baseline {baseline[key]:.1f} ms, {change:+.0f}%)"
+        logger.info(line)
+
+
+async def run_replay(args) -> int:
+    timed_updates = list(read_recording(args.recording))
+    if not timed_updates:
+        logger.error(f"❌ No updates in {args.recording}")
+        return 1
+
+    senders = [_sender(update) for _, update in timed_updates]
+    residents = assign_corridors(senders)
+
+    fake_api = FakeBotApi()
+    api_port = await fake_api.start()
+
+    # Must be in place before src.database creates its engines
+    scratch_db = f"{settings.postgres_db}_replay"
+    settings.postgres_db = scratch_db
+    settings.telegram_api_base_url = f"http://127.0.0.1:{api_port}/bot"
+
+    create_scratch_database(scratch_db)
+    try:
+        tasks = seed(residents)
+        remap_task_ids(
+            [update for _, update in timed_updates],
+            residents,
+            {chat_id: sorted(sum(by_category.values(), [])) for chat_id, by_category in tasks.items()},
+        )
+
+        from src.bot import CorridorBot
+
+        bot = CorridorBot()
+        async with bot.app:
+            await bot.app.post_init(bot.app)
+            speed = None if args.speed == "max" else float(args.speed)
+            logger.info(
+                f"Replaying {len(timed_updates)} updates from {len(residents)} users in {len(tasks)} corridors "
+                f"at {args.speed}{'x' if speed else ''} speed"
+            )
+            started = time.perf_counter()
+            latencies = await replay(bot.app, timed_updates, speed, args.concurrency)
+            elapsed = time.perf_counter() - started
+
+        # Group notifications still queued in the outbox are irrelevant here
+        for task in asyncio.all_tasks() - {asyncio.current_task()}:
+            if task.get_name().startswith("outbox-"):
+                task.cancel()
+    finally:
+        from src.database import async_engine, engine
+
+        await async_engine.dispose()
+        engine.dispose()
+        await fake_api.stop()
+        if not args.keep_db:
+            drop_scratch_database(scratch_db)
+
+    summary = summarize(latencies, elapsed)
+    baseline = json.loads(Path(args.compare).read_text()) if args.compare else None
+    report(summary, baseline)
+    logger.info(f"Bot API calls: {dict(fake_api.calls)}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(summary, indent=2) + "\n")
+        logger.info(f"✅ Summary written to {args.output}")
+    return 0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("recording", help="recorded updates (.jsonl or .jsonl.gz)")
+    parser.add_argument("--speed", default="max", help="1, 10, ... times the recorded pace, or max")
+    parser.add_argument("--concurrency", type=int, default=50, help="updates processed at once")
+    parser.add_argument("--output", help="write the latency summary to this JSON file")
+    parser.add_argument("--compare", help="summary JSON of an earlier run to compare with")
+    parser.add_argument("--keep-db", action="store_true", help="don't drop the scratch database")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run_replay(parse_args())))
@@ -9,7 +9,7 @@ sys.path.insert(0, str(project_root))
 
 from src.config import settings
 from src.database import get_db
-from src.models import Person, TaskType, Week, TaskInstance
+from src.models import Corridor, Person, TaskType, Week, TaskInstance
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -22,7 +22,6 @@ def test_configuration():
     
     try:
         assert settings.telegram_bot_token, "TELEGRAM_BOT_TOKEN not set"
-        assert settings.telegram_chat_id, "TELEGRAM_CHAT_ID not set"
         assert settings.postgres_password, "POSTGRES_PASSWORD not set"
         logger.info("✅ Configuration loaded successfully")
         logger.info(f"   Database: {settings.postgres_db}")
@@ -58,14 +57,20 @@ def test_database_tables():
     try:
         with get_db() as db:
             # Check if tables exist by counting records
+            corridors = db.query(Corridor).filter_by(active=True).count()
             task_types = db.query(TaskType).count()
             people = db.query(Person).count()
             weeks = db.query(Week).count()
             
+            logger.info(f"   Corridors: {corridors}")
             logger.info(f"   Task types: {task_types}")
             logger.info(f"   People: {people}")
             logger.info(f"   Weeks: {weeks}")
             
+            if corridors == 0:
+                logger.warning("⚠️  No corridors found. Set TELEGRAM_CHAT_ID and run: python scripts/populate_db.py")
+                return False
+            
             if task_types == 0:
                 logger.warning("⚠️  No task types found. Run: python scripts/populate_db.py")
                 return False
@@ -83,26 +88,28 @@ def test_database_tables():
 
 
 def test_current_week():
-    """Test if current week exists and has tasks."""
+    """Test if every corridor has a current week with tasks."""
     logger.info("Testing current week setup...")
     
     try:
         with get_db() as db:
-            current_week = db.query(Week).filter_by(closed=False).first()
-            
-            if not current_week:
-                logger.warning("⚠️  No active week found")
-                return False
-            
-            task_instances = db.query(TaskInstance).filter_by(week_id=current_week.id).count()
-            
-            logger.info(f"   Week: {current_week.week_number}/{current_week.year}")
-            logger.info(f"   Deadline: {current_week.deadline}")
-            logger.info(f"   Task instances: {task_instances}")
-            
-            if task_instances == 0:
-                logger.warning("⚠️  No task instances for current week")
-                return False
+            for corridor in db.query(Corridor).filter_by(active=True).order_by(Corridor.id):
+                current_week = db.query(Week).filter_by(corridor_id=corridor.id, closed=False).first()
+                
+                if not current_week:
+                    logger.warning(f"⚠️  No active week found for {corridor.name}")
+                    return False
+                
+                task_instances = db.query(TaskInstance).filter_by(week_id=current_week.id).count()
+                
+                logger.info(f"   {corridor.name} (group {corridor.chat_id}):")
+                logger.info(f"   Week: {current_week.week_number}/{current_week.year}")
+                logger.info(f"   Deadline: {current_week.deadline}")
+                logger.info(f"   Task instances: {task_instances}")
+                
+                if task_instances == 0:
+                    logger.warning(f"⚠️  No task instances for the current week of {corridor.name}")
+                    return False
             
             logger.info("✅ Current week configured correctly")
             return True
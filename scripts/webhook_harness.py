@@ -0,0 +1,250 @@
+"""Drive the webhook runner with recorded updates and measure throughput.
+
+Starts a fake Bot API (scripts/fake_bot_api.py), runs the bot in webhook
+mode against it and POSTs updates at the webhook with a fixed concurrency,
+then reports updates/sec and p50/p99 latency. Nothing talks to Telegram.
+With ``--workers N`` the bot runs as a separate process in supervisor mode
+(src/supervisor.py) with N workers, to compare throughput across cores.
+
+Updates come from a JSON-lines file (one Update per line, or a recording
+made with RECORD_UPDATES_PATH) or, by default, from a built-in mix of read-only
+commands and button taps. Uses the database from .env; the default mix
+doesn't modify it.
+
+    uv run python scripts/webhook_harness.py --updates 2000 --concurrency 50
+    uv run python scripts/webhook_harness.py --file recorded_updates.jsonl
+    uv run python scripts/webhook_harness.py --updates 5000 --concurrency 100 --workers 4
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import argparse
+import asyncio
+import itertools
+import logging
+import os
+import signal
+import socket
+import subprocess
+import time
+from typing import Dict, List
+
+import aiohttp
+
+from fake_bot_api import FakeBotApi
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Keep the bot's own per-update logging out of the measurements
+logging.getLogger("httpx").setLevel(logging.WARNING)
+logging.getLogger("aiohttp.access").setLevel(logging.WARNING)
+
+SECRET_TOKEN = "harness-secret"
+
+# (chat is private, command or callback data) for the default update mix
+DEFAULT_MIX = [
+    (False, "/status"),
+    (True, "/tasks"),
+    (True, "cb:menu"),
+    (True, "cb:status"),
+    (True, "cb:complete:categories"),
+    (True, "cb:tasks"),
+    (False, "/whooptedout"),
+    (True, "cb:ask:categories"),
+]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def build_default_updates(count: int, residents: Dict[int, int]) -> List[dict]:
+    """Generate ``count`` Update dicts cycling through DEFAULT_MIX.
+
+    ``residents`` maps telegram ids to their corridor's group chat id.
+    """
+    now = int(time.time())
+    updates = []
+    mix = itertools.cycle(DEFAULT_MIX)
+    users = itertools.cycle(residents.items())
+
+    for update_id in range(1, count + 1):
+        private, action = next(mix)
+        user_id, group_chat_id = next(users)
+        user = {"id": user_id, "is_bot": False, "first_name": f"Resident {user_id}"}
+        chat = (
+            {"id": user_id, "type": "private", "first_name": user["first_name"]}
+            if private
+            else {"id": group_chat_id, "type": "supergroup", "title": "Corridor"}
+        )
+
+        if action.startswith("cb:"):
+            updates.append({
+                "update_id": update_id,
+                "callback_query": {
+                    "id": str(update_id),
+                    "from": user,
+                    "chat_instance": str(chat["id"]),
+                    "data": action[3:],
+                    "message": {"message_id": update_id, "date": now, "chat": chat, "text": "menu"},
+                },
+            })
+        else:
+            updates.append({
+                "update_id": update_id,
+                "message": {
+                    "message_id": update_id,
+                    "date": now,
+                    "chat": chat,
+                    "from": user,
+                    "text": action,
+                    "entities": [{"type": "bot_command", "offset": 0, "length": len(action)}],
+                },
+            })
+
+    return updates
+
+
+def load_updates(path: str) -> List[dict]:
+    """Read a recording (src/recorder.py) or one Update JSON object per line."""
+    from src.recorder import read_recording
+
+    return [update for _, update in read_recording(path)]
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+async def post_updates(url: str, updates: List[dict], concurrency: int) -> List[float]:
+    """POST every update, ``concurrency`` at a time; returns latencies in seconds."""
+    queue = asyncio.Queue()
+    for update in updates:
+        queue.put_nowait(update)
+    latencies = []
+    failures = 0
+
+    async def worker(session: aiohttp.ClientSession):
+        nonlocal failures
+        while not queue.empty():
+            update = queue.get_nowait()
+            started = time.perf_counter()
+            async with session.post(url, json=update) as response:
+                await response.read()
+                if response.status != 200:
+                    failures += 1
+            latencies.append(time.perf_counter() - started)
+
+    headers = {"X-Telegram-Bot-Api-Secret-Token": SECRET_TOKEN}
+    async with aiohttp.ClientSession(headers=headers) as session:
+        await asyncio.gather(*[worker(session) for _ in range(concurrency)])
+
+    if failures:
+        logger.warning(f"⚠️  {failures} requests were not answered with 200")
+    return latencies
+
+
+async def run_harness(args) -> int:
+    fake_api = FakeBotApi()
+    api_port = await fake_api.start()
+    webhook_port = _free_port()
+
+    # Must be in place before src.config builds its settings
+    os.environ.update({
+        "TELEGRAM_API_BASE_URL": f"http://127.0.0.1:{api_port}/bot",
+        "BOT_MODE": "webhook",
+        "WEBHOOK_URL": f"http://127.0.0.1:{webhook_port}",
+        "WEBHOOK_LISTEN": "127.0.0.1",
+        "WEBHOOK_PORT": str(webhook_port),
+        "WEBHOOK_SECRET_TOKEN": SECRET_TOKEN,
+    })
+
+    from sqlalchemy import select
+
+    from src.config import settings
+    from src.database import get_async_db
+    from src.models import Corridor, Person
+
+    if args.file:
+        updates = load_updates(args.file)
+    else:
+        # Residents of every corridor, tapping in their group
+        async with get_async_db() as db:
+            corridor_chats = dict((await db.execute(select(Corridor.id, Corridor.chat_id))).all())
+            if not corridor_chats:
+                logger.error("❌ No corridor found. Run: python scripts/populate_db.py")
+                await fake_api.stop()
+                return 1
+            residents = {
+                telegram_id: corridor_chats[corridor_id]
+                for telegram_id, corridor_id in await db.execute(
+                    select(Person.telegram_id, Person.corridor_id).filter_by(active=True).order_by(Person.id)
+                )
+            }
+        updates = build_default_updates(args.updates, residents or {1001: min(corridor_chats.values())})
+
+    if args.workers > 1:
+        # Supervisor and workers run as their own processes
+        server = subprocess.Popen(
+            [sys.executable, str(project_root / "src" / "bot.py")],
+            env={**os.environ, "WORKERS": str(args.workers)},
+        )
+    else:
+        from src.bot import CorridorBot
+        from src.webhook import run_webhook
+
+        bot = CorridorBot()
+        server = asyncio.create_task(run_webhook(bot.app))
+
+    # Wait for the webhook to accept connections (workers take a few seconds)
+    for _ in range(600):
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", webhook_port)
+            writer.close()
+            break
+        except OSError:
+            await asyncio.sleep(0.1)
+
+    url = f"http://127.0.0.1:{webhook_port}{settings.webhook_path}"
+    logger.info(f"Posting {len(updates)} updates to {url} (concurrency {args.concurrency})")
+
+    started = time.perf_counter()
+    latencies = sorted(await post_updates(url, updates, args.concurrency))
+    elapsed = time.perf_counter() - started
+
+    if args.workers > 1:
+        server.send_signal(signal.SIGTERM)
+        await asyncio.to_thread(server.wait)
+    else:
+        server.cancel()
+        await asyncio.gather(server, return_exceptions=True)
+    await fake_api.stop()
+
+    logger.info("=" * 60)
+    logger.info(f"Updates:      {len(latencies)} in {elapsed:.2f}s")
+    logger.info(f"Throughput:   {len(latencies) / elapsed:.1f} updates/sec")
+    logger.info(f"Latency p50:  {percentile(latencies, 0.50) * 1000:.1f} ms")
+    logger.info(f"Latency p99:  {percentile(latencies, 0.99) * 1000:.1f} ms")
+    logger.info(f"Bot API calls: {dict(fake_api.calls)}")
+    return 0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--file", help="JSON-lines file or recording with updates")
+    parser.add_argument("--updates", type=int, default=500, help="number of generated updates")
+    parser.add_argument("--concurrency", type=int, default=20, help="requests in flight")
+    parser.add_argument("--workers", type=int, default=1, help="run in supervisor mode with this many workers")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run_harness(parse_args())))
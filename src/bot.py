@@ -7,7 +7,10 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
+import asyncio
 import logging
+from functools import partial
+from sqlalchemy import select
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import (
     Application,
@@ -17,18 +20,32 @@ from telegram.ext import (
 )
 from telegram.constants import ParseMode
 
+from src.catalogue import load_catalogue
 from src.config import settings
-from src.database import get_db
+from src.corridors import get_corridor_for_chat, get_corridors, resolve_corridor
+from src.database import get_async_db
 from src.models import Person
 from src.menus import create_main_menu
+from src.metrics import TimedRequest, start_metrics_server, timed, track_handler
+from src.outbox import get_outbox
+from src.query_profiler import dump_query_profile
+from src.recorder import close_recorder, install_recorder
 from src.reminders import setup_reminders
-from src.week_manager import setup_week_rollover
+from src.router import CallbackRouter
+from src.scheduler import prune_stale_jobs
+from src.sharding import owns_corridor
+from src.status_board import refresh_status_board
+from src.supervisor import run_supervisor, run_worker
+from src.webhook import ALLOWED_UPDATES, run_webhook
+from src.week_manager import setup_week_rollover, sync_rollover_deadlines
 
 # Import handlers
 from src.handlers import (
-    handle_complete_flow,
-    handle_amend_flow,
-    handle_ask_flow,
+    show_category_menu,
+    show_task_menu,
+    complete_task_by_id,
+    amend_task_by_id,
+    show_task_instructions,
     cmd_status,
     show_status_callback,
     cmd_tasks,
@@ -56,36 +73,137 @@ class CorridorBot:
     
     def __init__(self):
         """Initialize the bot."""
-        self.app = Application.builder().token(settings.telegram_bot_token).build()
-        self.group_chat_id = settings.telegram_chat_id
+        # Handlers use the async DB layer, so updates can be processed concurrently
+        builder = (
+            Application.builder()
+            .token(settings.telegram_bot_token)
+            .request(TimedRequest(connection_pool_size=256))
+            .concurrent_updates(True)
+            .post_init(self._post_init)
+            .post_stop(self._post_stop)
+        )
+        if settings.telegram_api_base_url:
+            builder = builder.base_url(settings.telegram_api_base_url)
+        self.app = builder.build()
+        self.router = CallbackRouter(
+            on_private_required=self.redirect_to_private,
+            resolve_corridor=self.resolve_corridor,
+            on_corridor_missing=self.explain_no_corridor,
+        )
         self._register_handlers()
+        self._register_routes()
         
-        # Setup reminders (twice a week)
-        setup_reminders(self.app, self.group_chat_id)
+        # Setup reminders of all corridors (twice a week)
+        setup_reminders(self.app)
         
-        # Setup automatic week rollover
-        setup_week_rollover(self.app, self.group_chat_id)
+        # Setup automatic week rollover of all corridors
+        setup_week_rollover(self.app)
+    
+    async def _post_init(self, app: Application):
+        """Warm in-memory caches before the first update is processed."""
+        await load_catalogue()
+        start_metrics_server()
+        # The job store is synchronous
+        await asyncio.to_thread(prune_stale_jobs)
+        await sync_rollover_deadlines(app)
+        async with get_async_db() as db:
+            corridors = await get_corridors(db)
+        # In supervisor mode each worker only serves the corridors it owns
+        corridors = [corridor for corridor in corridors if owns_corridor(corridor)]
+        logger.info(f"Serving {len(corridors)} corridor(s): {', '.join(c.name for c in corridors)}")
+        for corridor in corridors:
+            refresh_status_board(app, corridor.chat_id)
+    
+    async def _post_stop(self, app: Application):
+        """Deliver queued notifications and write out debugging output before exiting."""
+        await get_outbox(app).flush()
+        dump_query_profile()
+        close_recorder(app)
     
     def _register_handlers(self):
         """Register all command and callback handlers."""
+        # Optional recording of incoming updates (runs before the handlers)
+        install_recorder(self.app)
+        
         # Command handlers
-        self.app.add_handler(CommandHandler("start", self.cmd_start))
-        self.app.add_handler(CommandHandler("menu", self.cmd_menu))
-        self.app.add_handler(CommandHandler("help", self.cmd_help))
-        self.app.add_handler(CommandHandler("status", cmd_status))
-        self.app.add_handler(CommandHandler("tasks", cmd_tasks))
-        self.app.add_handler(CommandHandler("mystats", self._cmd_my_stats_wrapper))
-        self.app.add_handler(CommandHandler("map", self._cmd_show_map_wrapper))
-        self.app.add_handler(CommandHandler("optout", self._cmd_optout_wrapper))
-        self.app.add_handler(CommandHandler("whooptedout", cmd_who_opted_out))
+        self._add_command("start", self.cmd_start)
+        self._add_command("menu", self.cmd_menu)
+        self._add_command("help", self.cmd_help)
+        self._add_command("status", cmd_status, corridor=True)
+        self._add_command("tasks", cmd_tasks, corridor=True)
+        self._add_command("mystats", self._cmd_my_stats_wrapper, corridor=True)
+        self._add_command("map", self._cmd_show_map_wrapper)
+        self._add_command("optout", self._cmd_optout_wrapper, corridor=True)
+        self._add_command("whooptedout", cmd_who_opted_out, corridor=True)
         
         # Callback handler for button clicks
         self.app.add_handler(CallbackQueryHandler(self.handle_callback))
     
+    def _add_command(self, command: str, callback, corridor: bool = False):
+        """Register a command handler, timed as ``/<command>`` (see src/metrics.py).
+        
+        With ``corridor`` the callback also gets ``corridor=``, the corridor
+        the update belongs to (like corridor routes, see src/router.py).
+        """
+        if corridor:
+            callback = self._with_corridor(callback)
+        self.app.add_handler(CommandHandler(command, timed(track_handler, f"/{command}")(callback)))
+    
+    def _with_corridor(self, callback):
+        async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE):
+            corridor = await self.resolve_corridor(update)
+            if corridor is None:
+                await self.explain_no_corridor(update)
+                return
+            await callback(update, context, corridor=corridor)
+        return wrapper
+    
+    def _register_routes(self):
+        """Register the inline button routes (see src/router.py)."""
+        route = self.router.add
+        
+        route("menu", self.show_main_menu)
+        route("help", self.show_help_callback)
+        route("status", show_status_callback, corridor=True)
+        route("tasks", show_tasks_callback, corridor=True)
+        route("whooptedout", show_whooptedout_callback, corridor=True)
+        route("mystats", show_stats_callback, private=True, corridor=True)
+        route("map", show_map_callback, private=True)
+        route("optout:categories", handle_optout_flow, private=True)
+        
+        for action in ("complete", "amend", "ask"):
+            route(f"{action}:categories", partial(show_category_menu, action=action),
+                  private=True, corridor=True)
+            route(f"{action}:category:<category>", partial(show_task_menu, action=action),
+                  private=True, corridor=True)
+        
+        route("complete:task:<task_instance_id:int>",
+              partial(complete_task_by_id, notify_group_func=self.notify_group), private=True, corridor=True)
+        route("amend:task:<task_instance_id:int>",
+              partial(amend_task_by_id, notify_group_func=self.notify_group), private=True, corridor=True)
+        route("ask:task:<task_instance_id:int>", show_task_instructions, private=True, corridor=True)
+    
     def is_private_chat(self, update: Update) -> bool:
         """Check if the message is from a private chat."""
         return update.effective_chat.type == "private"
     
+    async def resolve_corridor(self, update: Update):
+        """The corridor of the update's group, or of the resident in private chats (see src/corridors.py)."""
+        async with get_async_db() as db:
+            return await resolve_corridor(db, update.effective_chat, update.effective_user.id)
+    
+    async def explain_no_corridor(self, update: Update):
+        """Reply to an update that doesn't belong to any corridor."""
+        if self.is_private_chat(update):
+            text = "❌ You're not registered! Use /start first."
+        else:
+            text = "❌ This group isn't set up as a corridor yet. Ask an admin to add it."
+        
+        if update.callback_query:
+            await update.callback_query.edit_message_text(text)
+        else:
+            await update.message.reply_text(text)
+    
     async def redirect_to_private(self, update: Update, action_name: str):
         """Redirect user to private chat for private actions."""
         bot_username = (await update.get_bot()).username
@@ -115,31 +233,33 @@ class CorridorBot:
                 parse_mode=ParseMode.MARKDOWN
             )
     
-    async def notify_group(self, message: str):
-        """Send a notification to the group chat."""
-        if self.group_chat_id:
-            try:
-                await self.app.bot.send_message(
-                    chat_id=self.group_chat_id,
-                    text=message,
-                    parse_mode=ParseMode.MARKDOWN
-                )
-            except Exception as e:
-                logger.error(f"Failed to send group notification: {e}")
+    async def notify_group(self, chat_id: int, message: str, coalesce_key: str = None, footer: str = None,
+                           progress: bool = False):
+        """Queue a notification to a corridor's group chat (see src/outbox.py).
+        
+        Progress notices (completions, amends) are left to the pinned status
+        board when it is enabled.
+        """
+        refresh_status_board(self.app, chat_id)
+        if progress and settings.status_board_enabled:
+            return
+        get_outbox(self.app).send(chat_id, message, coalesce_key=coalesce_key, footer=footer)
     
     # ========== Wrapper functions for handlers that need bot methods ==========
     
-    async def _cmd_my_stats_wrapper(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+    async def _cmd_my_stats_wrapper(self, update: Update, context: ContextTypes.DEFAULT_TYPE, corridor):
         """Wrapper for cmd_my_stats to pass bot methods."""
-        await cmd_my_stats(update, context, self.is_private_chat, self.redirect_to_private)
+        await cmd_my_stats(update, context, self.is_private_chat, self.redirect_to_private, corridor)
     
     async def _cmd_show_map_wrapper(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Wrapper for cmd_show_map to pass bot methods."""
         await cmd_show_map(update, context, self.is_private_chat, self.redirect_to_private)
     
-    async def _cmd_optout_wrapper(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+    async def _cmd_optout_wrapper(self, update: Update, context: ContextTypes.DEFAULT_TYPE, corridor):
         """Wrapper for cmd_optout to pass bot methods."""
-        await cmd_optout(update, context, self.is_private_chat, self.redirect_to_private, self.notify_group)
+        await cmd_optout(
+            update, context, self.is_private_chat, self.redirect_to_private, self.notify_group, corridor
+        )
     
     # ========== Callback Handler ==========
     
@@ -148,41 +268,7 @@ class CorridorBot:
         query = update.callback_query
         await query.answer()
         
-        data = query.data
-        parts = data.split(":")
-        action = parts[0]
-        
-        # Define which actions require private chat
-        private_actions = ["complete", "amend", "ask", "optout", "mystats", "map"]
-        
-        # Check if action requires private chat
-        if action in private_actions and not self.is_private_chat(update):
-            await self.redirect_to_private(update, action.title())
-            return
-        
-        # Route to appropriate handler
-        if action == "menu":
-            await self.show_main_menu(query)
-        elif action == "status":
-            await show_status_callback(query)
-        elif action == "tasks":
-            await show_tasks_callback(query)
-        elif action == "mystats":
-            await show_stats_callback(query)
-        elif action == "map":
-            await show_map_callback(query)
-        elif action == "help":
-            await self.show_help_callback(query)
-        elif action == "whooptedout":
-            await show_whooptedout_callback(query)
-        elif action == "complete":
-            await handle_complete_flow(query, parts, self.notify_group)
-        elif action == "amend":
-            await handle_amend_flow(query, parts, self.notify_group)
-        elif action == "ask":
-            await handle_ask_flow(query, parts)
-        elif action == "optout":
-            await handle_optout_flow(query)
+        await self.router.dispatch(update)
     
     async def show_main_menu(self, query):
         """Show the main menu."""
@@ -248,23 +334,39 @@ class CorridorBot:
     # ========== Command Handlers ==========
     
     async def cmd_start(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Register user and show menu."""
+        """Register user in the corridor of the group (or the only corridor) and show menu."""
         user = update.effective_user
         is_private = self.is_private_chat(update)
         
-        with get_db() as db:
-            person = db.query(Person).filter_by(telegram_id=user.id).first()
+        async with get_async_db() as db:
+            person = await db.scalar(select(Person).filter_by(telegram_id=user.id))
             
             if not person:
+                if is_private:
+                    corridors = await get_corridors(db)
+                    corridor = corridors[0] if len(corridors) == 1 else None
+                else:
+                    corridor = await get_corridor_for_chat(db, update.effective_chat.id)
+                
+                if corridor is None:
+                    if is_private:
+                        await update.message.reply_text(
+                            "👋 Send /start in your corridor's group to register there."
+                        )
+                    else:
+                        await self.explain_no_corridor(update)
+                    return
+                
                 person = Person(
+                    corridor_id=corridor.id,
                     telegram_id=user.id,
                     name=user.first_name,
                     username=user.username
                 )
                 db.add(person)
-                db.commit()
+                await db.commit()
                 
-                message = f"Bienvenido Mijo 😉! You're registered, {user.first_name}!\n\n"
+                message = f"Bienvenido Mijo 😉! You're registered in {corridor.name}, {user.first_name}!\n\n"
             else:
                 message = f"👋 Quiubo papi, {person.name}!\n\n"
         
@@ -333,10 +435,26 @@ class CorridorBot:
     
     def run(self):
         """Start the bot."""
-        logger.info("Starting Pablito's Corridor Manager Bot...")
-        self.app.run_polling(allowed_updates=Update.ALL_TYPES)
+        mode = settings.bot_mode if settings.worker_index is None else f"worker {settings.worker_index}"
+        logger.info(f"Starting Pablito's Corridor Manager Bot ({mode})...")
+        if settings.worker_index is not None:
+            try:
+                asyncio.run(run_worker(self.app, settings.worker_index))
+            except KeyboardInterrupt:
+                pass
+        elif settings.bot_mode == "webhook":
+            try:
+                asyncio.run(run_webhook(self.app))
+            except KeyboardInterrupt:
+                pass
+        else:
+            self.app.run_polling(allowed_updates=ALLOWED_UPDATES)
 
 
 if __name__ == "__main__":
-    bot = CorridorBot()
-    bot.run()
\ No newline at end of file
+    if settings.workers > 1 and settings.worker_index is None:
+        # Supervisor: forwards updates to WORKERS copies of the bot
+        run_supervisor()
+    else:
+        bot = CorridorBot()
+        bot.run()
\ No newline at end of file
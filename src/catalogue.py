@@ -0,0 +1,148 @@
+"""Process-wide, read-through catalogue of task types, one per corridor.
+
+Task types barely change after `scripts/populate_db.py` runs, so the bot
+keeps them in memory, all corridors' task types in one load. Every ORM
+change to a TaskType bumps a version counter in `app_settings` (see
+`src/models.py`); the catalogue compares that counter at most every
+VERSION_CHECK_INTERVAL_SECONDS and reloads itself when it moved.
+"""
+
+import logging
+import time
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database import get_async_db
+from src.models import AppSetting, TaskType, CATALOGUE_VERSION_KEY
+from src.week_cache import bump_week_state_version
+
+logger = logging.getLogger(__name__)
+
+# How often the catalogue version counter is compared with the database
+VERSION_CHECK_INTERVAL_SECONDS = 30
+
+
+@dataclass(frozen=True)
+class TaskTypeInfo:
+    """Immutable copy of a TaskType row."""
+
+    id: int
+    corridor_id: int
+    name: str
+    category: str
+    description: Optional[str]
+    instructions: Optional[str]
+    media_file_id: Optional[str]
+    estimated_duration_minutes: Optional[int]
+    location: Optional[str]
+
+
+class TaskCatalogue:
+    """Task types indexed by id, by name and by category."""
+
+    def __init__(self, task_types: List[TaskTypeInfo], version: int):
+        self.version = version
+        self.task_types = sorted(task_types, key=lambda t: (t.category, t.name))
+        self.by_id: Dict[int, TaskTypeInfo] = {t.id: t for t in self.task_types}
+        self.by_name: Dict[str, TaskTypeInfo] = {t.name.lower(): t for t in self.task_types}
+        self.by_category: Dict[str, List[TaskTypeInfo]] = {}
+        for task_type in self.task_types:
+            self.by_category.setdefault(task_type.category, []).append(task_type)
+
+    def find(self, query: str) -> Optional[TaskTypeInfo]:
+        """Find a task type by exact name, falling back to a substring match."""
+        needle = query.strip().lower()
+        if needle in self.by_name:
+            return self.by_name[needle]
+        for task_type in self.task_types:
+            if needle in task_type.name.lower():
+                return task_type
+        return None
+
+
+# corridor id -> catalogue, all loaded at the same version
+_catalogues: Dict[int, TaskCatalogue] = {}
+_version: Optional[int] = None
+_checked_at = 0.0
+
+
+async def _read_version(db: AsyncSession) -> int:
+    value = await db.scalar(select(AppSetting.value).filter_by(key=CATALOGUE_VERSION_KEY))
+    return int(value) if value else 0
+
+
+async def _load(db: AsyncSession, version: int) -> Dict[int, TaskCatalogue]:
+    rows = (await db.scalars(select(TaskType))).all()
+    by_corridor: Dict[int, List[TaskTypeInfo]] = {}
+    for row in rows:
+        by_corridor.setdefault(row.corridor_id, []).append(
+            TaskTypeInfo(
+                id=row.id,
+                corridor_id=row.corridor_id,
+                name=row.name,
+                category=row.category or "other",
+                description=row.description,
+                instructions=row.instructions,
+                media_file_id=row.media_file_id,
+                estimated_duration_minutes=row.estimated_duration_minutes,
+                location=row.location,
+            )
+        )
+    logger.info(
+        f"Loaded task catalogue v{version} ({len(rows)} task types in {len(by_corridor)} corridors)"
+    )
+    return {
+        corridor_id: TaskCatalogue(task_types, version)
+        for corridor_id, task_types in by_corridor.items()
+    }
+
+
+async def _refresh(db: AsyncSession, force: bool = False):
+    """Reload all catalogues if the version counter changed (checked at most every interval)."""
+    global _catalogues, _version, _checked_at
+
+    if not force and _version is not None and time.monotonic() - _checked_at < VERSION_CHECK_INTERVAL_SECONDS:
+        return
+
+    version = await _read_version(db)
+    if force or version != _version:
+        _catalogues = await _load(db, version)
+        _version = version
+        # Task names are baked into the prebuilt menus
+        bump_week_state_version()
+    _checked_at = time.monotonic()
+
+
+async def get_catalogue(db: AsyncSession, corridor_id: int) -> TaskCatalogue:
+    """Return the corridor's catalogue, reloading them if the version counter changed."""
+    await _refresh(db)
+    catalogue = _catalogues.get(corridor_id)
+    if catalogue is None:
+        # A corridor without task types (yet)
+        catalogue = _catalogues[corridor_id] = TaskCatalogue([], _version)
+    return catalogue
+
+
+def set_media_file_id(task_type: TaskTypeInfo, media_file_id: str):
+    """Patch a task type's photo id into its catalogue without a reload.
+
+    The id is stored with a Core UPDATE that leaves the version counter
+    alone, so other processes keep their catalogues until the next real
+    change (at worst uploading the photo once more themselves).
+    """
+    catalogue = _catalogues.get(task_type.corridor_id)
+    if catalogue is None or task_type.id not in catalogue.by_id:
+        return
+    patched = replace(catalogue.by_id[task_type.id], media_file_id=media_file_id)
+    _catalogues[task_type.corridor_id] = TaskCatalogue(
+        [patched if t.id == task_type.id else t for t in catalogue.task_types], catalogue.version
+    )
+
+
+async def load_catalogue():
+    """Load the catalogues eagerly (called once at startup)."""
+    async with get_async_db() as db:
+        await _refresh(db, force=True)
@@ -0,0 +1,218 @@
+"""Completing and amending tasks.
+
+Both operations are a single statement: a conditional
+``UPDATE ... WHERE status = ... RETURNING`` whose result feeds the
+``CompletionLog`` insert through a data-modifying CTE. Whoever's update
+matches the row wins; a concurrent tap on the same button finds the status
+already changed and updates nothing. The diagnostic queries only run when
+nothing was updated, to tell the user why. The same statements keep the
+``person_stats`` row of the completer up to date (src/person_stats.py).
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Union
+
+from sqlalchemy import and_, func, insert, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from src.models import CompletionLog, Person, TaskInstance, TaskOptOut, TaskType, Week
+from src.person_stats import credit_cte, debit_cte
+
+
+@dataclass(frozen=True)
+class Completed:
+    """A task that was just completed, with the week's counts after it."""
+
+    person_name: str
+    task_name: str
+    week_id: int
+    completed_count: int  # completed instances in the week
+    personal_count: int  # instances the person completed in the week
+
+
+@dataclass(frozen=True)
+class Amended:
+    """A completion that was just undone."""
+
+    person_name: str
+    task_name: str
+    original_completer: Optional[str]
+
+
+@dataclass(frozen=True)
+class Rejected:
+    """Why nothing was updated."""
+
+    reason: str  # not_registered, not_found, opted_out
+    task_name: Optional[str] = None
+    opt_out_reason: Optional[str] = None
+
+
+def _person_id(telegram_id: int):
+    return select(Person.id).where(Person.telegram_id == telegram_id).scalar_subquery()
+
+
+def _in_corridor_of(telegram_id: int):
+    """The instance belongs to a week of the resident's corridor."""
+    return (
+        select(Week.id)
+        .where(
+            Week.id == TaskInstance.week_id,
+            Week.corridor_id == select(Person.corridor_id).where(Person.telegram_id == telegram_id).scalar_subquery(),
+        )
+        .exists()
+    )
+
+
+def _log_cte(changed, action: str, message_id: Optional[int]):
+    """Insert one CompletionLog row per updated instance."""
+    return (
+        insert(CompletionLog)
+        .from_select(
+            ["task_instance_id", "person_id", "action", "message_id"],
+            select(changed.c.id, changed.c.person_id, literal(action), literal(message_id)),
+        )
+        .returning(CompletionLog.id)
+        .cte("log")
+    )
+
+
+async def complete_task(db: AsyncSession, telegram_id: int, task_instance_id: int,
+                        message_id: Optional[int] = None) -> Union[Completed, Rejected]:
+    """Mark a pending task instance as completed by the given resident."""
+    person_id = _person_id(telegram_id)
+
+    done = (
+        update(TaskInstance)
+        .where(
+            TaskInstance.id == task_instance_id,
+            TaskInstance.status == "pending",
+            person_id.is_not(None),
+            _in_corridor_of(telegram_id),
+            ~select(TaskOptOut.id)
+            .where(
+                TaskOptOut.person_id == person_id,
+                TaskOptOut.task_type_id == TaskInstance.task_type_id,
+            )
+            .exists(),
+        )
+        .values(status="completed", completed_by=person_id, completed_at=datetime.now())
+        .returning(
+            TaskInstance.id,
+            TaskInstance.week_id,
+            TaskInstance.task_type_id,
+            TaskInstance.completed_by.label("person_id"),
+            TaskInstance.completed_at,
+        )
+        .cte("done")
+    )
+    log = _log_cte(done, "completed", message_id)
+    credit = credit_cte(done)
+
+    # The outer query reads the snapshot from before the update, hence the + 1
+    week_rows = select(func.count(TaskInstance.id)).where(
+        TaskInstance.week_id == done.c.week_id, TaskInstance.status == "completed"
+    )
+    row = (
+        await db.execute(
+            select(
+                Person.name.label("person_name"),
+                TaskType.name.label("task_name"),
+                done.c.week_id,
+                (week_rows.scalar_subquery() + 1).label("completed_count"),
+                (
+                    week_rows.where(TaskInstance.completed_by == done.c.person_id).scalar_subquery() + 1
+                ).label("personal_count"),
+            )
+            .select_from(done)
+            .join(TaskType, TaskType.id == done.c.task_type_id)
+            .join(Person, Person.id == done.c.person_id)
+            .add_cte(log, credit)
+        )
+    ).one_or_none()
+
+    if row:
+        return Completed(**row._mapping)
+    return await _explain_rejection(db, telegram_id, task_instance_id)
+
+
+async def _explain_rejection(db: AsyncSession, telegram_id: int, task_instance_id: int) -> Rejected:
+    """Find out why a completion updated nothing."""
+    person_id = await db.scalar(select(Person.id).filter_by(telegram_id=telegram_id))
+    if person_id is None:
+        return Rejected("not_registered")
+
+    row = (
+        await db.execute(
+            select(TaskInstance.status, TaskType.name, TaskOptOut.id.label("opt_out_id"), TaskOptOut.reason)
+            .select_from(TaskInstance)
+            .join(TaskType, TaskType.id == TaskInstance.task_type_id)
+            .outerjoin(
+                TaskOptOut,
+                and_(
+                    TaskOptOut.task_type_id == TaskInstance.task_type_id,
+                    TaskOptOut.person_id == person_id,
+                ),
+            )
+            .where(TaskInstance.id == task_instance_id)
+        )
+    ).one_or_none()
+
+    if row and row.status == "pending" and row.opt_out_id is not None:
+        return Rejected("opted_out", task_name=row.name, opt_out_reason=row.reason)
+    return Rejected("not_found")
+
+
+async def amend_task(db: AsyncSession, telegram_id: int, task_instance_id: int,
+                     message_id: Optional[int] = None) -> Union[Amended, Rejected]:
+    """Put a completed task instance back to pending."""
+    person_id = _person_id(telegram_id)
+    before = aliased(TaskInstance)
+    original = aliased(Person)
+
+    undone = (
+        update(TaskInstance)
+        .where(
+            TaskInstance.id == task_instance_id,
+            TaskInstance.status == "completed",
+            # Only registered residents of the task's corridor can amend
+            person_id.is_not(None),
+            _in_corridor_of(telegram_id),
+            # Self-join so RETURNING can report who had completed it
+            before.id == TaskInstance.id,
+        )
+        .values(status="pending", completed_by=None, completed_at=None)
+        .returning(
+            TaskInstance.id,
+            TaskInstance.task_type_id,
+            TaskInstance.week_id,
+            person_id.label("person_id"),
+            before.completed_by.label("original_completer_id"),
+        )
+        .cte("undone")
+    )
+    log = _log_cte(undone, "amended", message_id)
+    debit = debit_cte(undone)
+
+    row = (
+        await db.execute(
+            select(
+                Person.name.label("person_name"),
+                TaskType.name.label("task_name"),
+                original.name.label("original_completer"),
+            )
+            .select_from(undone)
+            .join(TaskType, TaskType.id == undone.c.task_type_id)
+            .join(Person, Person.id == undone.c.person_id)
+            .outerjoin(original, original.id == undone.c.original_completer_id)
+            .add_cte(log, debit)
+        )
+    ).one_or_none()
+
+    if row:
+        return Amended(**row._mapping)
+
+    registered = await db.scalar(select(Person.id).filter_by(telegram_id=telegram_id))
+    return Rejected("not_found" if registered else "not_registered")
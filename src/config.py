@@ -23,12 +23,49 @@ class Settings(BaseSettings):
     
     # Telegram
     telegram_bot_token: str
-    telegram_chat_id: str
+    # Group of the first corridor, created by populate_db.py and the corridors
+    # migration; further corridors are added with scripts/add_corridor.py
+    telegram_chat_id: Optional[str] = None
+    # Bot API server, e.g. a local stub for load tests (default: api.telegram.org)
+    telegram_api_base_url: Optional[str] = None
+    
+    # Update delivery: "polling" (getUpdates) or "webhook" (Telegram POSTs to us)
+    bot_mode: str = "polling"
+    webhook_url: Optional[str] = None  # public HTTPS base URL Telegram posts to
+    webhook_path: str = "/telegram"
+    webhook_listen: str = "0.0.0.0"
+    webhook_port: int = 8443
+    webhook_secret_token: Optional[str] = None
+    
+    # Supervisor mode: with WORKERS > 1 the bot starts that many worker
+    # processes and forwards each corridor's updates to the worker owning it
+    # (see src/supervisor.py and src/sharding.py)
+    workers: int = 1
+    worker_index: Optional[int] = None  # set by the supervisor for each worker
+    worker_port_base: int = 8600  # worker i listens on 127.0.0.1:<base + i>
     
     # Application
     debug: bool = False
     log_level: str = "INFO"
     
+    # Slow-query / N+1 profiler for debugging (see src/query_profiler.py)
+    query_profile: bool = False
+    slow_query_ms: int = 100
+    query_profile_report: Optional[str] = None  # file the report is written to on shutdown
+    
+    # Append anonymized incoming updates to this file (see src/recorder.py)
+    record_updates_path: Optional[str] = None
+    record_updates_salt: Optional[str] = None
+    
+    # Keep one pinned, live-edited status message in the group instead of
+    # posting a message for every completion/amend
+    status_board_enabled: bool = False
+    
+    # Prometheus metrics endpoint (http://<listen>:<port>/metrics)
+    metrics_enabled: bool = False
+    metrics_listen: str = "127.0.0.1"
+    metrics_port: int = 9100
+    
     # Week Configuration
     week_deadline_day: str = "sunday"
     week_deadline_hour: int = 12
@@ -0,0 +1,115 @@
+"""Corridors served by the bot and which corridor an update belongs to.
+
+Each corridor is one Telegram group with its own residents, task types,
+weeks and opt-outs. Group updates belong to the corridor of their chat,
+private ones to the corridor the resident registered in. Both mappings are
+kept in memory: corridors are reloaded every CACHE_TTL_SECONDS (so one added
+with ``scripts/add_corridor.py`` is picked up within that time), residents
+are looked up once and then remembered for as long.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from telegram import Chat
+
+from src.menus import CATEGORY_AMOUNTS
+from src.models import Corridor, Person
+
+# How long cached corridors and resident lookups are trusted
+CACHE_TTL_SECONDS = 60
+
+
+@dataclass(frozen=True)
+class CorridorInfo:
+    """Immutable copy of a Corridor row."""
+
+    id: int
+    name: str
+    chat_id: int
+    category_amounts: Dict[str, int]  # CATEGORY_AMOUNTS with the corridor's overrides
+
+    def amount(self, category: str) -> int:
+        """How many tasks of ``category`` the corridor does per week."""
+        return self.category_amounts.get(category, 1)
+
+    @property
+    def weekly_total(self) -> int:
+        return sum(self.category_amounts.values())
+
+
+_by_id: Dict[int, CorridorInfo] = {}
+_by_chat: Dict[int, CorridorInfo] = {}
+_loaded_at = 0.0
+
+# telegram id -> (corridor id, looked up at)
+_resident_corridors: Dict[int, Tuple[int, float]] = {}
+
+
+async def _load(db: AsyncSession):
+    global _by_id, _by_chat, _loaded_at
+    rows = (await db.scalars(select(Corridor).filter_by(active=True).order_by(Corridor.id))).all()
+    corridors = [
+        CorridorInfo(
+            id=row.id,
+            name=row.name,
+            chat_id=row.chat_id,
+            category_amounts={**CATEGORY_AMOUNTS, **(row.category_amounts or {})},
+        )
+        for row in rows
+    ]
+    _by_id = {corridor.id: corridor for corridor in corridors}
+    _by_chat = {corridor.chat_id: corridor for corridor in corridors}
+    _loaded_at = time.monotonic()
+
+
+async def _ensure_loaded(db: AsyncSession):
+    if not _loaded_at or time.monotonic() - _loaded_at >= CACHE_TTL_SECONDS:
+        await _load(db)
+
+
+async def get_corridors(db: AsyncSession) -> List[CorridorInfo]:
+    """All active corridors."""
+    await _ensure_loaded(db)
+    return list(_by_id.values())
+
+
+async def get_corridor(db: AsyncSession, corridor_id: int) -> Optional[CorridorInfo]:
+    await _ensure_loaded(db)
+    return _by_id.get(corridor_id)
+
+
+async def get_corridor_for_chat(db: AsyncSession, chat_id: int) -> Optional[CorridorInfo]:
+    """The corridor whose group is ``chat_id``."""
+    await _ensure_loaded(db)
+    return _by_chat.get(int(chat_id))
+
+
+async def get_corridor_for_resident(db: AsyncSession, telegram_id: int) -> Optional[CorridorInfo]:
+    """The corridor a resident registered in (None if not registered)."""
+    cached = _resident_corridors.get(telegram_id)
+    if cached and time.monotonic() - cached[1] < CACHE_TTL_SECONDS:
+        return await get_corridor(db, cached[0])
+
+    corridor_id = await db.scalar(select(Person.corridor_id).filter_by(telegram_id=telegram_id))
+    if corridor_id is None:
+        return None
+    _resident_corridors[telegram_id] = (corridor_id, time.monotonic())
+    return await get_corridor(db, corridor_id)
+
+
+async def resolve_corridor(db: AsyncSession, chat: Chat, telegram_id: int) -> Optional[CorridorInfo]:
+    """The corridor an update from ``telegram_id`` in ``chat`` belongs to."""
+    if chat.type == Chat.PRIVATE:
+        return await get_corridor_for_resident(db, telegram_id)
+    return await get_corridor_for_chat(db, chat.id)
+
+
+def invalidate_corridors():
+    """Forget cached corridors and residents (after adding or changing corridors)."""
+    global _loaded_at
+    _loaded_at = 0.0
+    _resident_corridors.clear()
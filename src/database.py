@@ -1,14 +1,17 @@
 """Database connection and session management."""
 
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import NullPool
-from contextlib import contextmanager
-from typing import Generator
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncGenerator, Generator
 import logging
 
 from src.config import settings
+from src.metrics import instrument_engine
 from src.models import Base
+from src.query_profiler import install_query_profiler
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +31,26 @@ SessionLocal = sessionmaker(
     bind=engine
 )
 
+# Async engine used by the bot (handlers, menus, scheduled jobs) so that
+# database round-trips never block the Telegram event loop.
+async_engine = create_async_engine(
+    settings.async_database_url,
+    echo=settings.debug,
+    pool_pre_ping=True,
+    pool_size=5,
+    max_overflow=10,
+)
+
+# Query counts and timings per handler (see src/metrics.py)
+instrument_engine(async_engine)
+install_query_profiler(async_engine)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False,  # Objects stay readable after commit (no lazy IO)
+)
+
 
 def init_db():
     """Initialize database (create all tables)."""
@@ -63,6 +86,27 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+@asynccontextmanager
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Async context manager for database sessions.
+    
+    Relationships are not lazy-loaded in async code, so eager-load them
+    with ``selectinload``/``joinedload`` when you need them.
+    
+    Usage:
+        async with get_async_db() as db:
+            user = await db.scalar(select(Person).limit(1))
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+
 def get_db_session() -> Session:
     """
     Get a database session (remember to close it!).
@@ -1,9 +1,11 @@
 """Handlers package for the Corridor Bot."""
 
 from .task_handlers import (
-    handle_complete_flow,
-    handle_amend_flow,
-    handle_ask_flow,
+    show_category_menu,
+    show_task_menu,
+    complete_task_by_id,
+    amend_task_by_id,
+    show_task_instructions,
 )
 
 from .info_handlers import (
@@ -26,9 +28,11 @@ from .optout_handlers import (
 
 __all__ = [
     # Task handlers
-    'handle_complete_flow',
-    'handle_amend_flow',
-    'handle_ask_flow',
+    'show_category_menu',
+    'show_task_menu',
+    'complete_task_by_id',
+    'amend_task_by_id',
+    'show_task_instructions',
     # Info handlers
     'cmd_status',
     'show_status_callback',
@@ -1,108 +1,103 @@
 """Information handlers: status, stats, tasks list, map."""
 
-from pathlib import Path
+from sqlalchemy import func, select
+from sqlalchemy.orm import contains_eager
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 from telegram.constants import ParseMode
 
-from src.database import get_db
-from src.models import Person, TaskType, TaskInstance, Week, TaskOptOut
-from src.menus import CATEGORY_AMOUNTS, CATEGORY_EMOJIS
+from src.catalogue import get_catalogue
+from src.corridors import CorridorInfo
+from src.database import get_async_db
+from src.media import send_map
+from src.models import Person, TaskType, TaskInstance, TaskOptOut
+from src.menus import CATEGORY_EMOJIS
+from src.person_stats import current_streak, get_person_stats
+from src.status import WeekStatus, get_week_status
+from src.week_cache import CurrentWeek, get_current_week
 
-# Get project root for media files
-project_root = Path(__file__).parent.parent.parent
 
-
-async def cmd_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def cmd_status(update: Update, context: ContextTypes.DEFAULT_TYPE, corridor: CorridorInfo):
     """Show detailed status (AVAILABLE IN BOTH)."""
-    with get_db() as db:
-        current_week = db.query(Week).filter_by(closed=False).order_by(Week.deadline.desc()).first()
+    async with get_async_db() as db:
+        current_week = await get_current_week(db, corridor.id)
         
         if not current_week:
             await update.message.reply_text("❌ No active week found.")
             return
         
-        all_instances = (
-            db.query(TaskInstance)
-            .filter_by(week_id=current_week.id)
-            .join(TaskType)
-            .order_by(TaskType.category, TaskType.name)
-            .all()
-        )
-        
-        completed = [t for t in all_instances if t.status == "completed"]
-        
-        message = (
-            f"📅 *Week {current_week.week_number}/{current_week.year}*\n"
-            f"⏰ Deadline: {current_week.deadline.strftime('%A, %B %d at %H:%M')}\n\n"
-        )
-        
-        # Progress by category
-        message += "📈 *Progress by Category*\n"
-        
-        by_category = {}
-        for task in all_instances:
-            category = task.task_type.category or "other"
-            if category not in by_category:
-                by_category[category] = {"completed": 0, "total": 0}
-            by_category[category]["total"] = CATEGORY_AMOUNTS.get(category, 1)
-            if task.status == "completed":
-                by_category[category]["completed"] += 1
-        
-        for category in sorted(by_category.keys()):
-            emoji = CATEGORY_EMOJIS.get(category, "📦")
-            stats = by_category[category]
-            progress = int((stats["completed"] / stats["total"]) * 10) if stats["total"] > 0 else 0
-            progress_bar = "█" * progress + "░" * (10 - progress)
-            message += f"{emoji} {category.title()}: {progress_bar} {stats['completed']}/{stats['total']}\n"
-        
-        # Overall progress
-        total = sum([CATEGORY_AMOUNTS.get(cat, 1) for cat in by_category.keys()])
-        completed_count = len(completed)
-        if total > 0:
-            progress = int((completed_count / total) * 10)
-            progress_bar = "█" * progress + "░" * (10 - progress)
-            message += f"\n📊 *Overall*: {progress_bar} {completed_count}/{total}\n\n"
-        
-        # Completed tasks (last 5)
-        message += f"✅ *Completed ({completed_count})*\n"
-        for task in completed[-5:]:
-            completer = db.query(Person).get(task.completed_by)
-            message += f"  • {task.task_type.name} - {completer.name}\n"
-        if completed_count > 5:
-            message += f"  ... and {completed_count - 5} more\n"
-        
-        # Check if done
-        done = all(by_category[cat]["completed"] >= by_category[cat]["total"] for cat in by_category)
-        if done:
-            message += f"\n🎉 All tasks done! Time to relax! 😎🍹\n"
-        
-        # Non-contributors
-        completed_by_ids = [t.completed_by for t in completed if t.completed_by]
-        active_people = db.query(Person).filter_by(active=True).all()
-        not_contributed = [p for p in active_people if p.id not in completed_by_ids]
-        
-        if not done and not_contributed:
-            message += f"\n¿Y entonces qué? 😡🔪\n"
-            message += f"💭 *Haven't contributed:* "
-            message += ", ".join([p.name for p in not_contributed])
+        status = await get_week_status(db, current_week.id)
     
-    await update.message.reply_text(message, parse_mode=ParseMode.MARKDOWN)
+    await update.message.reply_text(
+        render_week_status(corridor, current_week, status), parse_mode=ParseMode.MARKDOWN
+    )
 
 
-async def show_status_callback(query):
+def render_week_status(corridor: CorridorInfo, current_week: CurrentWeek, status: WeekStatus) -> str:
+    """Render the detailed week status (used by /status and the pinned status board)."""
+    message = (
+        f"📅 *Week {current_week.week_number}/{current_week.year}*\n"
+        f"⏰ Deadline: {current_week.deadline.strftime('%A, %B %d at %H:%M')}\n\n"
+    )
+    
+    # Progress by category
+    message += "📈 *Progress by Category*\n"
+    
+    by_category = {}
+    for category, progress in status.categories.items():
+        by_category[category] = {
+            "completed": progress.completed,
+            "total": corridor.amount(category),
+        }
+    
+    for category in sorted(by_category.keys()):
+        emoji = CATEGORY_EMOJIS.get(category, "📦")
+        stats = by_category[category]
+        progress = int((stats["completed"] / stats["total"]) * 10) if stats["total"] > 0 else 0
+        progress_bar = "█" * progress + "░" * (10 - progress)
+        message += f"{emoji} {category.title()}: {progress_bar} {stats['completed']}/{stats['total']}\n"
+    
+    # Overall progress
+    total = sum([corridor.amount(cat) for cat in by_category.keys()])
+    completed_count = status.completed_count
+    if total > 0:
+        progress = int((completed_count / total) * 10)
+        progress_bar = "█" * progress + "░" * (10 - progress)
+        message += f"\n📊 *Overall*: {progress_bar} {completed_count}/{total}\n\n"
+    
+    # Completed tasks (latest first)
+    message += f"✅ *Completed ({completed_count})*\n"
+    for task_name, person_name in status.recent_completions:
+        message += f"  • {task_name} - {person_name}\n"
+    if completed_count > len(status.recent_completions):
+        message += f"  ... and {completed_count - len(status.recent_completions)} more\n"
+    
+    # Check if done
+    done = all(by_category[cat]["completed"] >= by_category[cat]["total"] for cat in by_category)
+    if done:
+        message += f"\n🎉 All tasks done! Time to relax! 😎🍹\n"
+    
+    # Non-contributors
+    if not done and status.non_contributors:
+        message += f"\n¿Y entonces qué? 😡🔪\n"
+        message += f"💭 *Haven't contributed:* "
+        message += ", ".join(status.non_contributors)
+    
+    return message
+
+
+async def show_status_callback(query, corridor: CorridorInfo):
     """Show status via callback (AVAILABLE IN BOTH)."""
-    with get_db() as db:
-        current_week = db.query(Week).filter_by(closed=False).order_by(Week.deadline.desc()).first()
+    async with get_async_db() as db:
+        current_week = await get_current_week(db, corridor.id)
         
         if not current_week:
             await query.edit_message_text("❌ No active week found.")
             return
         
         # Get progress summary
-        all_instances = db.query(TaskInstance).filter_by(week_id=current_week.id).all()
-        completed_count = len([t for t in all_instances if t.status == "completed"])
-        total = sum([CATEGORY_AMOUNTS.get(cat, 1) for cat in CATEGORY_AMOUNTS.keys()])
+        completed_count = (await get_week_status(db, current_week.id)).completed_count
+        total = corridor.weekly_total
         
         progress = int((completed_count / total) * 10) if total > 0 else 0
         progress_bar = "█" * progress + "░" * (10 - progress)
@@ -125,71 +120,58 @@ async def show_status_callback(query):
         )
 
 
-async def cmd_tasks(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def cmd_tasks(update: Update, context: ContextTypes.DEFAULT_TYPE, corridor: CorridorInfo):
     """List all tasks (AVAILABLE IN BOTH)."""
-    with get_db() as db:
-        tasks = db.query(TaskType).order_by(TaskType.category, TaskType.name).all()
-        
-        by_category = {}
+    async with get_async_db() as db:
+        catalogue = await get_catalogue(db, corridor.id)
+    
+    message = "📋 *All Available Tasks*\n\n"
+    
+    for category, tasks in sorted(catalogue.by_category.items()):
+        emoji = CATEGORY_EMOJIS.get(category, "📦")
+        target = corridor.amount(category)
+        message += f"{emoji} *{category.title()}* [Complete {target}/week]\n"
         for task in tasks:
-            category = task.category or "other"
-            if category not in by_category:
-                by_category[category] = []
-            by_category[category].append(task)
-        
-        message = "📋 *All Available Tasks*\n\n"
-        
-        for category, tasks in sorted(by_category.items()):
-            emoji = CATEGORY_EMOJIS.get(category, "📦")
-            target = CATEGORY_AMOUNTS.get(category, 1)
-            message += f"{emoji} *{category.title()}* [Complete {target}/week]\n"
-            for task in tasks:
-                duration = f" ({task.estimated_duration_minutes}min)" if task.estimated_duration_minutes else ""
-                message += f"  • {task.name}{duration}\n"
-            message += "\n"
+            duration = f" ({task.estimated_duration_minutes}min)" if task.estimated_duration_minutes else ""
+            message += f"  • {task.name}{duration}\n"
+        message += "\n"
     
     await update.message.reply_text(message, parse_mode=ParseMode.MARKDOWN)
 
 
-async def show_tasks_callback(query):
+async def show_tasks_callback(query, corridor: CorridorInfo):
     """Show tasks list via callback (AVAILABLE IN BOTH)."""
-    with get_db() as db:
-        tasks = db.query(TaskType).order_by(TaskType.category, TaskType.name).all()
-        
-        by_category = {}
-        for task in tasks:
-            category = task.category or "other"
-            if category not in by_category:
-                by_category[category] = []
-            by_category[category].append(task)
-        
-        message = "📋 *All Available Tasks*\n\n"
-        
-        for category, tasks in sorted(by_category.items()):
-            emoji = CATEGORY_EMOJIS.get(category, "📦")
-            target = CATEGORY_AMOUNTS.get(category, 1)
-            message += f"{emoji} *{category.title()}* [{target}/week]\n"
-            for task in tasks[:3]:  # Show first 3 per category
-                duration = f" ({task.estimated_duration_minutes}min)" if task.estimated_duration_minutes else ""
-                message += f"  • {task.name}{duration}\n"
-            if len(tasks) > 3:
-                message += f"  ... and {len(tasks) - 3} more\n"
-            message += "\n"
-        
-        message += "💡 Use `/tasks` for complete list"
-        
-        keyboard = InlineKeyboardMarkup([[
-            InlineKeyboardButton("« Back to Menu", callback_data="menu")
-        ]])
-        
-        await query.edit_message_text(
-            text=message,
-            reply_markup=keyboard,
-            parse_mode=ParseMode.MARKDOWN
-        )
+    async with get_async_db() as db:
+        catalogue = await get_catalogue(db, corridor.id)
+    
+    message = "📋 *All Available Tasks*\n\n"
+    
+    for category, tasks in sorted(catalogue.by_category.items()):
+        emoji = CATEGORY_EMOJIS.get(category, "📦")
+        target = corridor.amount(category)
+        message += f"{emoji} *{category.title()}* [{target}/week]\n"
+        for task in tasks[:3]:  # Show first 3 per category
+            duration = f" ({task.estimated_duration_minutes}min)" if task.estimated_duration_minutes else ""
+            message += f"  • {task.name}{duration}\n"
+        if len(tasks) > 3:
+            message += f"  ... and {len(tasks) - 3} more\n"
+        message += "\n"
+    
+    message += "💡 Use `/tasks` for complete list"
+    
+    keyboard = InlineKeyboardMarkup([[
+        InlineKeyboardButton("« Back to Menu", callback_data="menu")
+    ]])
+    
+    await query.edit_message_text(
+        text=message,
+        reply_markup=keyboard,
+        parse_mode=ParseMode.MARKDOWN
+    )
 
 
-async def cmd_my_stats(update: Update, context: ContextTypes.DEFAULT_TYPE, is_private_chat_func, redirect_func):
+async def cmd_my_stats(update: Update, context: ContextTypes.DEFAULT_TYPE, is_private_chat_func, redirect_func,
+                       corridor: CorridorInfo):
     """Show detailed personal stats (PRIVATE ONLY)."""
     if not is_private_chat_func(update):
         await redirect_func(update, "My Stats")
@@ -197,21 +179,23 @@ async def cmd_my_stats(update: Update, context: ContextTypes.DEFAULT_TYPE, is_pr
     
     user = update.effective_user
     
-    with get_db() as db:
-        person = db.query(Person).filter_by(telegram_id=user.id).first()
+    async with get_async_db() as db:
+        person = await db.scalar(select(Person).filter_by(telegram_id=user.id))
         if not person:
             await update.message.reply_text("❌ You're not registered! Use /start first.")
             return
         
-        current_week = db.query(Week).filter_by(closed=False).order_by(Week.deadline.desc()).first()
+        current_week = await get_current_week(db, corridor.id)
         
         if current_week:
             week_tasks = (
-                db.query(TaskInstance)
-                .filter_by(week_id=current_week.id, completed_by=person.id)
-                .join(TaskType)
-                .all()
-            )
+                await db.scalars(
+                    select(TaskInstance)
+                    .filter_by(week_id=current_week.id, completed_by=person.id)
+                    .join(TaskType)
+                    .options(contains_eager(TaskInstance.task_type))
+                )
+            ).all()
             
             message = (
                 f"📊 *Stats for {person.name}*\n\n"
@@ -226,15 +210,31 @@ async def cmd_my_stats(update: Update, context: ContextTypes.DEFAULT_TYPE, is_pr
         else:
             message = f"📊 *Stats for {person.name}*\n\nNo active week."
         
-        all_time = db.query(TaskInstance).filter_by(completed_by=person.id).count()
+        stats = await get_person_stats(db, person.id)
+        all_time = stats.total_completions if stats else 0
         message += f"\n*All-Time:*\nTotal: *{all_time}* tasks\n"
         
+        if stats and stats.category_counts:
+            for category, count in sorted(stats.category_counts.items(), key=lambda item: -item[1]):
+                emoji = CATEGORY_EMOJIS.get(category, "📦")
+                message += f"  {emoji} {category.title()}: {count}\n"
+        
+        if current_week:
+            streak = current_streak(stats, current_week.start_date)
+            if streak:
+                message += f"🔥 Streak: *{streak}* week{'s' if streak != 1 else ''} in a row\n"
+        
+        if stats and stats.last_completed_at:
+            message += f"Last completed: {stats.last_completed_at.strftime('%d %b %Y, %H:%M')}\n"
+        
         opt_outs = (
-            db.query(TaskOptOut)
-            .filter_by(person_id=person.id)
-            .join(TaskType)
-            .all()
-        )
+            await db.scalars(
+                select(TaskOptOut)
+                .filter_by(person_id=person.id)
+                .join(TaskType)
+                .options(contains_eager(TaskOptOut.task_type))
+            )
+        ).all()
         
         if opt_outs:
             message += f"\n*Opted out of:*\n"
@@ -244,26 +244,28 @@ async def cmd_my_stats(update: Update, context: ContextTypes.DEFAULT_TYPE, is_pr
     await update.message.reply_text(message, parse_mode=ParseMode.MARKDOWN)
 
 
-async def show_stats_callback(query):
+async def show_stats_callback(query, corridor: CorridorInfo):
     """Show personal stats via callback (PRIVATE ONLY)."""
     user = query.from_user
     
-    with get_db() as db:
-        person = db.query(Person).filter_by(telegram_id=user.id).first()
+    async with get_async_db() as db:
+        person = await db.scalar(select(Person).filter_by(telegram_id=user.id))
         if not person:
             await query.edit_message_text("❌ You're not registered!")
             return
         
-        current_week = db.query(Week).filter_by(closed=False).order_by(Week.deadline.desc()).first()
+        current_week = await get_current_week(db, corridor.id)
         
         if current_week:
-            week_count = db.query(TaskInstance).filter_by(
-                week_id=current_week.id, completed_by=person.id
-            ).count()
+            week_count = await db.scalar(
+                select(func.count(TaskInstance.id))
+                .filter_by(week_id=current_week.id, completed_by=person.id)
+            )
         else:
             week_count = 0
         
-        all_time = db.query(TaskInstance).filter_by(completed_by=person.id).count()
+        stats = await get_person_stats(db, person.id)
+        all_time = stats.total_completions if stats else 0
         
         message = (
             f"📊 *Stats for {person.name}*\n\n"
@@ -289,31 +291,25 @@ async def cmd_show_map(update: Update, context: ContextTypes.DEFAULT_TYPE, is_pr
         await redirect_func(update, "Map")
         return
     
-    media_path = project_root / "media" / "corridor-overview.jpg"
-    
-    if media_path.exists():
-        with open(media_path, "rb") as img_file:
-            await context.bot.send_photo(
-                chat_id=update.effective_chat.id,
-                photo=img_file,
-                caption="🗺️ *Corridor Map*",
-                parse_mode=ParseMode.MARKDOWN
-            )
-    else:
+    sent = await send_map(
+        context.bot.send_photo,
+        chat_id=update.effective_chat.id,
+        caption="🗺️ *Corridor Map*",
+        parse_mode=ParseMode.MARKDOWN
+    )
+    if not sent:
         await update.message.reply_text("❌ Map not found.")
 
 
 async def show_map_callback(query):
     """Show map via callback (PRIVATE ONLY)."""
-    media_path = project_root / "media" / "corridor-overview.jpg"
+    sent = await send_map(
+        query.message.reply_photo,
+        caption="🗺️ *Corridor Map*",
+        parse_mode=ParseMode.MARKDOWN
+    )
     
-    if media_path.exists():
-        with open(media_path, "rb") as img_file:
-            await query.message.reply_photo(
-                photo=img_file,
-                caption="🗺️ *Corridor Map*",
-                parse_mode=ParseMode.MARKDOWN
-            )
+    if sent:
         keyboard = InlineKeyboardMarkup([[
             InlineKeyboardButton("« Back to Menu", callback_data="menu")
         ]])
@@ -1,14 +1,18 @@
 """Opt-out related handlers."""
 
+from sqlalchemy import select
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 from telegram.constants import ParseMode
 
-from src.database import get_db
-from src.models import Person, TaskType, TaskOptOut
+from src.catalogue import get_catalogue
+from src.corridors import CorridorInfo
+from src.database import get_async_db
+from src.models import Person, TaskOptOut
 
 
-async def cmd_optout(update: Update, context: ContextTypes.DEFAULT_TYPE, is_private_chat_func, redirect_func, notify_group_func):
+async def cmd_optout(update: Update, context: ContextTypes.DEFAULT_TYPE, is_private_chat_func, redirect_func, notify_group_func,
+                     corridor: CorridorInfo):
     """Allow user to opt out of a task (PRIVATE ONLY)."""
     # Check if private chat
     if not is_private_chat_func(update):
@@ -32,9 +36,9 @@ async def cmd_optout(update: Update, context: ContextTypes.DEFAULT_TYPE, is_priv
     reason = " ".join(context.args[1:])
     user = update.effective_user
     
-    with get_db() as db:
+    async with get_async_db() as db:
         # Get person
-        person = db.query(Person).filter_by(telegram_id=user.id).first()
+        person = await db.scalar(select(Person).filter_by(telegram_id=user.id))
         if not person:
             await update.message.reply_text(
                 "❌ You're not registered! Use /start to register first."
@@ -42,11 +46,7 @@ async def cmd_optout(update: Update, context: ContextTypes.DEFAULT_TYPE, is_priv
             return
         
         # Find matching task type
-        task_type = (
-            db.query(TaskType)
-            .filter(TaskType.name.ilike(f"%{task_query}%"))
-            .first()
-        )
+        task_type = (await get_catalogue(db, corridor.id)).find(task_query)
         
         if not task_type:
             await update.message.reply_text(
@@ -56,10 +56,9 @@ async def cmd_optout(update: Update, context: ContextTypes.DEFAULT_TYPE, is_priv
             return
         
         # Check if already opted out
-        existing_opt_out = (
-            db.query(TaskOptOut)
+        existing_opt_out = await db.scalar(
+            select(TaskOptOut)
             .filter_by(person_id=person.id, task_type_id=task_type.id)
-            .first()
         )
         
         if existing_opt_out:
@@ -72,12 +71,13 @@ async def cmd_optout(update: Update, context: ContextTypes.DEFAULT_TYPE, is_priv
         
         # Create opt-out
         opt_out = TaskOptOut(
+            corridor_id=corridor.id,
             person_id=person.id,
             task_type_id=task_type.id,
             reason=reason
         )
         db.add(opt_out)
-        db.commit()
+        await db.commit()
         
         # Send confirmation in private chat
         message = (
@@ -94,7 +94,7 @@ async def cmd_optout(update: Update, context: ContextTypes.DEFAULT_TYPE, is_priv
             f"ℹ️ {person.name} opted out of *{task_type.name}*\n"
             f"Reason: {reason}"
         )
-        await notify_group_func(group_message)
+        await notify_group_func(corridor.chat_id, group_message)
 
 
 async def handle_optout_flow(query):
@@ -120,29 +120,40 @@ async def handle_optout_flow(query):
     )
 
 
-async def cmd_who_opted_out(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def _load_opt_outs(db, corridor: CorridorInfo, task_type_id=None):
+    """Return the corridor's ``(task type, person name, reason)`` rows ordered like the catalogue."""
+    query = (
+        select(TaskOptOut.task_type_id, Person.name, TaskOptOut.reason)
+        .join(Person)
+        .filter(TaskOptOut.corridor_id == corridor.id)
+    )
+    if task_type_id is not None:
+        query = query.filter(TaskOptOut.task_type_id == task_type_id)
+    
+    catalogue = await get_catalogue(db, corridor.id)
+    rows = [
+        (catalogue.by_id[task_type_id], name, reason)
+        for task_type_id, name, reason in await db.execute(query)
+        if task_type_id in catalogue.by_id
+    ]
+    return sorted(rows, key=lambda row: (row[0].category, row[0].name))
+
+
+async def cmd_who_opted_out(update: Update, context: ContextTypes.DEFAULT_TYPE, corridor: CorridorInfo):
     """Show opt-outs (AVAILABLE IN BOTH)."""
-    with get_db() as db:
+    async with get_async_db() as db:
         if not context.args:
-            opt_outs = (
-                db.query(TaskOptOut)
-                .join(Person)
-                .join(TaskType)
-                .order_by(TaskType.category, TaskType.name)
-                .all()
-            )
+            opt_outs = await _load_opt_outs(db, corridor)
             
             if not opt_outs:
                 await update.message.reply_text("ℹ️ No opt-outs yet!")
                 return
             
             by_task = {}
-            for opt_out in opt_outs:
-                task_name = opt_out.task_type.name
-                if task_name not in by_task:
-                    by_task[task_name] = []
-                person = db.query(Person).get(opt_out.person_id)
-                by_task[task_name].append(f"{person.name} ({opt_out.reason})")
+            for task_type, person_name, reason in opt_outs:
+                if task_type.name not in by_task:
+                    by_task[task_type.name] = []
+                by_task[task_type.name].append(f"{person_name} ({reason})")
             
             message = "📋 *Current Opt-Outs*\n\n"
             for task_name in sorted(by_task.keys()):
@@ -153,64 +164,55 @@ async def cmd_who_opted_out(update: Update, context: ContextTypes.DEFAULT_TYPE):
             
         else:
             task_query = " ".join(context.args)
-            task_type = db.query(TaskType).filter(TaskType.name.ilike(f"%{task_query}%")).first()
+            task_type = (await get_catalogue(db, corridor.id)).find(task_query)
             
             if not task_type:
                 await update.message.reply_text(f"❌ Task '{task_query}' not found.")
                 return
             
-            opt_outs = db.query(TaskOptOut).filter_by(task_type_id=task_type.id).all()
+            opt_outs = await _load_opt_outs(db, corridor, task_type.id)
             
             if not opt_outs:
                 message = f"ℹ️ No opt-outs for *{task_type.name}*"
             else:
                 message = f"📋 *Opt-Outs for {task_type.name}*\n\n"
-                for opt_out in opt_outs:
-                    person = db.query(Person).get(opt_out.person_id)
-                    message += f"• {person.name}\n  Reason: {opt_out.reason}\n\n"
+                for _, person_name, reason in opt_outs:
+                    message += f"• {person_name}\n  Reason: {reason}\n\n"
     
     await update.message.reply_text(message, parse_mode=ParseMode.MARKDOWN)
 
 
-async def show_whooptedout_callback(query):
+async def show_whooptedout_callback(query, corridor: CorridorInfo):
     """Show opt-outs via callback (AVAILABLE IN BOTH)."""
-    with get_db() as db:
-        opt_outs = (
-            db.query(TaskOptOut)
-            .join(Person)
-            .join(TaskType)
-            .order_by(TaskType.category, TaskType.name)
-            .all()
-        )
+    async with get_async_db() as db:
+        opt_outs = await _load_opt_outs(db, corridor)
+    
+    if not opt_outs:
+        message = "ℹ️ No one has opted out yet!"
+    else:
+        by_task = {}
+        for task_type, person_name, _ in opt_outs:
+            if task_type.name not in by_task:
+                by_task[task_type.name] = []
+            by_task[task_type.name].append(f"{person_name}")
         
-        if not opt_outs:
-            message = "ℹ️ No one has opted out yet!"
-        else:
-            by_task = {}
-            for opt_out in opt_outs:
-                task_name = opt_out.task_type.name
-                if task_name not in by_task:
-                    by_task[task_name] = []
-                person = db.query(Person).get(opt_out.person_id)
-                by_task[task_name].append(f"{person.name}")
-            
-            message = "📋 *Current Opt-Outs*\n\n"
-            for task_name in sorted(list(by_task.keys())[:5]):  # Show first 5
-                message += f"*{task_name}:* "
-                message += ", ".join(by_task[task_name])
-                message += "\n"
-            
-            if len(by_task) > 5:
-                message += f"\n... and {len(by_task) - 5} more tasks\n"
-            
-            message += "\n💡 Use `/whooptedout` for full list"
+        message = "📋 *Current Opt-Outs*\n\n"
+        for task_name in sorted(list(by_task.keys())[:5]):  # Show first 5
+            message += f"*{task_name}:* "
+            message += ", ".join(by_task[task_name])
+            message += "\n"
         
-        keyboard = InlineKeyboardMarkup([[
-            InlineKeyboardButton("« Back to Menu", callback_data="menu")
-        ]])
+        if len(by_task) > 5:
+            message += f"\n... and {len(by_task) - 5} more tasks\n"
         
-        await query.edit_message_text(
-            text=message,
-            reply_markup=keyboard,
-            parse_mode=ParseMode.MARKDOWN
-        )
+        message += "\n💡 Use `/whooptedout` for full list"
+    
+    keyboard = InlineKeyboardMarkup([[
+        InlineKeyboardButton("« Back to Menu", callback_data="menu")
+    ]])
+    
+    await query.edit_message_text(
+        text=message,
+        reply_markup=keyboard,
+        parse_mode=ParseMode.MARKDOWN
+    )
@@ -0,0 +1,115 @@
+"""Send photos by Telegram file_id instead of re-uploading them.
+
+The first upload of a file returns a `file_id` that Telegram accepts in
+place of the bytes. We keep it: the corridor map's id in `app_settings`
+(together with a hash of the file, so replacing the image triggers a new
+upload) and task photos' ids in `TaskType.media_file_id`. If Telegram
+rejects a stored id, the photo is uploaded again and the id replaced.
+
+Task photos are read from `media/tasks/<task name>.jpg`, with the name
+lowercased and spaces replaced by underscores (e.g. `toilet_1.jpg`).
+"""
+
+import hashlib
+import logging
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from telegram import Message
+from telegram.error import BadRequest
+
+from src.catalogue import TaskTypeInfo, set_media_file_id
+from src.database import get_async_db
+from src.models import AppSetting, TaskType
+
+logger = logging.getLogger(__name__)
+
+MEDIA_DIR = Path(__file__).parent.parent / "media"
+MAP_PATH = MEDIA_DIR / "corridor-overview.jpg"
+TASK_MEDIA_DIR = MEDIA_DIR / "tasks"
+
+# (path, mtime, size) -> sha1, so files are only hashed when they change
+_hashes: Dict[Tuple[str, int, int], str] = {}
+
+SendPhoto = Callable[..., Awaitable[Message]]
+
+
+def _file_hash(path: Path) -> str:
+    stat = path.stat()
+    key = (str(path), stat.st_mtime_ns, stat.st_size)
+    if key not in _hashes:
+        _hashes[key] = hashlib.sha1(path.read_bytes()).hexdigest()[:16]
+    return _hashes[key]
+
+
+async def send_photo_cached(send_photo: SendPhoto, path: Path, file_id: Optional[str],
+                            **kwargs) -> Tuple[Optional[Message], Optional[str]]:
+    """Send a photo by ``file_id``, uploading ``path`` if there is none or it's rejected.
+
+    ``send_photo`` is e.g. ``bot.send_photo`` (with chat_id in kwargs) or
+    ``message.reply_photo``. Returns the sent message (None if there was
+    nothing to send) and the new file_id when an upload happened.
+    """
+    if file_id:
+        try:
+            return await send_photo(photo=file_id, **kwargs), None
+        except BadRequest as e:
+            logger.warning(f"Telegram rejected cached file_id for {path.name}, re-uploading: {e}")
+
+    if not path.exists():
+        return None, None
+
+    with open(path, "rb") as photo:
+        message = await send_photo(photo=photo, **kwargs)
+    return message, message.photo[-1].file_id
+
+
+async def send_map(send_photo: SendPhoto, **kwargs) -> bool:
+    """Send the corridor map; returns False if the image is missing."""
+    if not MAP_PATH.exists():
+        return False
+
+    key = f"file_id:{MAP_PATH.name}"
+    file_hash = _file_hash(MAP_PATH)
+
+    async with get_async_db() as db:
+        stored = await db.scalar(select(AppSetting.value).filter_by(key=key))
+    stored_hash, _, file_id = (stored or "").partition(":")
+
+    message, new_file_id = await send_photo_cached(
+        send_photo, MAP_PATH, file_id if stored_hash == file_hash else None, **kwargs
+    )
+
+    if new_file_id:
+        value = f"{file_hash}:{new_file_id}"
+        async with get_async_db() as db:
+            await db.execute(
+                pg_insert(AppSetting)
+                .values(key=key, value=value)
+                .on_conflict_do_update(
+                    index_elements=[AppSetting.key], set_={"value": value, "updated_at": func.now()}
+                )
+            )
+    return message is not None
+
+
+def task_media_path(task_type: TaskTypeInfo) -> Path:
+    return TASK_MEDIA_DIR / f"{task_type.name.lower().replace(' ', '_')}.jpg"
+
+
+async def send_task_photo(send_photo: SendPhoto, task_type: TaskTypeInfo, **kwargs) -> bool:
+    """Send a task type's photo, if it has one; returns whether a photo was sent."""
+    message, new_file_id = await send_photo_cached(
+        send_photo, task_media_path(task_type), task_type.media_file_id, **kwargs
+    )
+
+    if new_file_id:
+        # Core UPDATE: a new photo id is no reason to reload every catalogue
+        async with get_async_db() as db:
+            await db.execute(
+                update(TaskType).where(TaskType.id == task_type.id).values(media_file_id=new_file_id)
+            )
+        set_media_file_id(task_type, new_file_id)
+    return message is not None
@@ -1,10 +1,16 @@
 """Menu creation functions for the Corridor Bot."""
 
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import exists, select
+from sqlalchemy.orm import aliased, contains_eager
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
-from src.database import get_db
+from src.database import get_async_db
 from src.models import TaskType, TaskInstance, Week
+from src.week_cache import get_current_week, get_week_state_version
 
-# Category configuration
+# Category configuration (defaults; corridors can override amounts, see src/corridors.py)
 CATEGORY_AMOUNTS = {
     "toilet": 2,
     "shower": 2,
@@ -40,8 +46,29 @@ CATEGORY_FREQUENCY = {
 }
 
 
+# Prebuilt category/task menus per corridor for its current week state,
+# keyed by (action, category). A corridor's menus are replaced wholesale
+# when its week or week state changes.
+_menu_caches: Dict[int, Tuple[tuple, Dict[Tuple[str, Optional[str]], Optional[InlineKeyboardMarkup]]]] = {}
+
+
+def _menu_cache_for(corridor_id: int, week_id: int) -> dict:
+    """Return the corridor's menu cache for its current (week id, week-state version)."""
+    state = (week_id, get_week_state_version(corridor_id))
+    cached = _menu_caches.get(corridor_id)
+    if cached is None or cached[0] != state:
+        # New dict rather than clear(): builds still running for the old
+        # state must not write into the new cache
+        cached = _menu_caches[corridor_id] = (state, {})
+    return cached[1]
+
+
+@lru_cache(maxsize=None)
 def create_main_menu(is_private: bool = True) -> InlineKeyboardMarkup:
-    """Create the main menu keyboard based on chat type."""
+    """Create the main menu keyboard based on chat type.
+    
+    The keyboard never changes, so one instance per chat type is reused.
+    """
     if is_private:
         # Full menu for private chat
         keyboard = [
@@ -78,21 +105,27 @@ def create_main_menu(is_private: bool = True) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(keyboard)
 
 
-def create_category_menu(action: str = "complete") -> InlineKeyboardMarkup:
+async def create_category_menu(corridor, action: str = "complete") -> InlineKeyboardMarkup:
     """Create category selection menu with progress."""
-    with get_db() as db:
-        current_week = db.query(Week).filter_by(closed=False).order_by(Week.deadline.desc()).first()
+    async with get_async_db() as db:
+        current_week = await get_current_week(db, corridor.id)
         
         if not current_week:
             return None
         
+        cache = _menu_cache_for(corridor.id, current_week.id)
+        if (action, None) in cache:
+            return cache[(action, None)]
+        
         # Get task counts by category
         all_instances = (
-            db.query(TaskInstance)
-            .filter_by(week_id=current_week.id)
-            .join(TaskType)
-            .all()
-        )
+            await db.scalars(
+                select(TaskInstance)
+                .filter_by(week_id=current_week.id)
+                .join(TaskType)
+                .options(contains_eager(TaskInstance.task_type))
+            )
+        ).all()
         
         by_category = {}
         for task in all_instances:
@@ -119,7 +152,7 @@ def create_category_menu(action: str = "complete") -> InlineKeyboardMarkup:
             
             emoji = CATEGORY_EMOJIS.get(category, "📦")
             stats = by_category[category]
-            button_text = f"{emoji} {category.title()} ({stats['completed']}/{CATEGORY_AMOUNTS.get(category, 1)})"
+            button_text = f"{emoji} {category.title()} ({stats['completed']}/{corridor.amount(category)})"
             
             row.append(InlineKeyboardButton(
                 button_text,
@@ -136,23 +169,29 @@ def create_category_menu(action: str = "complete") -> InlineKeyboardMarkup:
         # Add back button
         keyboard.append([InlineKeyboardButton("« Back to Menu", callback_data="menu")])
         
-        return InlineKeyboardMarkup(keyboard)
+        cache[(action, None)] = InlineKeyboardMarkup(keyboard)
+        return cache[(action, None)]
 
-def create_task_menu(category: str, action: str = "complete") -> InlineKeyboardMarkup:
+async def create_task_menu(corridor, category: str, action: str = "complete") -> InlineKeyboardMarkup:
     """Create task selection menu for a category."""
-    with get_db() as db:
-        current_week = db.query(Week).filter_by(closed=False).order_by(Week.deadline.desc()).first()
+    async with get_async_db() as db:
+        current_week = await get_current_week(db, corridor.id)
         
         if not current_week:
             return None
         
+        cache = _menu_cache_for(corridor.id, current_week.id)
+        if (action, category) in cache:
+            return cache[(action, category)]
+        
         # Get category frequency
         frequency = CATEGORY_FREQUENCY.get(category, 1)
         
         # Get tasks for this category
         query = (
-            db.query(TaskInstance)
+            select(TaskInstance)
             .join(TaskType)
+            .options(contains_eager(TaskInstance.task_type))
             .filter(
                 TaskInstance.week_id == current_week.id,
                 TaskType.category == category
@@ -165,43 +204,29 @@ def create_task_menu(category: str, action: str = "complete") -> InlineKeyboardM
         elif action == "amend":
             query = query.filter(TaskInstance.status == "completed")
         
-        tasks = query.order_by(TaskType.name).all()
-        
-        if not tasks:
-            return None
-        
-        # Filter tasks by frequency (only for complete action)
+        # Filter tasks by frequency (only for complete action): skip task types
+        # completed in any of the last (frequency - 1) closed weeks
         if action == "complete" and frequency > 1:
-            # Get recent weeks to check
-            recent_weeks = (
-                db.query(Week)
-                .filter(Week.closed == True)
+            recent_week_ids = (
+                select(Week.id)
+                .filter(Week.corridor_id == corridor.id, Week.closed == True)
                 .order_by(Week.deadline.desc())
                 .limit(frequency - 1)
-                .all()
+                .scalar_subquery()
             )
-            recent_week_ids = [w.id for w in recent_weeks]
-            
-            # Filter out tasks completed recently
-            filtered_tasks = []
-            for task in tasks:
-                # Check if this task type was completed in recent weeks
-                was_completed_recently = (
-                    db.query(TaskInstance)
-                    .filter(
-                        TaskInstance.task_type_id == task.task_type_id,
-                        TaskInstance.week_id.in_(recent_week_ids),
-                        TaskInstance.status == "completed"
-                    )
-                    .first()
+            recent = aliased(TaskInstance)
+            query = query.filter(
+                ~exists().where(
+                    recent.task_type_id == TaskInstance.task_type_id,
+                    recent.week_id.in_(recent_week_ids),
+                    recent.status == "completed"
                 )
-                
-                if not was_completed_recently:
-                    filtered_tasks.append(task)
-            
-            tasks = filtered_tasks
+            )
+        
+        tasks = (await db.scalars(query.order_by(TaskType.name))).all()
         
         if not tasks:
+            cache[(action, category)] = None
             return None
         
         # Create buttons
@@ -219,4 +244,5 @@ def create_task_menu(category: str, action: str = "complete") -> InlineKeyboardM
         
         keyboard.append([InlineKeyboardButton("« Back to Categories", callback_data=f"{action}:categories")])
         
-        return InlineKeyboardMarkup(keyboard)
+        cache[(action, category)] = InlineKeyboardMarkup(keyboard)
+        return cache[(action, category)]
@@ -0,0 +1,167 @@
+"""Prometheus metrics for handlers, database queries, Telegram calls and jobs.
+
+- ``track_handler(name)`` / ``track_job(name)`` time a handler or scheduled
+  job; the SQL statements run meanwhile are counted and timed under its
+  name (via SQLAlchemy's ``before/after_cursor_execute`` events)
+- ``TimedRequest`` times every Bot API call by method
+- ``start_metrics_server()`` serves ``/metrics`` when METRICS_ENABLED is set
+"""
+
+import functools
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from telegram.request import HTTPXRequest
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Label for queries run outside any tracked handler or job
+UNTRACKED = "untracked"
+
+HANDLER_DURATION = Histogram(
+    "pablito_handler_duration_seconds", "Time spent in update handlers", ["handler"]
+)
+HANDLER_ERRORS = Counter(
+    "pablito_handler_errors_total", "Update handlers that raised", ["handler"]
+)
+HANDLER_QUERIES = Histogram(
+    "pablito_handler_queries", "SQL statements per handler or job run", ["handler"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+DB_QUERIES = Counter(
+    "pablito_db_queries_total", "SQL statements executed", ["handler"]
+)
+DB_QUERY_DURATION = Histogram(
+    "pablito_db_query_duration_seconds", "SQL statement execution time", ["handler"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+TELEGRAM_REQUEST_DURATION = Histogram(
+    "pablito_telegram_request_duration_seconds", "Bot API call latency", ["method"]
+)
+TELEGRAM_REQUEST_ERRORS = Counter(
+    "pablito_telegram_request_errors_total", "Bot API calls that failed", ["method"]
+)
+JOB_DURATION = Histogram(
+    "pablito_job_duration_seconds", "Scheduled job run time", ["job"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0),
+)
+JOB_LAST_DURATION = Gauge(
+    "pablito_job_last_duration_seconds", "Wall time of the latest run of a scheduled job", ["job"]
+)
+JOB_FAILURES = Counter(
+    "pablito_job_failures_total", "Scheduled job runs that raised", ["job"]
+)
+
+
+@dataclass
+class _Run:
+    """Queries issued by one handler or job run."""
+
+    name: str
+    queries: int = 0
+    # Normalized statement -> executions, kept by the query profiler
+    statements: Dict[str, int] = field(default_factory=dict)
+
+
+_current_run: ContextVar[Optional[_Run]] = ContextVar("metrics_run", default=None)
+
+# Called with every finished run (see src/query_profiler.py)
+run_finished_hooks: List[Callable[[_Run], None]] = []
+
+
+def current_run() -> Optional[_Run]:
+    """The handler or job run of the current task, if any."""
+    return _current_run.get()
+
+
+@contextmanager
+def _track(name: str, duration: Histogram, errors: Counter, last_duration: Optional[Gauge] = None):
+    run = _Run(name)
+    token = _current_run.set(run)
+    started = time.perf_counter()
+    try:
+        yield run
+    except Exception:
+        errors.labels(name).inc()
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        duration.labels(name).observe(elapsed)
+        if last_duration is not None:
+            last_duration.labels(name).set(elapsed)
+        HANDLER_QUERIES.labels(name).observe(run.queries)
+        _current_run.reset(token)
+        for hook in run_finished_hooks:
+            hook(run)
+
+
+def track_handler(name: str):
+    """Context manager timing an update handler and its queries."""
+    return _track(name, HANDLER_DURATION, HANDLER_ERRORS)
+
+
+def track_job(name: str):
+    """Context manager timing a scheduled job and its queries."""
+    return _track(name, JOB_DURATION, JOB_FAILURES, JOB_LAST_DURATION)
+
+
+def timed(tracker, name: str):
+    """Decorate an async function with ``tracker(name)``."""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with tracker(name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def instrument_engine(engine: AsyncEngine):
+    """Count and time the statements ``engine`` executes, per handler."""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        run = _current_run.get()
+        name = run.name if run else UNTRACKED
+        if run:
+            run.queries += 1
+        DB_QUERIES.labels(name).inc()
+        DB_QUERY_DURATION.labels(name).observe(elapsed)
+
+
+class TimedRequest(HTTPXRequest):
+    """HTTPXRequest that records the latency of each Bot API method."""
+
+    async def do_request(self, url: str, method: str, *args, **kwargs):
+        api_method = url.rsplit("/", 1)[-1]
+        started = time.perf_counter()
+        try:
+            return await super().do_request(url, method, *args, **kwargs)
+        except Exception:
+            TELEGRAM_REQUEST_ERRORS.labels(api_method).inc()
+            raise
+        finally:
+            TELEGRAM_REQUEST_DURATION.labels(api_method).observe(time.perf_counter() - started)
+
+
+def start_metrics_server():
+    """Serve ``/metrics`` on METRICS_LISTEN:METRICS_PORT (no-op unless enabled)."""
+    if not settings.metrics_enabled:
+        return
+    start_http_server(settings.metrics_port, addr=settings.metrics_listen)
+    logger.info(f"Metrics on http://{settings.metrics_listen}:{settings.metrics_port}/metrics")
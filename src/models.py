@@ -4,31 +4,62 @@ from datetime import datetime
 from typing import Optional, List
 from sqlalchemy import (
     Boolean, Column, Integer, String, Text, DateTime, Date, 
-    ForeignKey, Numeric, UniqueConstraint, BIGINT, CheckConstraint
+    ForeignKey, Numeric, UniqueConstraint, BIGINT, CheckConstraint,
+    Index, cast, event, literal, select, text
 )
-from sqlalchemy.orm import declarative_base, relationship, Mapped
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
+from sqlalchemy.orm import declarative_base, relationship, Mapped, Session
 from sqlalchemy.sql import func
 
 Base = declarative_base()
 
 
+class Corridor(Base):
+    """A corridor: one Telegram group with its own residents, tasks and weeks."""
+    
+    __tablename__ = "corridors"
+    
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100), nullable=False)
+    chat_id = Column(BIGINT, unique=True, nullable=False)  # Telegram group chat
+    category_amounts = Column(JSONB, nullable=False, default=dict, server_default="{}")  # overrides CATEGORY_AMOUNTS
+    active = Column(Boolean, nullable=False, default=True, server_default=text("true"))
+    created_at = Column(DateTime, default=func.now())
+    
+    # Relationships
+    people = relationship("Person", back_populates="corridor")
+    task_types = relationship("TaskType", back_populates="corridor", cascade="all, delete-orphan")
+    weeks = relationship("Week", back_populates="corridor", cascade="all, delete-orphan")
+    
+    def __repr__(self):
+        return f"<Corridor(id={self.id}, name='{self.name}', chat_id={self.chat_id})>"
+
+
 class Person(Base):
     """Corridor residents."""
     
     __tablename__ = "people"
     
     id = Column(Integer, primary_key=True)
+    corridor_id = Column(Integer, ForeignKey("corridors.id", ondelete="CASCADE"), nullable=False)
     telegram_id = Column(BIGINT, unique=True, nullable=False, index=True)
     name = Column(String(100), nullable=False)
     username = Column(String(100), nullable=True)
     joined_date = Column(Date, default=func.current_date())
     active = Column(Boolean, default=True)
     
+    __table_args__ = (
+        # Active residents of a corridor (non-contributors, reminders)
+        Index("ix_people_corridor_active", "corridor_id", "active"),
+    )
+    
     # Relationships
+    corridor = relationship("Corridor", back_populates="people")
     task_completions = relationship("TaskInstance", back_populates="completer", foreign_keys="TaskInstance.completed_by")
     opt_outs = relationship("TaskOptOut", back_populates="person", cascade="all, delete-orphan")
     penalties = relationship("Penalty", back_populates="person", cascade="all, delete-orphan")
     completion_logs = relationship("CompletionLog", back_populates="person")
+    stats = relationship("PersonStats", back_populates="person", uselist=False, cascade="all, delete-orphan")
     
     def __repr__(self):
         return f"<Person(id={self.id}, name='{self.name}', telegram_id={self.telegram_id})>"
@@ -40,7 +71,8 @@ class TaskType(Base):
     __tablename__ = "task_types"
     
     id                          = Column(Integer, primary_key=True)
-    name                        = Column(String(100), nullable=False, unique=True)
+    corridor_id                 = Column(Integer, ForeignKey("corridors.id", ondelete="CASCADE"), nullable=False)
+    name                        = Column(String(100), nullable=False)
     category                    = Column(String(50), nullable=True)  # toilet, shower, kitchen, common
     description                 = Column(Text, nullable=True)
     instructions                = Column(Text, nullable=True)
@@ -49,7 +81,12 @@ class TaskType(Base):
     estimated_duration_minutes  = Column(Integer, nullable=True)
     location                    = Column(String(255), nullable=True)  # Increased from 100 to 255
     
+    __table_args__ = (
+        UniqueConstraint("corridor_id", "name", name="uq_corridor_task_type_name"),
+    )
+    
     # Relationships
+    corridor = relationship("Corridor", back_populates="task_types")
     opt_outs = relationship("TaskOptOut", back_populates="task_type", cascade="all, delete-orphan")
     instances = relationship("TaskInstance", back_populates="task_type", cascade="all, delete-orphan")
     
@@ -63,14 +100,17 @@ class TaskOptOut(Base):
     __tablename__ = "task_opt_outs"
     
     id = Column(Integer, primary_key=True)
+    corridor_id = Column(Integer, ForeignKey("corridors.id", ondelete="CASCADE"), nullable=False)
     person_id = Column(Integer, ForeignKey("people.id", ondelete="CASCADE"), nullable=False)
-    task_type_id = Column(Integer, ForeignKey("task_types.id", ondelete="CASCADE"), nullable=False)
+    task_type_id = Column(Integer, ForeignKey("task_types.id", ondelete="CASCADE"), nullable=False, index=True)
     reason = Column(String(200), nullable=True)
     created_at = Column(DateTime, default=func.now())
     
     # Unique constraint
     __table_args__ = (
         UniqueConstraint("person_id", "task_type_id", name="uq_person_task_optout"),
+        # Opt-outs of a corridor, optionally of one task type (/whooptedout)
+        Index("ix_task_opt_outs_corridor_task_type", "corridor_id", "task_type_id"),
     )
     
     # Relationships
@@ -87,6 +127,7 @@ class Week(Base):
     __tablename__ = "weeks"
     
     id = Column(Integer, primary_key=True)
+    corridor_id = Column(Integer, ForeignKey("corridors.id", ondelete="CASCADE"), nullable=False)
     year = Column(Integer, nullable=False)
     week_number = Column(Integer, nullable=False)  # ISO week number
     start_date = Column(Date, nullable=False)
@@ -95,10 +136,14 @@ class Week(Base):
     
     # Unique constraint
     __table_args__ = (
-        UniqueConstraint("year", "week_number", name="uq_year_week"),
+        UniqueConstraint("corridor_id", "year", "week_number", name="uq_corridor_year_week"),
+        # Past weeks by deadline (frequency filter) and the open week lookup
+        Index("ix_weeks_corridor_closed_deadline", "corridor_id", "closed", "deadline"),
+        Index("ix_weeks_corridor_open_deadline", "corridor_id", "deadline", postgresql_where=text("closed = false")),
     )
     
     # Relationships
+    corridor = relationship("Corridor", back_populates="weeks")
     task_instances = relationship("TaskInstance", back_populates="week", cascade="all, delete-orphan")
     penalties = relationship("Penalty", back_populates="week", cascade="all, delete-orphan")
     
@@ -123,6 +168,8 @@ class TaskInstance(Base):
     __table_args__ = (
         UniqueConstraint("week_id", "task_type_id", name="uq_week_task"),
         CheckConstraint("status IN ('pending', 'completed', 'skipped')", name="check_status"),
+        Index("ix_task_instances_week_status", "week_id", "status"),
+        Index("ix_task_instances_completed_by_week", "completed_by", "week_id"),
     )
     
     # Relationships
@@ -141,7 +188,7 @@ class CompletionLog(Base):
     __tablename__ = "completion_log"
     
     id = Column(Integer, primary_key=True)
-    task_instance_id = Column(Integer, ForeignKey("task_instances.id", ondelete="CASCADE"), nullable=False)
+    task_instance_id = Column(Integer, ForeignKey("task_instances.id", ondelete="CASCADE"), nullable=False, index=True)
     person_id = Column(Integer, ForeignKey("people.id", ondelete="SET NULL"), nullable=True)
     action = Column(String(20), nullable=False)  # completed, claimed, disputed, unclaimed
     timestamp = Column(DateTime, default=func.now())
@@ -155,6 +202,25 @@ class CompletionLog(Base):
         return f"<CompletionLog(id={self.id}, action='{self.action}', timestamp={self.timestamp})>"
 
 
+class PersonStats(Base):
+    """All-time completion stats per person, kept up to date by src/person_stats.py."""
+    
+    __tablename__ = "person_stats"
+    
+    person_id = Column(Integer, ForeignKey("people.id", ondelete="CASCADE"), primary_key=True)
+    total_completions = Column(Integer, nullable=False, default=0, server_default="0")
+    category_counts = Column(JSONB, nullable=False, default=dict, server_default="{}")  # category -> completions
+    current_streak = Column(Integer, nullable=False, default=0, server_default="0")  # consecutive weeks up to last_week_start
+    last_week_start = Column(Date, nullable=True)  # start of the latest week with a completion
+    last_completed_at = Column(DateTime, nullable=True)
+    
+    # Relationships
+    person = relationship("Person", back_populates="stats")
+    
+    def __repr__(self):
+        return f"<PersonStats(person_id={self.person_id}, total={self.total_completions}, streak={self.current_streak})>"
+
+
 class Penalty(Base):
     """Penalty tracking for missed tasks."""
     
@@ -174,4 +240,116 @@ class Penalty(Base):
     week = relationship("Week", back_populates="penalties")
     
     def __repr__(self):
-        return f"<Penalty(id={self.id}, person_id={self.person_id}, amount={self.amount_eur}, paid={self.paid})>"
\ No newline at end of file
+        return f"<Penalty(id={self.id}, person_id={self.person_id}, amount={self.amount_eur}, paid={self.paid})>"
+
+
+class JobRun(Base):
+    """One run (or missed run) of a scheduled job, written by src/scheduler.py."""
+    
+    __tablename__ = "job_runs"
+    __table_args__ = (
+        Index("ix_job_runs_job_scheduled", "job_id", "scheduled_at"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    job_id = Column(String(191), nullable=False)  # e.g. reminder_1_18_0, week_rollover_deadline
+    name = Column(String(100), nullable=False)  # job function
+    worker = Column(Integer, nullable=True)  # supervisor worker index, NULL for a single process
+    scheduled_at = Column(DateTime, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    status = Column(String(20), nullable=False)  # ok, failed, missed
+    error = Column(Text, nullable=True)
+    
+    def __repr__(self):
+        return f"<JobRun(id={self.id}, job_id='{self.job_id}', status='{self.status}')>"
+
+
+class JobClaim(Base):
+    """One scheduled run of a job for one corridor, claimed by the process running it (src/sharding.py)."""
+    
+    __tablename__ = "job_claims"
+    
+    job = Column(String(100), primary_key=True)
+    corridor_id = Column(Integer, ForeignKey("corridors.id", ondelete="CASCADE"), primary_key=True)
+    scheduled_at = Column(DateTime, primary_key=True)
+    worker = Column(Integer, nullable=True)  # supervisor worker index, NULL for a single process
+    claimed_at = Column(DateTime, default=func.now())
+    
+    def __repr__(self):
+        return f"<JobClaim(job='{self.job}', corridor_id={self.corridor_id}, scheduled_at={self.scheduled_at})>"
+
+
+class AppSetting(Base):
+    """Small key/value store for bot-wide state (cache versions, etc.)."""
+    
+    __tablename__ = "app_settings"
+    
+    key = Column(String(100), primary_key=True)
+    value = Column(Text, nullable=True)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<AppSetting(key='{self.key}', value='{self.value}')>"
+
+
+# ========== Task catalogue versioning ==========
+
+CATALOGUE_VERSION_KEY = "catalogue_version"
+
+
+def bump_catalogue_version_statement():
+    """Upsert that increments the task catalogue version counter."""
+    stmt = pg_insert(AppSetting).values(key=CATALOGUE_VERSION_KEY, value="1")
+    return stmt.on_conflict_do_update(
+        index_elements=[AppSetting.key],
+        set_={
+            "value": cast(cast(AppSetting.value, Integer) + 1, Text),
+            "updated_at": func.now(),
+        },
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_catalogue_version(session, flush_context):
+    """Bump the catalogue version in the same transaction as any TaskType change.
+    
+    Running bots compare this counter to decide when to reload their
+    in-memory task catalogue (see src/catalogue.py).
+    """
+    changed = list(session.new) + list(session.dirty) + list(session.deleted)
+    if any(isinstance(obj, TaskType) for obj in changed):
+        session.connection().execute(bump_catalogue_version_statement())
+
+
+def insert_week_statement(corridor_id: int, year: int, week_number: int, start_date, deadline: datetime):
+    """INSERT for a week row that does nothing if the week already exists.
+    
+    Returns the new week's id, or no row when (corridor, year, week_number)
+    is taken.
+    """
+    return (
+        pg_insert(Week)
+        .values(
+            corridor_id=corridor_id, year=year, week_number=week_number,
+            start_date=start_date, deadline=deadline, closed=False,
+        )
+        .on_conflict_do_nothing(constraint="uq_corridor_year_week")
+        .returning(Week.id)
+    )
+
+
+def insert_week_tasks_statement(week_id: int):
+    """Bulk INSERT ... SELECT of one pending instance per task type of the week's corridor.
+    
+    Instances that already exist are skipped, so re-running it is safe.
+    """
+    corridor_id = select(Week.corridor_id).where(Week.id == week_id).scalar_subquery()
+    return (
+        pg_insert(TaskInstance)
+        .from_select(
+            ["week_id", "task_type_id", "status"],
+            select(literal(week_id), TaskType.id, literal("pending")).where(TaskType.corridor_id == corridor_id),
+        )
+        .on_conflict_do_nothing(constraint="uq_week_task")
+    )
@@ -0,0 +1,272 @@
+"""Rate-limited, coalescing queue for messages the bot sends on its own.
+
+Group notifications, reminders and rollover messages go through the outbox
+instead of calling ``bot.send_message`` inline:
+
+- ``send()`` only enqueues, so handlers don't wait for Telegram;
+  ``deliver()`` also waits until the message went out (scheduled jobs)
+- each chat has its own worker and token bucket, plus one global bucket,
+  so bursts stay under Telegram's limits, and at most MAX_CONCURRENT_SENDS
+  Bot API calls are in flight
+- ``RetryAfter`` is honoured and network errors are retried with backoff;
+  any other error drops just that message (``deliver()`` returns False)
+- messages sharing a coalesce key within COALESCE_WINDOW_SECONDS are sent
+  as one digest (e.g. several "X completed Y" notifications)
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Tuple
+
+from telegram import Bot
+from telegram.constants import ParseMode
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter, TelegramError
+from telegram.ext import Application
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+# ========== CONFIGURATION ==========
+
+# Telegram allows ~20 messages/minute in a group and ~1/second per private chat
+GROUP_MESSAGES_PER_SECOND = 20 / 60
+PRIVATE_MESSAGES_PER_SECOND = 1.0
+CHAT_BURST = 3
+
+# ...and ~30 messages/second across all chats
+GLOBAL_MESSAGES_PER_SECOND = 30.0
+
+# Bot API sendMessage calls in flight at once, across all chats
+MAX_CONCURRENT_SENDS = 16
+
+# How long a digest stays open for more messages
+COALESCE_WINDOW_SECONDS = 5.0
+
+# Retries for network errors (RetryAfter is always honoured)
+MAX_RETRIES = 5
+RETRY_BACKOFF_SECONDS = 1.0
+
+# ====================================
+
+
+class TokenBucket:
+    """Classic token bucket; ``acquire()`` sleeps until a token is available."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+@dataclass
+class OutboundMessage:
+    """A queued message; coalesced messages collect several lines."""
+
+    chat_id: int
+    lines: List[str]
+    parse_mode: Optional[str] = ParseMode.MARKDOWN
+    coalesce_key: Optional[str] = None
+    footer: Optional[str] = None
+    ready_at: float = 0.0
+    closed: bool = False
+    delivered: Optional[asyncio.Future] = None  # set to True/False once sent or dropped
+
+    @property
+    def text(self) -> str:
+        text = "\n".join(self.lines)
+        return f"{text}\n{self.footer}" if self.footer else text
+
+
+@dataclass
+class _ChatQueue:
+    bucket: TokenBucket
+    messages: Deque[OutboundMessage] = field(default_factory=deque)
+    wakeup: asyncio.Event = field(default_factory=asyncio.Event)
+    worker: Optional[asyncio.Task] = None
+
+
+class Outbox:
+    """Per-chat send queues with rate limiting, retries and coalescing."""
+
+    def __init__(self, bot: Bot):
+        self.bot = bot
+        self._chats: Dict[int, _ChatQueue] = {}
+        self._digests: Dict[Tuple[int, str], OutboundMessage] = {}
+        # Supervisor workers share the bot's global limit; a bucket needs room
+        # for one token, or acquire() never returns (WORKERS > 30)
+        global_rate = GLOBAL_MESSAGES_PER_SECOND / max(settings.workers, 1)
+        self._global_bucket = TokenBucket(global_rate, max(1.0, global_rate))
+        self._sending = asyncio.Semaphore(MAX_CONCURRENT_SENDS)
+        self.sent = 0
+        self.failed = 0
+
+    def send(self, chat_id, text: str, parse_mode: Optional[str] = ParseMode.MARKDOWN,
+             coalesce_key: Optional[str] = None, footer: Optional[str] = None):
+        """Queue a message.
+
+        Messages with the same ``coalesce_key`` for a chat that arrive while
+        a digest is open are merged into it: their texts become lines of one
+        message and only the newest ``footer`` is kept.
+        """
+        chat_id = int(chat_id)
+        chat = self._chat(chat_id)
+
+        if coalesce_key:
+            digest = self._digests.get((chat_id, coalesce_key))
+            if digest and not digest.closed:
+                digest.lines.append(text)
+                digest.footer = footer
+                return
+            message = OutboundMessage(
+                chat_id, [text], parse_mode, coalesce_key, footer,
+                ready_at=time.monotonic() + COALESCE_WINDOW_SECONDS,
+            )
+            self._digests[(chat_id, coalesce_key)] = message
+        else:
+            message = OutboundMessage(chat_id, [text], parse_mode)
+            # Don't hold a plain message back behind an open digest
+            for queued in chat.messages:
+                queued.ready_at = 0.0
+
+        chat.messages.append(message)
+        chat.wakeup.set()
+
+    async def deliver(self, chat_id, text: str, parse_mode: Optional[str] = ParseMode.MARKDOWN) -> bool:
+        """Queue a message and wait until it was sent; False if it was dropped.
+
+        It goes through the same queue and rate limits as ``send()``, so many
+        ``deliver()`` calls can be awaited together.
+        """
+        chat_id = int(chat_id)
+        chat = self._chat(chat_id)
+        message = OutboundMessage(chat_id, [text], parse_mode, delivered=asyncio.get_running_loop().create_future())
+        # Don't hold it back behind an open digest
+        for queued in chat.messages:
+            queued.ready_at = 0.0
+        chat.messages.append(message)
+        chat.wakeup.set()
+        return await message.delivered
+
+    async def flush(self, timeout: float = 30.0):
+        """Send everything queued now, waiting at most ``timeout`` seconds."""
+        for chat in self._chats.values():
+            for message in chat.messages:
+                message.ready_at = 0.0
+            chat.wakeup.set()
+
+        deadline = time.monotonic() + timeout
+        while any(chat.messages for chat in self._chats.values()) and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+
+        pending = sum(len(chat.messages) for chat in self._chats.values())
+        if pending:
+            logger.warning(f"Outbox flush timed out with {pending} messages pending")
+
+    def _chat(self, chat_id: int) -> _ChatQueue:
+        chat = self._chats.get(chat_id)
+        if chat is None:
+            rate = GROUP_MESSAGES_PER_SECOND if chat_id < 0 else PRIVATE_MESSAGES_PER_SECOND
+            chat = self._chats[chat_id] = _ChatQueue(TokenBucket(rate, CHAT_BURST))
+        if chat.worker is None or chat.worker.done():
+            chat.worker = asyncio.create_task(self._run_chat(chat), name=f"outbox-{chat_id}")
+        return chat
+
+    async def _run_chat(self, chat: _ChatQueue):
+        """Send a chat's messages in order, one at a time."""
+        while True:
+            if not chat.messages:
+                chat.wakeup.clear()
+                await chat.wakeup.wait()
+                continue
+
+            message = chat.messages[0]
+            delay = message.ready_at - time.monotonic()
+            if delay > 0:
+                # Keep the digest open; a plain message or flush() cuts it short
+                chat.wakeup.clear()
+                try:
+                    await asyncio.wait_for(chat.wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            delivered = False
+            try:
+                await chat.bucket.acquire()
+                await self._global_bucket.acquire()
+                self._close(message)
+                async with self._sending:
+                    delivered = await self._deliver(message)
+            except Exception:
+                # Keep the chat's worker alive for the messages behind it
+                self.failed += 1
+                logger.exception(f"Dropped message to {message.chat_id}: {message.text[:80]!r}")
+            finally:
+                # Also when cancelled, so deliver() never waits forever
+                chat.messages.popleft()
+                if message.delivered is not None and not message.delivered.done():
+                    message.delivered.set_result(delivered)
+
+    def _close(self, message: OutboundMessage):
+        """Stop a digest from taking more lines (later ones start a new digest)."""
+        message.closed = True
+        key = (message.chat_id, message.coalesce_key)
+        if self._digests.get(key) is message:
+            del self._digests[key]
+
+    async def _deliver(self, message: OutboundMessage) -> bool:
+        error = None
+        for attempt in range(1, MAX_RETRIES + 1):
+            try:
+                await self.bot.send_message(
+                    chat_id=message.chat_id, text=message.text, parse_mode=message.parse_mode
+                )
+                self.sent += 1
+                return True
+            except RetryAfter as e:
+                logger.warning(f"Rate limited by Telegram in chat {message.chat_id}, retrying in {e.retry_after}s")
+                await asyncio.sleep(float(e.retry_after))
+            except (BadRequest, Forbidden) as e:
+                # Retrying won't help
+                error = e
+                break
+            except NetworkError as e:
+                error = e
+                logger.warning(f"Send to {message.chat_id} failed (attempt {attempt}/{MAX_RETRIES}): {e}")
+                await asyncio.sleep(RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+            except TelegramError as e:
+                error = e
+                break
+            except Exception as e:
+                error = e
+                logger.exception(f"Unexpected error sending to {message.chat_id}")
+                break
+
+        self.failed += 1
+        logger.error(f"Dropped message to {message.chat_id} ({error}): {message.text[:80]!r}")
+        return False
+
+
+def get_outbox(app: Application) -> Outbox:
+    """Return the application's outbox, creating it on first use."""
+    outbox = app.bot_data.get("outbox")
+    if outbox is None:
+        outbox = app.bot_data["outbox"] = Outbox(app.bot)
+    return outbox
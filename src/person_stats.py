@@ -0,0 +1,248 @@
+"""Per-person completion stats, kept in the ``person_stats`` table.
+
+``/mystats`` reads one row instead of counting a person's whole history.
+The row is updated in the same statement that completes or amends a task
+(``credit_cte``/``debit_cte`` are added to the statements in
+src/completion.py), so it can't drift from ``task_instances`` unless rows
+are changed by hand. ``rebuild_person_stats()`` recomputes every row from
+``completion_log`` (``make rebuild-stats``).
+
+The streak is the number of consecutive weeks, up to ``last_week_start``,
+with at least one completion. Weeks are compared by the Monday they start
+in. Amending the only completion of the latest week shortens the streak by
+one; a gap that opens further back is only picked up by a rebuild.
+"""
+
+import logging
+from datetime import date, timedelta
+from typing import Optional
+
+from sqlalchemy import Integer, and_, case, cast, func, literal, literal_column, select, text, update
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models import PersonStats, TaskInstance, TaskType, Week
+
+logger = logging.getLogger(__name__)
+
+# Category key for task types without one
+OTHER = "other"
+
+
+def _week_of(start_date):
+    """Monday of the week ``start_date`` falls in."""
+    return func.date_trunc("week", start_date).cast(PersonStats.last_week_start.type)
+
+
+def _bump(counts, category, delta):
+    """``counts`` with ``category`` changed by ``delta``; keys reaching 0 are removed."""
+    new = func.coalesce(counts.op("->>")(category).cast(Integer), 0) + delta
+    return case(
+        (new > 0, counts.op("||", return_type=JSONB)(func.jsonb_build_object(category, new))),
+        else_=counts.op("-", return_type=JSONB)(category),
+    )
+
+
+def credit_cte(done):
+    """Count the instances in ``done`` for their completer.
+
+    ``done`` must return ``person_id``, ``task_type_id``, ``week_id`` and
+    ``completed_at`` of each completed instance.
+    """
+    source = (
+        select(
+            done.c.person_id,
+            literal(1),
+            func.jsonb_build_object(func.coalesce(TaskType.category, OTHER), 1),
+            literal(1),
+            _week_of(Week.start_date),
+            done.c.completed_at,
+        )
+        .select_from(done)
+        .join(TaskType, TaskType.id == done.c.task_type_id)
+        .join(Week, Week.id == done.c.week_id)
+        # Keeps Postgres from reading ON CONFLICT as part of the last JOIN
+        .where(literal(True))
+    )
+    stmt = pg_insert(PersonStats).from_select(
+        ["person_id", "total_completions", "category_counts", "current_streak",
+         "last_week_start", "last_completed_at"],
+        source,
+    )
+    new = stmt.excluded
+    last_week = PersonStats.last_week_start
+    # The one category of the new row (written out: a select() would add
+    # "excluded" to its FROM list)
+    category = literal_column("(SELECT jsonb_object_keys(excluded.category_counts))")
+
+    return stmt.on_conflict_do_update(
+        index_elements=[PersonStats.person_id],
+        set_={
+            "total_completions": PersonStats.total_completions + 1,
+            "category_counts": _bump(PersonStats.category_counts, category, 1),
+            "current_streak": case(
+                (last_week.is_(None), 1),
+                (new.last_week_start <= last_week, PersonStats.current_streak),
+                (new.last_week_start == last_week + 7, PersonStats.current_streak + 1),
+                else_=1,
+            ),
+            "last_week_start": func.greatest(last_week, new.last_week_start),
+            "last_completed_at": func.greatest(PersonStats.last_completed_at, new.last_completed_at),
+        },
+    ).returning(PersonStats.person_id).cte("credit")
+
+
+def debit_cte(undone):
+    """Take the instances in ``undone`` off their original completer's stats.
+
+    ``undone`` must return ``id``, ``task_type_id``, ``week_id`` and
+    ``original_completer_id`` of each amended instance.
+    """
+    # Both subqueries read the snapshot from before the amend
+    week_completions = (
+        select(func.count(TaskInstance.id))
+        .where(
+            TaskInstance.week_id == undone.c.week_id,
+            TaskInstance.completed_by == undone.c.original_completer_id,
+        )
+        .scalar_subquery()
+    )
+    last_completed_at = (
+        select(func.max(TaskInstance.completed_at))
+        .where(
+            TaskInstance.completed_by == undone.c.original_completer_id,
+            TaskInstance.id != undone.c.id,
+        )
+        .scalar_subquery()
+    )
+    source = (
+        select(
+            undone.c.original_completer_id.label("person_id"),
+            func.coalesce(TaskType.category, OTHER).label("category"),
+            _week_of(Week.start_date).label("week_start"),
+            (week_completions == 1).label("only_completion"),
+            last_completed_at.label("last_completed_at"),
+        )
+        .select_from(undone)
+        .join(TaskType, TaskType.id == undone.c.task_type_id)
+        .join(Week, Week.id == undone.c.week_id)
+        .subquery()
+    )
+
+    streak = PersonStats.current_streak
+    last_week = PersonStats.last_week_start
+    emptied_last_week = and_(source.c.only_completion, source.c.week_start == last_week)
+    emptied_streak_week = and_(
+        source.c.only_completion,
+        source.c.week_start < last_week,
+        source.c.week_start > last_week - streak * 7,
+    )
+
+    return (
+        update(PersonStats)
+        .where(PersonStats.person_id == source.c.person_id)
+        .values(
+            total_completions=func.greatest(PersonStats.total_completions - 1, 0),
+            category_counts=_bump(PersonStats.category_counts, source.c.category, -1),
+            current_streak=case(
+                (emptied_last_week, func.greatest(streak - 1, 0)),
+                # The streak now starts in the week after the emptied one
+                (emptied_streak_week, cast(last_week - source.c.week_start, Integer) / 7),
+                else_=streak,
+            ),
+            last_week_start=case(
+                (emptied_last_week, case((streak > 1, last_week - 7), else_=None)),
+                else_=last_week,
+            ),
+            last_completed_at=source.c.last_completed_at,
+        )
+        .returning(PersonStats.person_id)
+        .cte("debit")
+    )
+
+
+# Recomputes every row. A completion counts unless the next log entry of the
+# same instance is its amend.
+REBUILD_SQL = f"""
+WITH events AS (
+    SELECT task_instance_id, person_id, action, timestamp,
+           lead(action) OVER (PARTITION BY task_instance_id ORDER BY timestamp, id) AS next_action
+    FROM completion_log
+),
+completions AS (
+    SELECT e.person_id,
+           coalesce(tt.category, '{OTHER}') AS category,
+           date_trunc('week', w.start_date)::date AS week_start,
+           e.timestamp
+    FROM events e
+    JOIN task_instances ti ON ti.id = e.task_instance_id
+    JOIN task_types tt ON tt.id = ti.task_type_id
+    JOIN weeks w ON w.id = ti.week_id
+    WHERE e.action = 'completed'
+      AND e.person_id IS NOT NULL
+      AND e.next_action IS DISTINCT FROM 'amended'
+),
+totals AS (
+    SELECT person_id, count(*) AS total_completions, max(timestamp) AS last_completed_at
+    FROM completions
+    GROUP BY person_id
+),
+categories AS (
+    SELECT person_id, jsonb_object_agg(category, completions) AS category_counts
+    FROM (
+        SELECT person_id, category, count(*) AS completions
+        FROM completions
+        GROUP BY person_id, category
+    ) AS per_category
+    GROUP BY person_id
+),
+runs AS (
+    -- Consecutive weeks share the same run value
+    SELECT person_id, week_start,
+           week_start - 7 * row_number() OVER (PARTITION BY person_id ORDER BY week_start)::int AS run
+    FROM (SELECT DISTINCT person_id, week_start FROM completions) AS active_weeks
+),
+streaks AS (
+    SELECT DISTINCT ON (person_id)
+           person_id, count(*) AS current_streak, max(week_start) AS last_week_start
+    FROM runs
+    GROUP BY person_id, run
+    ORDER BY person_id, run DESC
+)
+INSERT INTO person_stats (person_id, total_completions, category_counts, current_streak,
+                          last_week_start, last_completed_at)
+SELECT person_id, t.total_completions, c.category_counts, s.current_streak,
+       s.last_week_start, t.last_completed_at
+FROM totals t
+JOIN categories c USING (person_id)
+JOIN streaks s USING (person_id)
+"""
+
+
+async def rebuild_person_stats(db: AsyncSession) -> int:
+    """Recompute all stats from ``completion_log``; returns the number of rows.
+
+    The caller commits (or rolls back to leave the stored stats alone).
+    """
+    # Completions wait for the rebuild instead of updating rows it replaces
+    await db.execute(text("LOCK TABLE person_stats IN EXCLUSIVE MODE"))
+    await db.execute(text("DELETE FROM person_stats"))
+    return (await db.execute(text(REBUILD_SQL))).rowcount
+
+
+async def get_person_stats(db: AsyncSession, person_id: int) -> Optional[PersonStats]:
+    return await db.get(PersonStats, person_id)
+
+
+def current_streak(stats: Optional[PersonStats], week_start: date) -> int:
+    """The streak as of the week starting ``week_start``.
+
+    Still counts while the current week has no completion yet; drops to 0
+    once a whole week was missed.
+    """
+    if not stats or not stats.last_week_start:
+        return 0
+    monday = week_start - timedelta(days=week_start.weekday())
+    if stats.last_week_start < monday - timedelta(days=7):
+        return 0
+    return stats.current_streak
@@ -0,0 +1,192 @@
+"""Opt-in slow-query and N+1 profiler (QUERY_PROFILE=true).
+
+Statements are grouped by normalized SQL (literals and bind parameters
+replaced by ``?``) under the handler or job that ran them (see
+``track_handler``/``track_job`` in src/metrics.py):
+
+- a statement executed REPEAT_THRESHOLD or more times in one handler run is
+  logged as a likely N+1 loop
+- a statement slower than SLOW_QUERY_MS is logged with its ``EXPLAIN`` plan
+- ``dump_query_profile()`` logs (and optionally writes) a report of the
+  whole run; the bot calls it on shutdown
+
+Meant for debugging: the EXPLAINs add round-trips to slow statements.
+"""
+
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.config import settings
+from src.metrics import UNTRACKED, current_run, run_finished_hooks
+
+logger = logging.getLogger(__name__)
+
+# ========== CONFIGURATION ==========
+
+# Same statement this many times in one handler run looks like an N+1 loop
+REPEAT_THRESHOLD = 3
+
+# Statements EXPLAIN can describe
+EXPLAINABLE = ("select", "with", "insert", "update", "delete")
+
+# ====================================
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_CAST = re.compile(r"::\w+(?: WITHOUT TIME ZONE)?(?:\[\])?")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_BIND = re.compile(r"\$\d+|%\(\w+\)s")
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE = re.compile(r"\s+")
+
+
+def normalize_sql(statement: str) -> str:
+    """Collapse a statement to its shape: literals, parameters and IN lists become ``?``."""
+    sql = _STRING.sub("?", statement)
+    sql = _CAST.sub("", sql)
+    sql = _BIND.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _LIST.sub("(?)", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+@dataclass
+class StatementStats:
+    count: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    max_per_run: int = 0
+    slow: int = 0
+
+
+@dataclass
+class HandlerProfile:
+    runs: int = 0
+    statements: Dict[str, StatementStats] = field(default_factory=dict)
+    repeated: Set[str] = field(default_factory=set)
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(stats.total_seconds for stats in self.statements.values())
+
+
+class QueryProfiler:
+    """Collects per-handler statement stats from engine events."""
+
+    def __init__(self, slow_seconds: float, repeat_threshold: int = REPEAT_THRESHOLD):
+        self.slow_seconds = slow_seconds
+        self.repeat_threshold = repeat_threshold
+        self.handlers: Dict[str, HandlerProfile] = {}
+        self.started = time.time()
+
+    def install(self, engine: AsyncEngine):
+        sync_engine = engine.sync_engine
+        event.listen(sync_engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", self._after_cursor_execute)
+        run_finished_hooks.append(self._run_finished)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("profile_started", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["profile_started"].pop()
+        run = current_run()
+        name = run.name if run else UNTRACKED
+        sql = normalize_sql(statement)
+
+        profile = self.handlers.setdefault(name, HandlerProfile())
+        stats = profile.statements.setdefault(sql, StatementStats())
+        stats.count += 1
+        stats.total_seconds += elapsed
+        stats.max_seconds = max(stats.max_seconds, elapsed)
+        if run:
+            run.statements[sql] = run.statements.get(sql, 0) + 1
+
+        if elapsed >= self.slow_seconds:
+            stats.slow += 1
+            plan = None if executemany else self._explain(conn, statement, parameters)
+            logger.warning(
+                f"Slow query in {name} ({elapsed * 1000:.1f} ms): {sql}"
+                + (f"\n{plan}" if plan else "")
+            )
+
+    def _explain(self, conn, statement: str, parameters) -> Optional[str]:
+        """EXPLAIN ``statement`` on the connection that ran it, inside a savepoint."""
+        if not statement.lstrip().lower().startswith(EXPLAINABLE):
+            return None
+        # A raw DBAPI cursor, so the EXPLAIN doesn't go through these events
+        cursor = conn.connection.cursor()
+        try:
+            cursor.execute("SAVEPOINT query_profiler")
+            try:
+                cursor.execute(f"EXPLAIN {statement}", parameters)
+                return "\n".join(row[0] for row in cursor.fetchall())
+            finally:
+                cursor.execute("ROLLBACK TO SAVEPOINT query_profiler")
+        except Exception as e:
+            return f"(EXPLAIN failed: {e})"
+        finally:
+            cursor.close()
+
+    def _run_finished(self, run):
+        profile = self.handlers.setdefault(run.name, HandlerProfile())
+        profile.runs += 1
+        for sql, count in run.statements.items():
+            stats = profile.statements[sql]
+            stats.max_per_run = max(stats.max_per_run, count)
+            if count >= self.repeat_threshold and sql not in profile.repeated:
+                profile.repeated.add(sql)
+                logger.warning(f"Possible N+1 in {run.name}: statement ran {count}x in one run: {sql}")
+
+    def report(self) -> str:
+        """Per-handler summary, slowest handlers first."""
+        lines = [f"Query profile since {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.started))}"]
+        for name, profile in sorted(self.handlers.items(), key=lambda item: -item[1].total_seconds):
+            queries = sum(stats.count for stats in profile.statements.values())
+            per_run = f", {queries / profile.runs:.1f} queries/run" if profile.runs else ""
+            lines.append("")
+            lines.append(
+                f"{name}: {profile.runs} runs, {queries} queries{per_run}, "
+                f"{profile.total_seconds * 1000:.1f} ms in SQL"
+            )
+            for sql, stats in sorted(profile.statements.items(), key=lambda item: -item[1].total_seconds):
+                flags = []
+                if sql in profile.repeated:
+                    flags.append(f"REPEATED x{stats.max_per_run}/run")
+                if stats.slow:
+                    flags.append(f"SLOW x{stats.slow}")
+                lines.append(
+                    f"  {stats.count:>5}x  total {stats.total_seconds * 1000:8.1f} ms  "
+                    f"max {stats.max_seconds * 1000:7.1f} ms  {' '.join(flags)}".rstrip()
+                )
+                lines.append(f"         {sql[:300]}")
+        return "\n".join(lines)
+
+
+_profiler: Optional[QueryProfiler] = None
+
+
+def install_query_profiler(engine: AsyncEngine):
+    """Attach the profiler to ``engine`` (no-op unless QUERY_PROFILE is set)."""
+    global _profiler
+    if not settings.query_profile or _profiler is not None:
+        return
+    _profiler = QueryProfiler(settings.slow_query_ms / 1000)
+    _profiler.install(engine)
+    logger.info(f"Query profiler on (slow queries: >= {settings.slow_query_ms} ms)")
+
+
+def dump_query_profile():
+    """Log the profile report and write it to QUERY_PROFILE_REPORT, if set."""
+    if _profiler is None:
+        return
+    report = _profiler.report()
+    logger.info(report)
+    if settings.query_profile_report:
+        Path(settings.query_profile_report).write_text(report + "\n")
@@ -0,0 +1,155 @@
+"""Record incoming updates, anonymized, for replaying them later.
+
+With RECORD_UPDATES_PATH set, every update the bot receives is appended to
+that file as one compact JSON line ``{"t": <received at>, "update": {...}}``
+(gzip-compressed if the path ends in ``.gz``). User and chat ids are
+replaced by keyed hashes and names are dropped, as is the text of the
+bot's own messages (e.g. the message of a callback query), which names
+residents; the file holds the traffic pattern but not who sent it. scripts/replay_updates.py feeds a
+recording back through the bot.
+
+Ids are hashed with RECORD_UPDATES_SALT; without it a random salt is used,
+so ids only stay consistent within one run of the bot.
+"""
+
+import gzip
+import hashlib
+import hmac
+import json
+import logging
+import secrets
+import time
+from typing import IO, Iterator, Optional, Tuple
+
+from telegram import Update
+from telegram.ext import Application, ContextTypes, TypeHandler
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Handler group that runs before all the bot's handlers
+RECORDER_GROUP = -1
+
+# Objects (or lists of them) holding a user or chat, and the fields dropped from them
+IDENTITY_KEYS = {
+    "from", "chat", "user", "sender_chat", "forward_from", "forward_from_chat", "via_bot",
+    "new_chat_members", "left_chat_member", "contact", "users",
+}
+NAME_FIELDS = {"last_name", "username", "title", "phone_number", "vcard"}
+# Their id fields, replaced by pseudonyms
+ID_FIELDS = {"id", "user_id"}
+
+# Names outside of those objects, dropped wherever they appear
+SIGNATURE_FIELDS = {"forward_sender_name", "forward_signature", "author_signature"}
+
+# Dropped from messages sent by a bot (replaying them only needs message_id and chat)
+BOT_TEXT_FIELDS = {"text", "caption", "entities", "caption_entities"}
+
+# Stands in for first names (required on users)
+ANONYMOUS_NAME = "Resident"
+
+
+class UpdateRecorder:
+    """Appends anonymized updates to a JSON-lines file."""
+
+    def __init__(self, path: str, salt: Optional[str] = None):
+        self.path = path
+        self._key = (salt or secrets.token_hex(16)).encode()
+        self._file: Optional[IO[str]] = None
+        self.recorded = 0
+
+    def anonymize_id(self, value: int) -> int:
+        """Map an id to a stable pseudonym, keeping its sign (groups are negative)."""
+        digest = hmac.new(self._key, str(abs(value)).encode(), hashlib.sha256).digest()
+        pseudonym = 10**9 + int.from_bytes(digest[:8], "big") % 10**9
+        return -pseudonym if value < 0 else pseudonym
+
+    def anonymize(self, data, key: Optional[str] = None):
+        """Copy of an update dict with ids hashed and names removed."""
+        if isinstance(data, list):
+            # Items of a list (e.g. new_chat_members) are what its key holds
+            return [self.anonymize(item, key) for item in data]
+        if not isinstance(data, dict):
+            return data
+
+        result = {}
+        for field, value in data.items():
+            if field in SIGNATURE_FIELDS:
+                continue
+            if key in IDENTITY_KEYS:
+                if field in NAME_FIELDS:
+                    continue
+                if field == "first_name":
+                    value = ANONYMOUS_NAME
+                elif field in ID_FIELDS:
+                    value = self.anonymize_id(value)
+            if field == "chat_instance":
+                value = str(self.anonymize_id(int(value)))
+            if _sent_by_bot(field, value, key):
+                value = {name: item for name, item in value.items() if name not in BOT_TEXT_FIELDS}
+            result[field] = self.anonymize(value, field)
+        return result
+
+    def record(self, update: Update):
+        if self._file is None:
+            opener = gzip.open if self.path.endswith(".gz") else open
+            self._file = opener(self.path, "at")
+        line = {"t": round(time.time(), 3), "update": self.anonymize(update.to_dict())}
+        self._file.write(json.dumps(line, separators=(",", ":"), ensure_ascii=False) + "\n")
+        self._file.flush()
+        self.recorded += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def _sent_by_bot(field: str, value, key: Optional[str]) -> bool:
+    # A callback query's message is always the bot's, even when it has no "from"
+    if not isinstance(value, dict) or field not in {"message", "reply_to_message", "pinned_message"}:
+        return False
+    return key == "callback_query" or bool((value.get("from") or {}).get("is_bot"))
+
+
+def read_recording(path: str) -> Iterator[Tuple[Optional[float], dict]]:
+    """Yield ``(received at, update dict)`` from a recording.
+
+    Plain JSON-lines files with one Update per line are read too (without
+    timestamps).
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            data = json.loads(line)
+            if "update" in data:
+                yield data.get("t"), data["update"]
+            else:
+                yield None, data
+
+
+def install_recorder(app: Application):
+    """Record every update to RECORD_UPDATES_PATH (no-op unless set)."""
+    if not settings.record_updates_path:
+        return
+    recorder = app.bot_data["recorder"] = UpdateRecorder(
+        settings.record_updates_path, settings.record_updates_salt
+    )
+
+    async def record(update: Update, context: ContextTypes.DEFAULT_TYPE):
+        try:
+            recorder.record(update)
+        except Exception:
+            logger.exception("Failed to record update")
+
+    app.add_handler(TypeHandler(Update, record), group=RECORDER_GROUP)
+    logger.info(f"Recording anonymized updates to {settings.record_updates_path}")
+
+
+def close_recorder(app: Application):
+    recorder = app.bot_data.get("recorder")
+    if recorder:
+        recorder.close()
@@ -6,13 +6,18 @@ CONFIGURATION:
 - Edit DEADLINE_DAY to change when the week ends
 """
 
+import asyncio
+import logging
 from datetime import datetime, time, timedelta
 from telegram.ext import Application
-from telegram.constants import ParseMode
 
-from src.database import get_db
-from src.models import Person, TaskInstance, Week
-from src.menus import CATEGORY_AMOUNTS
+from src.corridors import CorridorInfo, get_corridors
+from src.database import get_async_db
+from src.metrics import timed, track_job
+from src.outbox import get_outbox
+from src.scheduler import schedule_daily
+from src.sharding import corridor_job_claims, owns_corridor
+from src.status import OpenWeekProgress, get_open_weeks_progress
 
 # ========== CONFIGURATION ==========
 
@@ -28,98 +33,124 @@ REMINDER_TIMES = [
 # When does the week end? (0=Monday, 6=Sunday)
 DEADLINE_DAY = 6  # Sunday
 
+# A reminder that is due while the bot is down is still sent after a restart
+# within this many seconds; a later one is skipped
+REMINDER_MISFIRE_GRACE_SECONDS = 2 * 60 * 60
+
 # ====================================
 
+logger = logging.getLogger(__name__)
 
-async def send_reminder(app: Application, group_chat_id: int):
-    """Send a reminder about pending tasks to the group."""
-    with get_db() as db:
-        current_week = db.query(Week).filter_by(closed=False).order_by(Week.deadline.desc()).first()
-        
-        if not current_week:
-            return  # No active week
-        
-        # Get all task instances for the week
-        all_instances = db.query(TaskInstance).filter_by(week_id=current_week.id).all()
-        completed_count = len([t for t in all_instances if t.status == "completed"])
-        total = sum([CATEGORY_AMOUNTS.get(cat, 1) for cat in CATEGORY_AMOUNTS.keys()])
-        remaining = total - completed_count
-        
-        if remaining == 0:
-            # All tasks done - send celebration
-            message = (
-                "🎉 *All tasks completed!*\n\n"
-                "Great work everyone! Time to relax 😎🍹"
-            )
-        else:
-            # Tasks remaining - send reminder
-            # Calculate days until deadline
-            now = datetime.now()
-            days_until_deadline = (current_week.deadline - now).days
-            
-            if days_until_deadline < 0:
-                time_msg = "⚠️ *OVERDUE!*"
-            elif days_until_deadline == 0:
-                time_msg = "⏰ *Due TODAY!*"
-            elif days_until_deadline == 1:
-                time_msg = "⏰ *Due TOMORROW!*"
-            else:
-                time_msg = f"⏰ Due in *{days_until_deadline} days*"
-            
-            # Get non-contributors
-            completed = [t for t in all_instances if t.status == "completed"]
-            completed_by_ids = [t.completed_by for t in completed if t.completed_by]
-            active_people = db.query(Person).filter_by(active=True).all()
-            not_contributed = [p for p in active_people if p.id not in completed_by_ids]
-            
-            progress = int((completed_count / total) * 10) if total > 0 else 0
-            progress_bar = "█" * progress + "░" * (10 - progress)
-            
-            message = (
-                f"📢 *Task Reminder*\n\n"
-                f"{time_msg}\n"
-                f"Deadline: {current_week.deadline.strftime('%A, %B %d at %H:%M')}\n\n"
-                f"📊 Progress: {progress_bar} {completed_count}/{total}\n"
-                f"🔴 *{remaining} tasks* still need to be done!\n\n"
-            )
-            
-            if not_contributed:
-                message += f"💭 *Haven't contributed yet:*\n"
-                message += ", ".join([p.name for p in not_contributed])
-                message += "\n\n"
-            
-            message += "¡Hagámosle pues! 💪"
+
+@timed(track_job, "send_reminder")
+async def send_reminders(app: Application):
+    """Send the reminder of every corridor.
+    
+    The progress of all corridors' open weeks comes from one grouped query;
+    the messages are then delivered concurrently through the outbox, which
+    keeps to the per-chat and global rate limits. The run (and the job's
+    duration metric) ends when every reminder was sent or dropped.
+    
+    In supervisor mode each worker only reminds the corridors it owns, and
+    the run's claims keep two processes from reminding the same corridor.
+    """
+    async with get_async_db() as db:
+        corridors = [corridor for corridor in await get_corridors(db) if owns_corridor(corridor)]
+    
+    async with corridor_job_claims("send_reminder", [c.id for c in corridors]) as claimed:
+        corridors = [corridor for corridor in corridors if corridor.id in claimed]
+        async with get_async_db() as db:
+            progress = await get_open_weeks_progress(db, [c.id for c in corridors])
         
-        # Send to group
-        try:
-            await app.bot.send_message(
-                chat_id=group_chat_id,
-                text=message,
-                parse_mode=ParseMode.MARKDOWN
-            )
-        except Exception as e:
-            print(f"Failed to send reminder: {e}")
+        now = datetime.now()
+        outbox = get_outbox(app)
+        reminded = [corridor for corridor in corridors if corridor.id in progress]
+        delivered = await asyncio.gather(*(
+            outbox.deliver(corridor.chat_id, render_reminder(corridor, progress[corridor.id], now))
+            for corridor in reminded
+        ))
+    
+    failed = [corridor.name for corridor, ok in zip(reminded, delivered) if not ok]
+    if failed:
+        logger.warning(f"Reminder not delivered to {', '.join(failed)}")
+    logger.info(f"Sent {len(reminded) - len(failed)}/{len(reminded)} reminders")
 
 
-def setup_reminders(app: Application, group_chat_id: int):
+async def send_reminder(app: Application, corridor: CorridorInfo):
+    """Send a reminder about pending tasks to one corridor's group (e.g. by hand)."""
+    async with get_async_db() as db:
+        progress = await get_open_weeks_progress(db, [corridor.id])
+    
+    if corridor.id not in progress:
+        return  # No active week
+    get_outbox(app).send(corridor.chat_id, render_reminder(corridor, progress[corridor.id], datetime.now()))
+
+
+def render_reminder(corridor: CorridorInfo, progress: OpenWeekProgress, now: datetime) -> str:
+    """The reminder text for a corridor's open week."""
+    total = corridor.weekly_total
+    completed_count = progress.completed_count
+    remaining = total - completed_count
+    
+    if remaining == 0:
+        # All tasks done - send celebration
+        return (
+            "🎉 *All tasks completed!*\n\n"
+            "Great work everyone! Time to relax 😎🍹"
+        )
+    
+    # Tasks remaining - send reminder
+    # Calculate days until deadline
+    days_until_deadline = (progress.deadline - now).days
+    
+    if days_until_deadline < 0:
+        time_msg = "⚠️ *OVERDUE!*"
+    elif days_until_deadline == 0:
+        time_msg = "⏰ *Due TODAY!*"
+    elif days_until_deadline == 1:
+        time_msg = "⏰ *Due TOMORROW!*"
+    else:
+        time_msg = f"⏰ Due in *{days_until_deadline} days*"
+    
+    progress_units = int((completed_count / total) * 10) if total > 0 else 0
+    progress_bar = "█" * progress_units + "░" * (10 - progress_units)
+    
+    message = (
+        f"📢 *Task Reminder*\n\n"
+        f"{time_msg}\n"
+        f"Deadline: {progress.deadline.strftime('%A, %B %d at %H:%M')}\n\n"
+        f"📊 Progress: {progress_bar} {completed_count}/{total}\n"
+        f"🔴 *{remaining} tasks* still need to be done!\n\n"
+    )
+    
+    if progress.non_contributors:
+        message += f"💭 *Haven't contributed yet:*\n"
+        message += ", ".join(progress.non_contributors)
+        message += "\n\n"
+    
+    message += "¡Hagámosle pues! 💪"
+    return message
+
+
+def setup_reminders(app: Application):
     """Setup reminder jobs.
     
-    Call this function from your main bot to schedule reminders.
+    Call this function from your main bot to schedule reminders. Each run
+    sends a reminder to every corridor's group.
     
     Args:
         app: The Telegram Application instance
-        group_chat_id: The group chat ID to send reminders to
     """
-    job_queue = app.job_queue
-    
     # Schedule reminders for each day and time
     for day in REMINDER_DAYS:
         for reminder_time in REMINDER_TIMES:
-            job_queue.run_daily(
-                callback=lambda context: send_reminder(app, group_chat_id),
-                time=reminder_time,
-                days=(day,),  # Tuple of days
-                name=f"reminder_{day}_{reminder_time.hour}_{reminder_time.minute}"
+            schedule_daily(
+                app,
+                f"reminder_{day}_{reminder_time.hour}_{reminder_time.minute}",
+                send_reminders,
+                at=reminder_time,
+                days=(day,),
+                misfire_grace_seconds=REMINDER_MISFIRE_GRACE_SECONDS,
             )
     
     print(f"✅ Reminders scheduled:")
@@ -161,7 +192,7 @@ from src.reminders import setup_reminders
 app = Application.builder().token(token).build()
 
 # Setup reminders
-setup_reminders(app, group_chat_id)
+setup_reminders(app)
 
 # Then start the bot
 app.run_polling()
@@ -0,0 +1,158 @@
+"""Table-driven router for inline button callbacks.
+
+Routes are declared once with a pattern such as ``complete:task:<task_id:int>``:
+literal segments and typed parameters separated by ``:`` (the format of
+our ``callback_data``). Patterns are compiled into a trie, so dispatch
+costs one dict lookup per segment no matter how many routes there are.
+Each route declares whether it needs a private chat and whether its
+handler works on a corridor (see src/corridors.py), and keeps its own
+timing stats.
+"""
+
+import logging
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from telegram import Update
+
+from src.metrics import track_handler
+
+logger = logging.getLogger(__name__)
+
+# Parameter types usable in patterns, e.g. <task_id:int>
+PARAM_TYPES: Dict[str, Callable[[str], Any]] = {"str": str, "int": int}
+
+# Splits a pattern on ":" outside of <...>
+_SEGMENT_SEPARATOR = re.compile(r":(?![^<]*>)")
+
+
+@dataclass
+class RouteStats:
+    """Call count and handler time of a route."""
+
+    calls: int = 0
+    errors: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    @property
+    def mean_seconds(self) -> float:
+        return self.total_seconds / self.calls if self.calls else 0.0
+
+
+@dataclass
+class Route:
+    pattern: str
+    handler: Callable[..., Awaitable[Any]]
+    private: bool
+    corridor: bool
+    title: str
+    stats: RouteStats
+
+
+class _Node:
+    __slots__ = ("literals", "param", "route")
+
+    def __init__(self):
+        self.literals: Dict[str, "_Node"] = {}
+        # (name, converter, child) of a typed parameter segment
+        self.param: Optional[Tuple[str, Callable[[str], Any], "_Node"]] = None
+        self.route: Optional[Route] = None
+
+
+class CallbackRouter:
+    """Maps ``callback_data`` to handlers called as ``handler(query, **params)``.
+
+    Handlers of corridor routes also get ``corridor=``, the corridor the
+    update belongs to; updates without one go to ``on_corridor_missing``.
+    """
+
+    def __init__(self, on_private_required: Callable[[Update, str], Awaitable[Any]],
+                 resolve_corridor: Optional[Callable[[Update], Awaitable[Any]]] = None,
+                 on_corridor_missing: Optional[Callable[[Update], Awaitable[Any]]] = None):
+        self._root = _Node()
+        self._on_private_required = on_private_required
+        self._resolve_corridor = resolve_corridor
+        self._on_corridor_missing = on_corridor_missing
+        self.routes: Dict[str, Route] = {}
+
+    def add(self, pattern: str, handler: Callable[..., Awaitable[Any]], private: bool = False,
+            title: Optional[str] = None, corridor: bool = False):
+        """Register ``handler`` for ``pattern``.
+
+        ``title`` names the feature in the "use a private chat" redirect and
+        defaults to the pattern's first segment.
+        """
+        if corridor and self._resolve_corridor is None:
+            raise ValueError(f"Corridor route {pattern} needs a router with resolve_corridor")
+        node = self._root
+        for segment in _SEGMENT_SEPARATOR.split(pattern):
+            if segment.startswith("<") and segment.endswith(">"):
+                name, _, type_name = segment[1:-1].partition(":")
+                converter = PARAM_TYPES[type_name or "str"]
+                if node.param is None:
+                    node.param = (name, converter, _Node())
+                elif node.param[:2] != (name, converter):
+                    raise ValueError(f"Conflicting parameter {segment} in {pattern}")
+                node = node.param[2]
+            else:
+                node = node.literals.setdefault(segment, _Node())
+
+        if node.route is not None:
+            raise ValueError(f"Duplicate route {pattern}")
+        node.route = Route(
+            pattern, handler, private, corridor, title or pattern.split(":")[0].title(), RouteStats()
+        )
+        self.routes[pattern] = node.route
+
+    def resolve(self, data: str) -> Tuple[Optional[Route], Dict[str, Any]]:
+        """Find the route for ``data`` and its parsed parameters."""
+        node = self._root
+        params: Dict[str, Any] = {}
+        for segment in data.split(":"):
+            child = node.literals.get(segment)
+            if child is None and node.param is not None:
+                name, converter, child = node.param
+                try:
+                    params[name] = converter(segment)
+                except ValueError:
+                    return None, {}
+            if child is None:
+                return None, {}
+            node = child
+        return node.route, params
+
+    async def dispatch(self, update: Update) -> bool:
+        """Run the handler for ``update.callback_query``; False if nothing matched."""
+        query = update.callback_query
+        route, params = self.resolve(query.data or "")
+        if route is None:
+            logger.warning(f"No route for callback data {query.data!r}")
+            return False
+
+        if route.private and update.effective_chat.type != "private":
+            await self._on_private_required(update, route.title)
+            return True
+
+        if route.corridor:
+            params["corridor"] = await self._resolve_corridor(update)
+            if params["corridor"] is None:
+                await self._on_corridor_missing(update)
+                return True
+
+        started = time.perf_counter()
+        try:
+            with track_handler(f"callback:{route.pattern}"):
+                await route.handler(query, **params)
+        except Exception:
+            route.stats.errors += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            route.stats.calls += 1
+            route.stats.total_seconds += elapsed
+            route.stats.max_seconds = max(route.stats.max_seconds, elapsed)
+            logger.debug(f"Callback {route.pattern} handled in {elapsed * 1000:.1f} ms")
+        return True
@@ -0,0 +1,342 @@
+"""Persistent scheduling of the bot's jobs (reminders, week rollover).
+
+The jobs are kept in APScheduler's SQLAlchemy job store (table
+``apscheduler_jobs``, ``apscheduler_jobs_<i>`` for supervisor worker i)
+instead of only in the job queue's memory, so their next run time
+survives restarts and crashes:
+
+- a run that fell due while the bot was down runs right after the start,
+  unless it is later than the job's misfire grace time (several missed
+  runs are coalesced into one)
+- every start registers the jobs from the code again, so changed times
+  take effect, but keeps each job's stored next run time; stored jobs the
+  code no longer registers are removed (``prune_stale_jobs()``)
+- every run, failure and missed run is written to the ``job_runs`` table
+
+``DeadlineTimer`` runs a job at the earliest of many deadlines, e.g. every
+corridor's open week, instead of polling for them.
+"""
+
+import asyncio
+import heapq
+import logging
+from contextvars import ContextVar
+from datetime import datetime, time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from apscheduler.events import (
+    EVENT_JOB_ERROR,
+    EVENT_JOB_EXECUTED,
+    EVENT_JOB_MISSED,
+    EVENT_JOB_SUBMITTED,
+)
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+from apscheduler.jobstores.base import JobLookupError
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.date import DateTrigger
+from sqlalchemy import select
+from telegram.ext import Application
+
+from src.config import settings
+from src.database import engine, get_async_db
+from src.models import JobRun
+
+logger = logging.getLogger(__name__)
+
+# Alias of the persistent job store in the job queue's scheduler
+JOBSTORE = "persistent"
+
+_application: Optional[Application] = None
+_store: Optional[SQLAlchemyJobStore] = None
+# Job functions by name; stored jobs refer to them by name only
+_job_functions: Dict[str, Callable[[Application], Awaitable]] = {}
+# job id -> job function name, for the run history
+_job_names: Dict[str, str] = {}
+_registered: Set[str] = set()
+_stored_run_times: Dict[str, datetime] = {}
+# (job id, scheduled run time) -> started at
+_started: Dict[Tuple[str, datetime], datetime] = {}
+# job id -> scheduled time of the run submitted last
+_submitted: Dict[str, datetime] = {}
+_history_tasks: Set[asyncio.Task] = set()
+
+_run_time: ContextVar[Optional[datetime]] = ContextVar("scheduled_run_time", default=None)
+
+
+def _table_name() -> str:
+    if settings.worker_index is None:
+        return "apscheduler_jobs"
+    return f"apscheduler_jobs_{settings.worker_index}"
+
+
+async def run_job(name: str, job_id: Optional[str] = None):
+    """Entry point of every stored job (must stay importable as ``src.scheduler:run_job``)."""
+    _run_time.set(_submitted.pop(job_id, None))
+    await _job_functions[name](_application)
+
+
+def current_run_time() -> Optional[datetime]:
+    """Scheduled time of the job run in progress (naive local time), None outside a job run."""
+    run_time = _run_time.get()
+    return _local(run_time) if run_time else None
+
+
+def _install(app: Application):
+    """Add the persistent job store to the app's scheduler (once)."""
+    global _application, _store
+    if _application is app:
+        return
+
+    scheduler = app.job_queue.scheduler
+    _application = app
+    _store = SQLAlchemyJobStore(engine=engine, tablename=_table_name())
+    _store.jobs_t.create(engine, checkfirst=True)
+    with engine.connect() as conn:
+        rows = conn.execute(select(_store.jobs_t.c.id, _store.jobs_t.c.next_run_time))
+        _stored_run_times.update(
+            (job_id, datetime.fromtimestamp(timestamp, scheduler.timezone))
+            for job_id, timestamp in rows
+            if timestamp is not None
+        )
+
+    scheduler.add_jobstore(_store, JOBSTORE)
+    scheduler.add_listener(
+        _on_job_event, EVENT_JOB_SUBMITTED | EVENT_JOB_EXECUTED | EVENT_JOB_ERROR | EVENT_JOB_MISSED
+    )
+
+
+def schedule_daily(app: Application, job_id: str, function: Callable[[Application], Awaitable],
+                   at: time, days: Optional[Iterable[int]] = None,
+                   misfire_grace_seconds: Optional[int] = None):
+    """Run ``function(app)`` every day (or on ``days``, 0=Monday) at ``at``.
+
+    A run that fell due while the bot was down is caught up on start if it
+    is at most ``misfire_grace_seconds`` late (None: however late it is).
+    Times are in the job queue's timezone (UTC unless Defaults set one).
+    """
+    _install(app)
+    scheduler = app.job_queue.scheduler
+    name = function.__name__
+    _job_functions[name] = function
+    _job_names[job_id] = name
+    _registered.add(job_id)
+
+    trigger = CronTrigger(
+        day_of_week=",".join(str(day) for day in days) if days is not None else None,
+        hour=at.hour,
+        minute=at.minute,
+        timezone=scheduler.timezone,
+    )
+    # Keep a run that is still due from before the restart
+    stored = _stored_run_times.get(job_id)
+    scheduler.add_job(
+        run_job,
+        trigger,
+        args=[name, job_id],
+        id=job_id,
+        name=name,
+        jobstore=JOBSTORE,
+        replace_existing=True,
+        coalesce=True,
+        misfire_grace_time=misfire_grace_seconds,
+        **({"next_run_time": stored} if stored else {}),
+    )
+
+
+def schedule_once(app: Application, job_id: str, function: Callable[[Application], Awaitable],
+                  at: datetime):
+    """Run ``function(app)`` once at ``at`` (naive times are local), replacing job ``job_id``.
+
+    A time in the past runs right away; so does a run that fell due while
+    the bot was down, however late.
+    """
+    _install(app)
+    scheduler = app.job_queue.scheduler
+    name = function.__name__
+    _job_functions[name] = function
+    _job_names[job_id] = name
+    _registered.add(job_id)
+
+    scheduler.add_job(
+        run_job,
+        DateTrigger(run_date=at.astimezone(scheduler.timezone)),
+        args=[name, job_id],
+        id=job_id,
+        name=name,
+        jobstore=JOBSTORE,
+        replace_existing=True,
+        misfire_grace_time=None,
+    )
+
+
+def unschedule(app: Application, job_id: str):
+    """Remove job ``job_id`` if it is scheduled."""
+    _registered.discard(job_id)
+    try:
+        app.job_queue.scheduler.remove_job(job_id, JOBSTORE)
+    except JobLookupError:
+        pass
+
+
+class DeadlineTimer:
+    """One job, ``job_id``, armed at the earliest of many deadlines.
+
+    Deadlines are set per key (e.g. corridor id) and kept in a min-heap, so
+    any number of them costs a single scheduled job. Changing or removing a
+    key's deadline leaves its old heap entry behind; stale entries are
+    skipped when they reach the top. The job is re-armed whenever the
+    earliest deadline changes, but not while ``function`` is running: it
+    calls ``pop_due()`` first and ``rearm()`` when done.
+
+    Nothing is scheduled until ``reset()`` binds the timer to an application,
+    so code that sets deadlines also works outside the bot (scripts).
+
+    The job store is synchronous, so when called on the event loop the job
+    is (re-)armed in a worker thread, one write at a time; a deadline that
+    changes meanwhile is written once the current write is done.
+    """
+
+    def __init__(self, job_id: str, function: Callable[[Application], Awaitable]):
+        self.job_id = job_id
+        self.function = function
+        self._application: Optional[Application] = None
+        self._heap: List[Tuple[datetime, int]] = []
+        self._deadlines: Dict[int, datetime] = {}
+        self._armed_at: Optional[datetime] = None
+        self._running = False
+        self._arming: Optional[asyncio.Task] = None
+
+    def reset(self, app: Application, deadlines: Dict[int, datetime]):
+        """Replace all deadlines (e.g. with the database's) and arm the job in ``app``."""
+        self._application = app
+        self._deadlines = dict(deadlines)
+        self._heap = [(deadline, key) for key, deadline in self._deadlines.items()]
+        heapq.heapify(self._heap)
+        self._arm()
+
+    def set(self, key: int, deadline: datetime):
+        if self._deadlines.get(key) == deadline:
+            return
+        self._deadlines[key] = deadline
+        heapq.heappush(self._heap, (deadline, key))
+        self._arm()
+
+    def discard(self, key: int):
+        if self._deadlines.pop(key, None) is not None:
+            self._arm()
+
+    def next_deadline(self) -> Optional[datetime]:
+        while self._heap and self._deadlines.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: datetime) -> List[int]:
+        """Remove and return the keys whose deadline is at or before ``now``, earliest first."""
+        self._running = True
+        self._armed_at = None  # the job that is running now has fired
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            deadline, key = heapq.heappop(self._heap)
+            if self._deadlines.get(key) == deadline:
+                del self._deadlines[key]
+                due.append(key)
+        return due
+
+    def rearm(self):
+        """Arm the job at the earliest remaining deadline (call when ``function`` is done)."""
+        self._running = False
+        self._arm()
+
+    def _arm(self):
+        if self._application is None or self._running:
+            return
+        deadline = self.next_deadline()
+        if deadline == self._armed_at:
+            return
+        self._armed_at = deadline
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # Startup code and scripts may block
+            self._write(deadline)
+            return
+        if self._arming is None or self._arming.done():
+            self._arming = asyncio.create_task(self._write_in_thread())
+
+    async def _write_in_thread(self):
+        while True:
+            deadline = self._armed_at
+            try:
+                await asyncio.to_thread(self._write, deadline)
+            except Exception:
+                # The next set(), rearm() or resync tries again
+                logger.exception(f"Couldn't arm job {self.job_id} at {deadline}")
+                self._armed_at = None
+                return
+            if self._armed_at == deadline:
+                return
+
+    def _write(self, deadline: Optional[datetime]):
+        if deadline is None:
+            unschedule(self._application, self.job_id)
+        else:
+            schedule_once(self._application, self.job_id, self.function, deadline)
+
+
+def prune_stale_jobs():
+    """Delete stored jobs that the code no longer schedules (call before the job queue starts)."""
+    if _store is None:
+        return
+    with engine.begin() as conn:
+        deleted = conn.execute(_store.jobs_t.delete().where(_store.jobs_t.c.id.not_in(_registered)))
+    if deleted.rowcount:
+        logger.info(f"Removed {deleted.rowcount} stored job(s) that are no longer scheduled")
+
+
+def _local(moment: datetime) -> datetime:
+    # job_runs holds naive local times like the rest of the schema
+    return moment.astimezone().replace(tzinfo=None)
+
+
+def _on_job_event(event):
+    if event.jobstore != JOBSTORE:
+        return
+
+    now = datetime.now().astimezone()
+    if event.code == EVENT_JOB_SUBMITTED:
+        for run_time in event.scheduled_run_times:
+            _started[(event.job_id, run_time)] = now
+        # Submitted runs start after this listener; coalesced runs count as the latest
+        _submitted[event.job_id] = event.scheduled_run_times[-1]
+        return
+
+    started_at = _started.pop((event.job_id, event.scheduled_run_time), None)
+    if event.code == EVENT_JOB_MISSED:
+        status, error, started_at = "missed", None, None
+        logger.warning(f"Job {event.job_id} missed its run at {event.scheduled_run_time}")
+    elif event.code == EVENT_JOB_ERROR:
+        status, error = "failed", repr(event.exception)
+    else:
+        status, error = "ok", None
+
+    run = JobRun(
+        job_id=event.job_id,
+        name=_job_names.get(event.job_id, event.job_id),
+        worker=settings.worker_index,
+        scheduled_at=_local(event.scheduled_run_time),
+        started_at=_local(started_at) if started_at else None,
+        finished_at=_local(now) if started_at else None,
+        status=status,
+        error=error,
+    )
+    task = asyncio.get_running_loop().create_task(_record_run(run))
+    _history_tasks.add(task)
+    task.add_done_callback(_history_tasks.discard)
+
+
+async def _record_run(run: JobRun):
+    try:
+        async with get_async_db() as db:
+            db.add(run)
+    except Exception:
+        logger.exception(f"Couldn't record run of job {run.job_id}")
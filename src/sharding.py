@@ -0,0 +1,116 @@
+"""Which worker process owns which corridor (supervisor mode).
+
+With WORKERS > 1 the bot runs as a supervisor (see src/supervisor.py) that
+receives the updates and forwards each one to one of N worker processes.
+A corridor belongs to the worker its group chat id hashes to on a
+consistent-hash ring, so changing the number of workers only moves about
+1/N of the corridors. The owner handles all of the corridor's updates (its
+in-memory caches stay coherent) and runs its scheduled jobs.
+
+On top of that, ``corridor_job_claim()`` / ``corridor_job_claims()`` claim
+each scheduled run of a job per corridor in the job_claims table, so a run is
+done by one process only, e.g. while workers restart with a different WORKERS
+count and briefly disagree about ownership.
+"""
+
+import bisect
+import hashlib
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Iterable, List, Optional, Set
+
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from src.config import settings
+from src.database import get_async_db
+from src.models import JobClaim
+from src.scheduler import current_run_time
+
+# Points per worker on the ring; more points spread corridors more evenly
+VIRTUAL_NODES = 256
+
+# Claims of runs older than this are deleted
+CLAIM_RETENTION_DAYS = 30
+
+
+def _hash(value: str) -> int:
+    # Stable across processes and restarts, unlike hash()
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent-hash ring over worker indexes 0..workers-1."""
+
+    def __init__(self, workers: int, virtual_nodes: int = VIRTUAL_NODES):
+        self.workers = workers
+        points = sorted(
+            (_hash(f"worker-{worker}-{node}"), worker)
+            for worker in range(workers)
+            for node in range(virtual_nodes)
+        )
+        self._hashes: List[int] = [point for point, _ in points]
+        self._workers: List[int] = [worker for _, worker in points]
+
+    def worker_for(self, key: int) -> int:
+        """Index of the worker owning ``key`` (a chat id)."""
+        if self.workers <= 1:
+            return 0
+        position = bisect.bisect(self._hashes, _hash(str(key))) % len(self._hashes)
+        return self._workers[position]
+
+
+_ring = HashRing(max(settings.workers, 1))
+
+
+def worker_for_chat(chat_id: int) -> int:
+    """Index of the worker that handles updates of ``chat_id``."""
+    return _ring.worker_for(chat_id)
+
+
+def owns_corridor(corridor) -> bool:
+    """Whether this process serves ``corridor`` (always true outside supervisor mode)."""
+    if settings.worker_index is None:
+        return True
+    return worker_for_chat(corridor.chat_id) == settings.worker_index
+
+
+@asynccontextmanager
+async def corridor_job_claims(
+    job: str, corridor_ids: Iterable[int], scheduled_at: Optional[datetime] = None
+) -> AsyncIterator[Set[int]]:
+    """Claim one run of ``job`` for several corridors and yield the ids claimed.
+
+    A claim is a job_claims row keyed by job, corridor and the run's scheduled
+    time (the run in progress, see ``current_run_time()``), so every run is
+    done once: a corridor whose run another process already claimed is left
+    out, whether that process is still at it or finished long ago. The rows
+    are inserted in one query and committed when the block exits; if the
+    block raises they are rolled back and the run can be retried. A process
+    claiming the same run meanwhile waits for that outcome.
+    """
+    scheduled_at = scheduled_at or current_run_time() or datetime.now()
+    rows = [
+        {"job": job, "corridor_id": corridor_id, "scheduled_at": scheduled_at, "worker": settings.worker_index}
+        for corridor_id in sorted(set(corridor_ids))  # same order everywhere, so claimants can't deadlock
+    ]
+    if not rows:
+        yield set()
+        return
+    async with get_async_db() as db:
+        await db.execute(
+            delete(JobClaim).where(JobClaim.scheduled_at < scheduled_at - timedelta(days=CLAIM_RETENTION_DAYS))
+        )
+        claimed = await db.scalars(
+            pg_insert(JobClaim).values(rows).on_conflict_do_nothing().returning(JobClaim.corridor_id)
+        )
+        yield set(claimed)
+
+
+@asynccontextmanager
+async def corridor_job_claim(
+    job: str, corridor_id: int, scheduled_at: Optional[datetime] = None
+) -> AsyncIterator[bool]:
+    """Claim one run of ``job`` for one corridor; yields False if another process claimed it."""
+    async with corridor_job_claims(job, [corridor_id], scheduled_at) as claimed:
+        yield corridor_id in claimed
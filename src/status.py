@@ -0,0 +1,206 @@
+"""Weekly status read model.
+
+Everything the status screens need (per-category progress, the latest
+completions and who hasn't contributed yet) is fetched in a single
+aggregated query, so rendering `/status` costs one round-trip no matter
+how many task instances the week has. The reminder job gets the progress
+of every corridor's open week in one query as well.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import exists, func, literal_column, select
+from sqlalchemy.dialects.postgresql import JSON, aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models import Person, TaskInstance, TaskType, Week
+
+# How many of the latest completions the status view lists
+RECENT_COMPLETIONS_LIMIT = 5
+
+
+@dataclass
+class CategoryProgress:
+    """Completed vs. existing task instances for one category."""
+
+    completed: int = 0
+    instances: int = 0
+
+
+@dataclass
+class WeekStatus:
+    """Aggregated view of a week's progress."""
+
+    categories: Dict[str, CategoryProgress] = field(default_factory=dict)
+    recent_completions: List[Tuple[str, str]] = field(default_factory=list)  # (task, person)
+    non_contributors: List[str] = field(default_factory=list)
+
+    @property
+    def completed_count(self) -> int:
+        return sum(c.completed for c in self.categories.values())
+
+
+@dataclass(frozen=True)
+class OpenWeekProgress:
+    """How far a corridor's open week is (what the reminder needs)."""
+
+    week_id: int
+    deadline: datetime
+    completed_count: int
+    non_contributors: List[str]
+
+
+def _json_list(subquery, *pairs, order_by=None):
+    """Aggregate rows of ``subquery`` into a JSON list of objects (``[]`` when empty)."""
+    obj = func.json_build_object(*[arg for key, col in pairs for arg in (key, col)])
+    if order_by is not None:
+        obj = aggregate_order_by(obj, order_by)
+    return (
+        select(func.coalesce(func.json_agg(obj), literal_column("'[]'::json"), type_=JSON))
+        .select_from(subquery)
+        .scalar_subquery()
+    )
+
+
+def _non_contributors_query(week_id, corridor_id=None):
+    """Active people of the week's corridor without a completed task in it (anti-join).
+    
+    ``week_id`` and ``corridor_id`` may be columns of an enclosing query.
+    """
+    if corridor_id is None:
+        corridor_id = select(Week.corridor_id).where(Week.id == week_id).scalar_subquery()
+    return (
+        select(Person.name)
+        .where(
+            Person.corridor_id == corridor_id,
+            Person.active == True,
+            ~exists().where(
+                TaskInstance.week_id == week_id,
+                TaskInstance.status == "completed",
+                TaskInstance.completed_by == Person.id,
+            ),
+        )
+    )
+
+
+async def get_week_contributions(db: AsyncSession, week_id: int) -> List[Tuple[str, int]]:
+    """Return ``(person name, completed count)`` pairs, biggest contributors first."""
+    completed = func.count(TaskInstance.id)
+    rows = await db.execute(
+        select(Person.name, completed)
+        .select_from(TaskInstance)
+        .join(Person, Person.id == TaskInstance.completed_by)
+        .where(TaskInstance.week_id == week_id, TaskInstance.status == "completed")
+        .group_by(TaskInstance.completed_by, Person.name)
+        .order_by(completed.desc(), Person.name)
+    )
+    return [(name, count) for name, count in rows]
+
+
+async def get_non_contributors(db: AsyncSession, week_id: int) -> List[str]:
+    """Return names of active people who completed nothing in the week."""
+    return list(await db.scalars(_non_contributors_query(week_id).order_by(Person.name)))
+
+
+async def get_open_weeks_progress(db: AsyncSession, corridor_ids: Iterable[int]) -> Dict[int, OpenWeekProgress]:
+    """Progress of the open week of each corridor in ``corridor_ids``, in one query.
+    
+    Corridors without an open week are left out.
+    """
+    open_weeks = (
+        select(Week.id, Week.corridor_id, Week.deadline)
+        .where(Week.corridor_id.in_(list(corridor_ids)), Week.closed == False)
+        .distinct(Week.corridor_id)
+        .order_by(Week.corridor_id, Week.deadline.desc())
+        .subquery()
+    )
+    completed = (
+        select(func.count(TaskInstance.id))
+        .where(TaskInstance.week_id == open_weeks.c.id, TaskInstance.status == "completed")
+        .scalar_subquery()
+    )
+    idle = (
+        _non_contributors_query(open_weeks.c.id, open_weeks.c.corridor_id)
+        .with_only_columns(func.array_agg(aggregate_order_by(Person.name, Person.name)))
+        .scalar_subquery()
+    )
+
+    rows = await db.execute(
+        select(
+            open_weeks.c.corridor_id,
+            open_weeks.c.id,
+            open_weeks.c.deadline,
+            completed.label("completed"),
+            idle.label("idle"),
+        )
+    )
+    return {
+        corridor_id: OpenWeekProgress(week_id, deadline, completed, idle or [])
+        for corridor_id, week_id, deadline, completed, idle in rows
+    }
+
+
+async def get_week_status(db: AsyncSession, week_id: int, recent_limit: int = RECENT_COMPLETIONS_LIMIT) -> WeekStatus:
+    """Load the status of a week in one query."""
+    category = func.coalesce(TaskType.category, "other")
+
+    per_category = (
+        select(
+            category.label("category"),
+            func.count(TaskInstance.id).label("instances"),
+            func.count(TaskInstance.id).filter(TaskInstance.status == "completed").label("completed"),
+        )
+        .select_from(TaskInstance)
+        .join(TaskType, TaskType.id == TaskInstance.task_type_id)
+        .where(TaskInstance.week_id == week_id)
+        .group_by(category)
+        .subquery()
+    )
+
+    recent = (
+        select(
+            TaskType.name.label("task"),
+            Person.name.label("person"),
+            TaskInstance.completed_at,
+        )
+        .select_from(TaskInstance)
+        .join(TaskType, TaskType.id == TaskInstance.task_type_id)
+        .join(Person, Person.id == TaskInstance.completed_by)
+        .where(TaskInstance.week_id == week_id, TaskInstance.status == "completed")
+        .order_by(TaskInstance.completed_at.desc())
+        .limit(recent_limit)
+        .subquery()
+    )
+
+    idle = _non_contributors_query(week_id).subquery()
+
+    row = (
+        await db.execute(
+            select(
+                _json_list(
+                    per_category,
+                    ("category", per_category.c.category),
+                    ("instances", per_category.c.instances),
+                    ("completed", per_category.c.completed),
+                ).label("categories"),
+                _json_list(
+                    recent,
+                    ("task", recent.c.task),
+                    ("person", recent.c.person),
+                    order_by=recent.c.completed_at.desc(),
+                ).label("recent"),
+                _json_list(idle, ("name", idle.c.name), order_by=idle.c.name).label("idle"),
+            )
+        )
+    ).one()
+
+    return WeekStatus(
+        categories={
+            c["category"]: CategoryProgress(completed=c["completed"], instances=c["instances"])
+            for c in row.categories
+        },
+        recent_completions=[(r["task"], r["person"]) for r in row.recent],
+        non_contributors=[p["name"] for p in row.idle],
+    )
@@ -0,0 +1,140 @@
+"""Live, pinned week status message.
+
+With STATUS_BOARD_ENABLED the bot keeps one pinned message per corridor group that
+shows the `/status` view and edits it in place after completions and
+amends, instead of posting a new message for each of them. Edits are
+debounced to at most one per DEBOUNCE_SECONDS, and skipped when nothing
+changed. A new board is posted (and pinned) when the week rolls over.
+
+The board's message id is kept in `app_settings` so it survives restarts.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from telegram import Bot
+from telegram.constants import ParseMode
+from telegram.error import BadRequest, TelegramError
+from telegram.ext import Application
+
+from src.config import settings
+from src.corridors import get_corridor_for_chat
+from src.database import get_async_db
+from src.handlers.info_handlers import render_week_status
+from src.models import AppSetting
+from src.status import get_week_status
+from src.week_cache import get_current_week
+
+logger = logging.getLogger(__name__)
+
+# Minimum time between two edits of the board
+DEBOUNCE_SECONDS = 5.0
+
+
+class StatusBoard:
+    """The pinned status message of one group chat."""
+
+    def __init__(self, bot: Bot, chat_id: int):
+        self.bot = bot
+        self.chat_id = int(chat_id)
+        self._dirty = False
+        self._task: Optional[asyncio.Task] = None
+        self._last_update = 0.0
+        self._last_text: Optional[str] = None
+
+    @property
+    def setting_key(self) -> str:
+        return f"status_board:{self.chat_id}"
+
+    def refresh(self):
+        """Schedule an update; calls within the debounce window are merged."""
+        self._dirty = True
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name=f"status-board-{self.chat_id}")
+
+    async def _run(self):
+        while self._dirty:
+            delay = self._last_update + DEBOUNCE_SECONDS - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            # Anything requested from here on needs another pass
+            self._dirty = False
+            try:
+                await self.update()
+            except Exception:
+                logger.exception(f"Failed to update status board in {self.chat_id}")
+            self._last_update = time.monotonic()
+
+    async def update(self):
+        """Edit the board, or post and pin a new one for a new week."""
+        async with get_async_db() as db:
+            corridor = await get_corridor_for_chat(db, self.chat_id)
+            if not corridor:
+                return
+            current_week = await get_current_week(db, corridor.id)
+            if not current_week:
+                return
+            status = await get_week_status(db, current_week.id)
+            week_id, message_id = await self._load(db)
+
+        text = render_week_status(corridor, current_week, status)
+
+        if week_id == current_week.id and message_id:
+            if text == self._last_text:
+                return
+            try:
+                await self.bot.edit_message_text(
+                    chat_id=self.chat_id, message_id=message_id, text=text, parse_mode=ParseMode.MARKDOWN
+                )
+                self._last_text = text
+                return
+            except BadRequest as e:
+                if "not modified" in str(e).lower():
+                    self._last_text = text
+                    return
+                # Deleted or too old to edit: post a new board below
+                logger.warning(f"Status board {message_id} in {self.chat_id} can't be edited: {e}")
+
+        message = await self.bot.send_message(
+            chat_id=self.chat_id, text=text, parse_mode=ParseMode.MARKDOWN, disable_notification=True
+        )
+        self._last_text = text
+        try:
+            await self.bot.pin_chat_message(
+                chat_id=self.chat_id, message_id=message.message_id, disable_notification=True
+            )
+        except TelegramError as e:
+            logger.warning(f"Couldn't pin the status board in {self.chat_id} (is the bot an admin?): {e}")
+
+        async with get_async_db() as db:
+            value = f"{current_week.id}:{message.message_id}"
+            await db.execute(
+                pg_insert(AppSetting)
+                .values(key=self.setting_key, value=value)
+                .on_conflict_do_update(
+                    index_elements=[AppSetting.key], set_={"value": value, "updated_at": func.now()}
+                )
+            )
+
+    async def _load(self, db) -> Tuple[Optional[int], Optional[int]]:
+        """Return the (week id, message id) of the current board, if any."""
+        value = await db.scalar(select(AppSetting.value).filter_by(key=self.setting_key))
+        if not value:
+            return None, None
+        week_id, message_id = value.split(":")
+        return int(week_id), int(message_id)
+
+
+def refresh_status_board(app: Application, chat_id):
+    """Schedule a status board update for ``chat_id`` (no-op unless enabled)."""
+    if not settings.status_board_enabled or not chat_id:
+        return
+    boards = app.bot_data.setdefault("status_boards", {})
+    board = boards.get(int(chat_id))
+    if board is None:
+        board = boards[int(chat_id)] = StatusBoard(app.bot, chat_id)
+    board.refresh()
@@ -0,0 +1,306 @@
+"""Supervisor mode: spread corridors over several worker processes.
+
+One asyncio process handles every corridor's updates and jobs on a single
+core. With WORKERS=N (N > 1) ``python src/bot.py`` starts a supervisor
+instead, which
+
+- starts N workers (``src/bot.py`` with WORKER_INDEX set), each serving
+  updates on 127.0.0.1:<WORKER_PORT_BASE + index> and restarted if it dies
+- receives the updates itself (long polling or webhook, per BOT_MODE) and
+  forwards each one to the worker owning its corridor (src/sharding.py):
+  group updates by chat id, private ones by the corridor the resident
+  registered in. Polled updates go through a queue per worker, are taken
+  by the worker as soon as they are in its update queue, and are only
+  confirmed to Telegram once every worker took its share; a worker that
+  can't take them (e.g. while it restarts) gets them again
+- doesn't process updates or run jobs itself; each worker runs the jobs of
+  the corridors it owns
+
+Per-process outputs get the worker index appended (METRICS_PORT + 1 + index,
+RECORD_UPDATES_PATH.<index>, QUERY_PROFILE_REPORT.<index>).
+"""
+
+import asyncio
+import logging
+import os
+import signal
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import aiohttp
+from aiohttp import web
+from telegram import Bot, Chat
+from telegram.error import TelegramError
+from telegram.ext import Application
+
+from src.config import settings
+from src.corridors import get_corridor_for_resident
+from src.database import get_async_db
+from src.sharding import worker_for_chat
+from src.webhook import ALLOWED_UPDATES, SECRET_TOKEN_HEADER, serve_updates
+
+logger = logging.getLogger(__name__)
+
+# ========== CONFIGURATION ==========
+
+# Paths workers receive forwarded updates on: answered once processed / once queued
+WORKER_PATH = "/update"
+WORKER_QUEUE_PATH = "/queue"
+
+# Polled updates waiting to be handed to each worker (getUpdates returns at most 100)
+HAND_OFF_QUEUE_SIZE = 100
+
+# Wait before handing an update again to a worker that didn't take it
+HAND_OFF_RETRY_SECONDS = 1.0
+
+# Long-polling timeout of getUpdates (seconds)
+POLL_TIMEOUT = 30
+
+# How often dead workers are looked for, and how long they get to start
+WATCH_INTERVAL_SECONDS = 1.0
+WORKER_START_TIMEOUT_SECONDS = 30.0
+
+# ====================================
+
+BOT_SCRIPT = Path(__file__).parent / "bot.py"
+
+
+def worker_port(index: int) -> int:
+    return settings.worker_port_base + index
+
+
+async def run_worker(application: Application, index: int):
+    """Serve the updates the supervisor forwards to worker ``index`` until stopped.
+
+    SIGTERM (sent by the supervisor when it stops) shuts down cleanly, so
+    queued notifications are still delivered.
+    """
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    try:
+        await serve_updates(
+            application, "127.0.0.1", worker_port(index), WORKER_PATH, queue_path=WORKER_QUEUE_PATH
+        )
+    except asyncio.CancelledError:
+        pass
+
+
+def _update_chat_and_user(data: dict) -> Tuple[Optional[dict], Optional[int]]:
+    """Chat and sender id of a raw update (commands and button taps)."""
+    if "callback_query" in data:
+        query = data["callback_query"]
+        return (query.get("message") or {}).get("chat"), query["from"]["id"]
+    message = data.get("message") or data.get("edited_message") or {}
+    return message.get("chat"), (message.get("from") or {}).get("id")
+
+
+class Supervisor:
+    """Starts the workers and forwards every update to the one owning its corridor."""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.processes: Dict[int, subprocess.Popen] = {}
+        base_url = {"base_url": settings.telegram_api_base_url} if settings.telegram_api_base_url else {}
+        self.bot = Bot(settings.telegram_bot_token, **base_url)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    # ----- workers -----
+
+    def _worker_env(self, index: int) -> Dict[str, str]:
+        env = {**os.environ, "WORKER_INDEX": str(index)}
+        env["METRICS_PORT"] = str(settings.metrics_port + 1 + index)
+        if settings.record_updates_path:
+            env["RECORD_UPDATES_PATH"] = f"{settings.record_updates_path}.{index}"
+        if settings.query_profile_report:
+            env["QUERY_PROFILE_REPORT"] = f"{settings.query_profile_report}.{index}"
+        return env
+
+    def _spawn(self, index: int):
+        self.processes[index] = subprocess.Popen(
+            [sys.executable, str(BOT_SCRIPT)], env=self._worker_env(index)
+        )
+        logger.info(f"Started worker {index} (pid {self.processes[index].pid}) on port {worker_port(index)}")
+
+    async def _wait_until_listening(self, index: int):
+        deadline = asyncio.get_running_loop().time() + WORKER_START_TIMEOUT_SECONDS
+        while True:
+            try:
+                _, writer = await asyncio.open_connection("127.0.0.1", worker_port(index))
+                writer.close()
+                return
+            except OSError:
+                if self.processes[index].poll() is not None:
+                    raise RuntimeError(f"Worker {index} exited with code {self.processes[index].returncode}")
+                if asyncio.get_running_loop().time() > deadline:
+                    raise RuntimeError(f"Worker {index} didn't start listening")
+                await asyncio.sleep(0.2)
+
+    async def _watch_workers(self):
+        """Restart workers that died."""
+        while True:
+            await asyncio.sleep(WATCH_INTERVAL_SECONDS)
+            for index, process in list(self.processes.items()):
+                if process.poll() is not None:
+                    logger.warning(f"Worker {index} exited with code {process.returncode}, restarting it")
+                    self._spawn(index)
+
+    def _stop_workers(self):
+        for process in self.processes.values():
+            if process.poll() is None:
+                process.terminate()
+        for index, process in self.processes.items():
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                logger.warning(f"Worker {index} didn't stop, killing it")
+                process.kill()
+
+    # ----- routing -----
+
+    async def route(self, data: dict) -> int:
+        """Index of the worker that handles the raw update ``data``."""
+        chat, user_id = _update_chat_and_user(data)
+        if chat is None:
+            return worker_for_chat(user_id or 0)
+        if chat["type"] == Chat.PRIVATE and user_id:
+            async with get_async_db() as db:
+                corridor = await get_corridor_for_resident(db, user_id)
+            if corridor:
+                return worker_for_chat(corridor.chat_id)
+        return worker_for_chat(chat["id"])
+
+    async def forward(self, data: dict) -> int:
+        """Hand ``data`` to its worker once processed; returns the worker's HTTP status (502 if unreachable)."""
+        return await self._post(await self.route(data), WORKER_PATH, data)
+
+    async def _post(self, index: int, path: str, data: dict) -> int:
+        url = f"http://127.0.0.1:{worker_port(index)}{path}"
+        try:
+            async with self._session.post(url, json=data) as response:
+                return response.status
+        except aiohttp.ClientError as e:
+            logger.warning(f"Couldn't forward update {data.get('update_id')} to worker {index}: {e}")
+            return 502
+
+    async def _hand_off(self, index: int, queue: asyncio.Queue):
+        """Queue the updates of worker ``index`` in its update queue, in order, retrying until it takes each."""
+        while True:
+            data, handed_off = await queue.get()
+            while (status := await self._post(index, WORKER_QUEUE_PATH, data)) >= 500:
+                await asyncio.sleep(HAND_OFF_RETRY_SECONDS)
+            if status != 200:
+                # Retrying wouldn't help: the worker can't read it
+                logger.warning(f"Worker {index} rejected update {data.get('update_id')} ({status})")
+            handed_off.set_result(None)
+
+    # ----- receiving updates -----
+
+    async def _poll(self):
+        """Long-poll getUpdates and hand each batch to the workers.
+
+        The next getUpdates confirms the batch to Telegram, so it is only
+        sent once every worker took its updates; until then Telegram keeps
+        them. Workers take updates without waiting for them to be processed,
+        so a slow handler doesn't hold up polling.
+        """
+        await self.bot.delete_webhook()
+        queues = {index: asyncio.Queue(HAND_OFF_QUEUE_SIZE) for index in range(self.workers)}
+        senders = [asyncio.create_task(self._hand_off(index, queue)) for index, queue in queues.items()]
+        offset = None
+        try:
+            while True:
+                try:
+                    updates = await self.bot.get_updates(
+                        offset=offset, timeout=POLL_TIMEOUT, allowed_updates=ALLOWED_UPDATES,
+                        read_timeout=POLL_TIMEOUT + 10,
+                    )
+                except TelegramError as e:
+                    logger.warning(f"getUpdates failed: {e}")
+                    await asyncio.sleep(1)
+                    continue
+                if not updates:
+                    continue
+
+                handed_off = []
+                for update in updates:
+                    data = update.to_dict()
+                    handed_off.append(asyncio.get_running_loop().create_future())
+                    await queues[await self.route(data)].put((data, handed_off[-1]))
+                await asyncio.gather(*handed_off)
+                offset = updates[-1].update_id + 1
+        finally:
+            for sender in senders:
+                sender.cancel()
+
+    async def _serve_webhook(self):
+        """Receive updates from Telegram's webhook and forward them."""
+        if not settings.webhook_url:
+            raise ValueError("WEBHOOK_URL must be set when BOT_MODE=webhook")
+
+        async def receive_update(request: web.Request) -> web.Response:
+            if settings.webhook_secret_token and (
+                request.headers.get(SECRET_TOKEN_HEADER) != settings.webhook_secret_token
+            ):
+                return web.Response(status=403)
+            try:
+                data = await request.json()
+            except ValueError:
+                return web.Response(status=400)
+            # Answered once the worker processed it, like the single-process webhook
+            return web.Response(status=await self.forward(data))
+
+        web_app = web.Application()
+        web_app.router.add_post(settings.webhook_path, receive_update)
+        runner = web.AppRunner(web_app)
+        await runner.setup()
+        await web.TCPSite(runner, settings.webhook_listen, settings.webhook_port).start()
+        await self.bot.set_webhook(
+            url=settings.webhook_url.rstrip("/") + settings.webhook_path,
+            allowed_updates=ALLOWED_UPDATES,
+            secret_token=settings.webhook_secret_token,
+        )
+        logger.info(
+            f"Webhook listening on {settings.webhook_listen}:{settings.webhook_port}{settings.webhook_path}"
+        )
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await runner.cleanup()
+
+    async def run(self):
+        """Start the workers and forward updates until cancelled."""
+        for index in range(self.workers):
+            self._spawn(index)
+        try:
+            await asyncio.gather(*(self._wait_until_listening(index) for index in range(self.workers)))
+            logger.info(f"Supervising {self.workers} workers ({settings.bot_mode})")
+
+            async with self.bot, aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=0), timeout=aiohttp.ClientTimeout(total=None)
+            ) as self._session:
+                watcher = asyncio.create_task(self._watch_workers())
+                try:
+                    if settings.bot_mode == "webhook":
+                        await self._serve_webhook()
+                    else:
+                        await self._poll()
+                finally:
+                    watcher.cancel()
+        finally:
+            self._stop_workers()
+
+
+def run_supervisor():
+    """Run the supervisor until interrupted (SIGINT/SIGTERM stop the workers too)."""
+    async def main():
+        task = asyncio.current_task()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, task.cancel)
+        try:
+            await Supervisor(settings.workers).run()
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(main())
@@ -0,0 +1,117 @@
+"""Webhook runner: receive updates over HTTP instead of long polling.
+
+A small aiohttp server accepts the updates Telegram POSTs to
+``settings.webhook_path`` and hands them to the application. The bot only
+subscribes to the update types it has handlers for (ALLOWED_UPDATES), so
+Telegram doesn't deliver anything else.
+"""
+
+import asyncio
+import logging
+from typing import Optional, Union
+
+from aiohttp import web
+from telegram import Update
+from telegram.ext import Application
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Update types the bot has handlers for (commands and inline buttons)
+ALLOWED_UPDATES = [Update.MESSAGE, Update.CALLBACK_QUERY]
+
+SECRET_TOKEN_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def create_webhook_app(application: Application, path: str, secret_token: Optional[str] = None,
+                       queue_path: Optional[str] = None) -> web.Application:
+    """Build the aiohttp app that feeds POSTed updates into ``application``.
+
+    Each request to ``path`` is answered once its update has been processed,
+    so Telegram's max_connections limit also bounds how much work runs at
+    once. Requests to ``queue_path`` are answered as soon as the update is
+    in the application's update queue, which processes it like a polled one.
+    """
+    async def read_update(request: web.Request) -> Union[Update, web.Response]:
+        if secret_token and request.headers.get(SECRET_TOKEN_HEADER) != secret_token:
+            return web.Response(status=403)
+
+        try:
+            return Update.de_json(await request.json(), application.bot)
+        except ValueError:
+            return web.Response(status=400)
+
+    async def receive_update(request: web.Request) -> web.Response:
+        update = await read_update(request)
+        if isinstance(update, web.Response):
+            return update
+        await application.process_update(update)
+        return web.Response()
+
+    async def queue_update(request: web.Request) -> web.Response:
+        update = await read_update(request)
+        if isinstance(update, web.Response):
+            return update
+        await application.update_queue.put(update)
+        return web.Response()
+
+    web_app = web.Application()
+    web_app.router.add_post(path, receive_update)
+    if queue_path:
+        web_app.router.add_post(queue_path, queue_update)
+    return web_app
+
+
+async def run_webhook(application: Application):
+    """Register the webhook with Telegram and serve updates until cancelled."""
+    if not settings.webhook_url:
+        raise ValueError("WEBHOOK_URL must be set when BOT_MODE=webhook")
+
+    await serve_updates(
+        application,
+        settings.webhook_listen,
+        settings.webhook_port,
+        settings.webhook_path,
+        secret_token=settings.webhook_secret_token,
+        webhook_url=settings.webhook_url.rstrip("/") + settings.webhook_path,
+    )
+
+
+async def serve_updates(application: Application, listen: str, port: int, path: str,
+                        secret_token: Optional[str] = None, webhook_url: Optional[str] = None,
+                        queue_path: Optional[str] = None):
+    """Run ``application`` and feed it the updates POSTed to ``path`` until cancelled.
+
+    With ``webhook_url`` the webhook is registered with Telegram first;
+    supervisor workers (src/supervisor.py) get their updates from the
+    supervisor instead and leave it out, and also take them at ``queue_path``
+    (see ``create_webhook_app()``).
+    """
+    web_app = create_webhook_app(application, path, secret_token, queue_path)
+    runner = web.AppRunner(web_app)
+
+    async with application:
+        # Application.initialize() doesn't run post_init/post_stop; run_polling() would
+        if application.post_init:
+            await application.post_init(application)
+
+        if webhook_url:
+            await application.bot.set_webhook(
+                url=webhook_url,
+                allowed_updates=ALLOWED_UPDATES,
+                secret_token=secret_token,
+            )
+        await application.start()
+
+        await runner.setup()
+        await web.TCPSite(runner, listen, port).start()
+        logger.info(f"Listening for updates on {listen}:{port}{path}")
+
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await runner.cleanup()
+            await application.stop()
+            if application.post_stop:
+                await application.post_stop(application)
@@ -0,0 +1,97 @@
+"""In-process cache of each corridor's current (open) week.
+
+Almost every button tap needs the active week, which only changes on
+rollover. The week manager invalidates the cache whenever it closes or
+creates a week; the TTL is a safety net for changes made outside the bot
+(e.g. `scripts/populate_db.py` or manual SQL).
+
+It also keeps a week-state version per corridor: a counter bumped whenever
+task statuses change (completion, amend, rollover, cache reload) so derived
+caches such as the prebuilt menus know when to rebuild. Bumping without a
+corridor (e.g. after a catalogue reload) changes every corridor's version.
+"""
+
+import time
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models import Week
+
+# How long a cached week is trusted without hitting the database
+CACHE_TTL_SECONDS = 300
+
+
+@dataclass(frozen=True)
+class CurrentWeek:
+    """Immutable snapshot of the open week."""
+
+    id: int
+    corridor_id: int
+    year: int
+    week_number: int
+    start_date: date
+    deadline: datetime
+
+
+# corridor id -> (open week, loaded at)
+_current_weeks: Dict[int, Tuple[CurrentWeek, float]] = {}
+_global_version = 0
+_corridor_versions: Dict[int, int] = {}
+
+
+async def get_current_week(db: AsyncSession, corridor_id: int) -> Optional[CurrentWeek]:
+    """Return the corridor's open week, loading it from the database when the cache is stale."""
+    cached = _current_weeks.get(corridor_id)
+    if cached and time.monotonic() - cached[1] < CACHE_TTL_SECONDS:
+        return cached[0]
+
+    week = await db.scalar(
+        select(Week)
+        .filter_by(corridor_id=corridor_id, closed=False)
+        .order_by(Week.deadline.desc())
+        .limit(1)
+    )
+    if not week:
+        # Don't cache "no week": the next rollover check may create one any moment
+        _current_weeks.pop(corridor_id, None)
+        return None
+
+    current_week = CurrentWeek(
+        id=week.id,
+        corridor_id=corridor_id,
+        year=week.year,
+        week_number=week.week_number,
+        start_date=week.start_date,
+        deadline=week.deadline,
+    )
+    _current_weeks[corridor_id] = (current_week, time.monotonic())
+    # Whatever changed outside the bot since the last load is picked up now
+    bump_week_state_version(corridor_id)
+    return current_week
+
+
+def invalidate_current_week(corridor_id: Optional[int] = None):
+    """Forget the corridor's cached week, or all of them (call after closing or creating a week)."""
+    if corridor_id is None:
+        _current_weeks.clear()
+    else:
+        _current_weeks.pop(corridor_id, None)
+    bump_week_state_version(corridor_id)
+
+
+def get_week_state_version(corridor_id: int) -> Tuple[int, int]:
+    """Return the corridor's current week-state version."""
+    return _global_version, _corridor_versions.get(corridor_id, 0)
+
+
+def bump_week_state_version(corridor_id: Optional[int] = None):
+    """Mark the corridor's week state as changed, or every corridor's (call after completing or amending a task)."""
+    global _global_version
+    if corridor_id is None:
+        _global_version += 1
+    else:
+        _corridor_versions[corridor_id] = _corridor_versions.get(corridor_id, 0) + 1
@@ -1,24 +1,40 @@
 """Automatic week rollover and summary messages.
 
-This module handles:
+This module handles, for every corridor:
 - Checking if the current week has ended
-- Sending a summary message to the group
+- Sending a summary message to the corridor's group
 - Creating a new week automatically
+
+Rollover is driven by the deadlines: one job is armed at the earliest open
+week's deadline across the corridors this process owns (a DeadlineTimer) and
+re-armed whenever a week is created or closed.
 """
 
-from datetime import datetime, timedelta
+import logging
+from datetime import date, datetime, time, timedelta
+from typing import Optional, Tuple
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from telegram.ext import Application
-from telegram.constants import ParseMode
 
-from src.database import get_db
-from src.models import Person, TaskInstance, Week, TaskType
-from src.menus import CATEGORY_AMOUNTS
+from src.corridors import CorridorInfo, get_corridors
+from src.database import get_async_db
+from src.models import Week, insert_week_statement, insert_week_tasks_statement
+from src.metrics import timed, track_handler, track_job
+from src.outbox import get_outbox
+from src.scheduler import DeadlineTimer
+from src.sharding import corridor_job_claim, owns_corridor
+from src.status_board import refresh_status_board
+from src.status import get_non_contributors, get_week_contributions
+from src.week_cache import CurrentWeek, get_current_week, invalidate_current_week
 
 # ========== CONFIGURATION ==========
 
-# What time to check for week rollover? (24-hour format)
-# This job runs daily at this time
-ROLLOVER_CHECK_TIME = (23, 59)  # 11:59 PM
+# How often the open weeks' deadlines are re-read from the database, for
+# weeks created or changed outside the bot (add_corridor.py, manual SQL).
+# Rollover itself runs at each deadline, not on this interval.
+DEADLINE_RESYNC_MINUTES = 15
 
 # Should we auto-create a new week?
 AUTO_CREATE_NEW_WEEK = True
@@ -32,9 +48,87 @@ NEW_WEEK_DEADLINE_TIME = (23, 58)  # 11:59 PM
 
 # ====================================
 
+logger = logging.getLogger(__name__)
+
+
+@timed(track_job, "check_and_rollover_week")
+async def check_and_rollover_weeks(app: Application):
+    """Run the rollover check of every corridor (one failing doesn't stop the others).
+    
+    In supervisor mode each worker only checks the corridors it owns, and
+    the run's claim keeps two processes from rolling over the same corridor.
+    """
+    async with get_async_db() as db:
+        corridors = await get_corridors(db)
+    
+    for corridor in filter(owns_corridor, corridors):
+        try:
+            async with corridor_job_claim("check_and_rollover_week", corridor.id) as claimed:
+                if claimed:
+                    await check_and_rollover_week(app, corridor)
+        except Exception:
+            logger.exception(f"Week rollover check failed for corridor {corridor.name}")
+
+
+@timed(track_job, "rollover_due_weeks")
+async def rollover_due_weeks(app: Application):
+    """Roll over the corridors whose week deadline has passed (run by the deadline timer)."""
+    due = _deadlines.pop_due(datetime.now())
+    try:
+        async with get_async_db() as db:
+            corridors = {corridor.id: corridor for corridor in await get_corridors(db)}
+        
+        for corridor_id in due:
+            corridor = corridors.get(corridor_id)
+            if corridor is None:
+                # Deactivated since its deadline was set
+                continue
+            try:
+                async with corridor_job_claim("check_and_rollover_week", corridor.id) as claimed:
+                    if claimed:
+                        # Act on the database's week, not a cached one
+                        invalidate_current_week(corridor.id)
+                        await check_and_rollover_week(app, corridor)
+                # A week whose deadline was moved by hand is still open: wait for its new deadline
+                async with get_async_db() as db:
+                    current_week = await get_current_week(db, corridor.id)
+                if current_week and current_week.deadline > datetime.now():
+                    _deadlines.set(corridor.id, current_week.deadline)
+            except Exception:
+                # Retried at the next resync
+                logger.exception(f"Week rollover failed for corridor {corridor.name}")
+    finally:
+        _deadlines.rearm()
+
+
+# Open week deadline of every corridor this process owns
+_deadlines = DeadlineTimer("week_rollover_deadline", rollover_due_weeks)
+
+
+async def sync_rollover_deadlines(app: Application):
+    """Arm the deadline timer with the open weeks of the corridors this process owns.
+    
+    Runs when the bot starts and every DEADLINE_RESYNC_MINUTES. A corridor
+    without an open week is due right away, so it gets one.
+    """
+    async with get_async_db() as db:
+        corridors = [corridor for corridor in await get_corridors(db) if owns_corridor(corridor)]
+        rows = await db.execute(
+            select(Week.corridor_id, func.max(Week.deadline))
+            .where(Week.corridor_id.in_([corridor.id for corridor in corridors]), Week.closed == False)
+            .group_by(Week.corridor_id)
+        )
+        deadlines = dict(rows.all())
+    
+    if AUTO_CREATE_NEW_WEEK:
+        now = datetime.now()
+        for corridor in corridors:
+            deadlines.setdefault(corridor.id, now)
+    _deadlines.reset(app, deadlines)
+
 
-async def check_and_rollover_week(app: Application, group_chat_id: int):
-    """Check if week has ended and perform rollover if needed.
+async def check_and_rollover_week(app: Application, corridor: CorridorInfo):
+    """Check if the corridor's week has ended and perform rollover if needed.
     
     This function:
     1. Checks if current week deadline has passed
@@ -42,14 +136,17 @@ async def check_and_rollover_week(app: Application, group_chat_id: int):
     3. Closes current week
     4. Creates new week (if enabled)
     """
-    with get_db() as db:
+    async with get_async_db() as db:
         # Get current active week
-        current_week = db.query(Week).filter_by(closed=False).order_by(Week.deadline.desc()).first()
+        current_week = await get_current_week(db, corridor.id)
         
         if not current_week:
-            # No active week - create one
+            # No active week - create the one after the last closed week
             if AUTO_CREATE_NEW_WEEK:
-                await create_new_week(db, app, group_chat_id)
+                previous_deadline = await db.scalar(
+                    select(func.max(Week.deadline)).where(Week.corridor_id == corridor.id)
+                )
+                await create_new_week(db, app, corridor, previous_deadline)
             return
             
         # Check if deadline has passed
@@ -59,40 +156,41 @@ async def check_and_rollover_week(app: Application, group_chat_id: int):
             return
         
         # Week has ended - perform rollover
-        await perform_week_rollover(db, current_week, app, group_chat_id)
+        await perform_week_rollover(db, corridor, current_week, app)
 
 
-async def perform_week_rollover(db, current_week: Week, app: Application, group_chat_id: int):
+async def perform_week_rollover(db: AsyncSession, corridor: CorridorInfo, current_week: CurrentWeek,
+                                app: Application):
     """Perform the week rollover process.
     
     1. Generate summary
-    2. Send message to group
-    3. Close current week
-    4. Create new week
+    2. Close current week and create the next one
+    3. Send messages to group
+    
+    Closing and creating are one transaction: if the next week can't be
+    created, the current one stays open and nothing is sent.
     """
     # Generate summary message
-    summary = generate_week_summary(db, current_week)
+    summary = await generate_week_summary(db, current_week, corridor)
     
-    # Send to group
-    try:
-        await app.bot.send_message(
-            chat_id=group_chat_id,
-            text=summary,
-            parse_mode=ParseMode.MARKDOWN
-        )
-    except Exception as e:
-        print(f"Failed to send week summary: {e}")
-    
-    # Close current week
-    current_week.closed = True
-    db.commit()
-    
-    # Create new week
+    # Close current week and create its successor (committing releases the
+    # connection before we talk to Telegram)
+    await db.execute(update(Week).where(Week.id == current_week.id).values(closed=True))
+    new_week = None
     if AUTO_CREATE_NEW_WEEK:
-        await create_new_week(db, app, group_chat_id)
+        new_week = await insert_new_week(db, corridor, current_week.deadline)
+    await db.commit()
+    invalidate_current_week(corridor.id)
+    _deadlines.discard(corridor.id)
+    
+    # Send to group
+    get_outbox(app).send(corridor.chat_id, summary)
+    if new_week:
+        announce_new_week(app, corridor, *new_week)
 
 
-def generate_week_summary(db, week: Week) -> str:
+@timed(track_handler, "generate_week_summary")
+async def generate_week_summary(db: AsyncSession, week: CurrentWeek, corridor: CorridorInfo) -> str:
     """Generate a summary message for the completed week.
     
     Returns a message with:
@@ -100,36 +198,15 @@ def generate_week_summary(db, week: Week) -> str:
     - Contributors (sorted by contribution)
     - Non-contributors with gentle reminder
     """
-    # Get all task instances for the week
-    all_instances = db.query(TaskInstance).filter_by(week_id=week.id).all()
-    completed_tasks = [t for t in all_instances if t.status == "completed"]
+    # Aggregated per-person counts and the anti-joined non-contributors
+    sorted_contributors = await get_week_contributions(db, week.id)
+    non_contributors = await get_non_contributors(db, week.id)
     
     # Calculate total tasks
-    total = sum([CATEGORY_AMOUNTS.get(cat, 1) for cat in CATEGORY_AMOUNTS.keys()])
-    completed_count = len(completed_tasks)
+    total = corridor.weekly_total
+    completed_count = sum(count for _, count in sorted_contributors)
     remaining = total - completed_count
     
-    # Get all active people
-    active_people = db.query(Person).filter_by(active=True).all()
-    
-    # Calculate contributions per person
-    contributions = {}
-    for task in completed_tasks:
-        if task.completed_by:
-            person = db.query(Person).get(task.completed_by)
-            if person:
-                if person.name not in contributions:
-                    contributions[person.name] = 0
-                contributions[person.name] += 1
-    
-    # Sort by contribution (descending)
-    sorted_contributors = sorted(contributions.items(), key=lambda x: x[1], reverse=True)
-    
-    # Find non-contributors
-    contributor_names = set(contributions.keys())
-    all_names = {p.name for p in active_people}
-    non_contributors = sorted(all_names - contributor_names)
-    
     # Build message
     message = f"📅 *Week {week.week_number}/{week.year} Summary*\n\n"
     
@@ -174,60 +251,77 @@ def generate_week_summary(db, week: Week) -> str:
     return message
 
 
-async def create_new_week(db, app: Application, group_chat_id: int):
-    """Create a new week with task instances.
+def new_week_dates(previous_deadline: Optional[datetime], now: datetime) -> Tuple[int, int, date, datetime]:
+    """ISO year, week number, start date and deadline of the week after ``previous_deadline``.
     
-    This creates:
-    1. New Week entry
-    2. TaskInstances for all active TaskTypes
-    3. Announcement message to group
+    The week starts the day after the previous deadline, so it is that
+    week's ISO successor however late the rollover runs. It starts today
+    instead if there is no previous week, or if the successor is over
+    already (the bot was down for more than a week).
     """
-    # Calculate week number and deadline
-    now = datetime.now()
-    year = now.year
-    week_number = now.isocalendar()[1]
-    
-    # Calculate next deadline
-    # Find the next occurrence of DEADLINE_DAY
-    days_until_deadline = (NEW_WEEK_DEADLINE_DAY - now.weekday()) % 7
-    if days_until_deadline == 0:
-        # If today is the deadline day, set it for next week
-        days_until_deadline = 7
-    
-    deadline = now + timedelta(days=days_until_deadline)
-    deadline = deadline.replace(
-        hour=NEW_WEEK_DEADLINE_TIME[0],
-        minute=NEW_WEEK_DEADLINE_TIME[1],
-        second=59
+    start_date = previous_deadline.date() + timedelta(days=1) if previous_deadline else now.date()
+    deadline = _deadline_after(start_date)
+    if deadline < now:
+        start_date = now.date()
+        deadline = _deadline_after(start_date)
+    
+    year, week_number, _ = start_date.isocalendar()
+    return year, week_number, start_date, deadline
+
+
+def _deadline_after(start_date: date) -> datetime:
+    # Next NEW_WEEK_DEADLINE_DAY; a week later if the week starts on that day
+    days_until_deadline = (NEW_WEEK_DEADLINE_DAY - start_date.weekday()) % 7 or 7
+    return datetime.combine(
+        start_date + timedelta(days=days_until_deadline),
+        time(NEW_WEEK_DEADLINE_TIME[0], NEW_WEEK_DEADLINE_TIME[1], 59),
     )
 
-    start_date = now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+async def insert_new_week(db: AsyncSession, corridor: CorridorInfo,
+                          previous_deadline: Optional[datetime]) -> Tuple[int, int, datetime]:
+    """Insert the corridor's week after ``previous_deadline`` with its task instances (not committed).
     
-    # Create week
-    new_week = Week(
-        week_number=week_number,
-        year=year,
-        start_date=start_date,
-        deadline=deadline,
-        closed=False
-    )
-    db.add(new_week)
-    db.flush()  # Get the ID
-    
-    # Create task instances for all task types
-    task_types = db.query(TaskType).all()
-    for task_type in task_types:
-        task_instance = TaskInstance(
-            task_type_id=task_type.id,
-            week_id=new_week.id,
-            status="pending"
-        )
-        db.add(task_instance)
+    One pending TaskInstance per TaskType of the corridor (task types
+    have no active flag), in a single INSERT ... SELECT. Returns the
+    week's year, number and deadline.
+    
+    Raises:
+        RuntimeError: The week already exists, e.g. its predecessor was
+            rolled over twice or a week was added by hand.
+    """
+    year, week_number, start_date, deadline = new_week_dates(previous_deadline, datetime.now())
+    
+    week_id = await db.scalar(insert_week_statement(corridor.id, year, week_number, start_date, deadline))
+    if week_id is None:
+        raise RuntimeError(f"Week {week_number}/{year} of {corridor.name} already exists")
+    
+    await db.execute(insert_week_tasks_statement(week_id))
+    return year, week_number, deadline
+
+
+async def create_new_week(db: AsyncSession, app: Application, corridor: CorridorInfo,
+                          previous_deadline: Optional[datetime] = None):
+    """Create the corridor's week after ``previous_deadline`` and announce it.
     
-    db.commit()
+    This creates:
+    1. New Week entry
+    2. A TaskInstance for every TaskType of the corridor (one INSERT ... SELECT)
+    3. Announcement message to group
     
-    # Send announcement to group
-    total = sum([CATEGORY_AMOUNTS.get(cat, 1) for cat in CATEGORY_AMOUNTS.keys()])
+    Raises RuntimeError (and creates nothing) if the week already exists.
+    """
+    week = await insert_new_week(db, corridor, previous_deadline)
+    await db.commit()
+    invalidate_current_week(corridor.id)
+    announce_new_week(app, corridor, *week)
+
+
+def announce_new_week(app: Application, corridor: CorridorInfo, year: int, week_number: int, deadline: datetime):
+    """Arm the new week's rollover and announce it in the corridor's group."""
+    _deadlines.set(corridor.id, deadline)
+    
+    total = corridor.weekly_total
     announcement = (
         f"🆕 *New Week Started!*\n\n"
         f"📅 Week {week_number}/{year}\n"
@@ -236,59 +330,53 @@ async def create_new_week(db, app: Application, group_chat_id: int):
         f"Let's make this week great! ¡Hagámosle pues! 💪"
     )
     
-    try:
-        await app.bot.send_message(
-            chat_id=group_chat_id,
-            text=announcement,
-            parse_mode=ParseMode.MARKDOWN
-        )
-    except Exception as e:
-        print(f"Failed to send new week announcement: {e}")
+    get_outbox(app).send(corridor.chat_id, announcement)
+    refresh_status_board(app, corridor.chat_id)
 
 
-def setup_week_rollover(app: Application, group_chat_id: int):
-    """Setup automatic week rollover job.
+def setup_week_rollover(app: Application):
+    """Setup automatic week rollover.
     
-    This schedules a daily job that checks if the week needs to roll over.
+    Each corridor's week rolls over at its deadline. This schedules the
+    resync of the deadlines every DEADLINE_RESYNC_MINUTES; the bot's
+    post_init runs the first one (``sync_rollover_deadlines()``), which arms
+    the deadline timer.
     
     Args:
         app: The Telegram Application instance
-        group_chat_id: The group chat ID to send messages to
     """
-    from datetime import time
-    
-    job_queue = app.job_queue
-    
-    # Schedule daily check at configured time
-    check_time = time(hour=ROLLOVER_CHECK_TIME[0], minute=ROLLOVER_CHECK_TIME[1])
-    
-    job_queue.run_daily(
-        callback=lambda context: check_and_rollover_week(app, group_chat_id),
-        time=check_time,
-        name="week_rollover_check"
+    interval = DEADLINE_RESYNC_MINUTES * 60
+    app.job_queue.run_repeating(
+        callback=lambda context: sync_rollover_deadlines(app),
+        interval=interval,
+        first=interval,
+        name="week_deadline_sync",
     )
     
     print(f"✅ Week rollover scheduled:")
-    print(f"   Check time: {check_time.strftime('%H:%M')} daily")
+    print(f"   At each week's deadline (resynced every {DEADLINE_RESYNC_MINUTES} min)")
     print(f"   Auto-create new week: {AUTO_CREATE_NEW_WEEK}")
     print(f"   New week deadline: {NEW_WEEK_DEADLINE_DAY} (0=Mon, 6=Sun) at {NEW_WEEK_DEADLINE_TIME[0]:02d}:{NEW_WEEK_DEADLINE_TIME[1]:02d}")
 
 
 # ========== MANUAL TRIGGER (for testing) ==========
 
-async def force_week_rollover(app: Application, group_chat_id: int):
-    """Manually trigger a week rollover.
+async def force_week_rollover(app: Application, corridor: CorridorInfo):
+    """Manually trigger a week rollover of the corridor.
     
     Use this for testing or manual rollover.
     Can be called from a command like /closeweek
     """
-    with get_db() as db:
-        current_week = db.query(Week).filter_by(closed=False).order_by(Week.deadline.desc()).first()
+    # Always act on the database state, not on a possibly stale cache
+    invalidate_current_week(corridor.id)
+    
+    async with get_async_db() as db:
+        current_week = await get_current_week(db, corridor.id)
         
         if not current_week:
             return "❌ No active week to close."
         
-        await perform_week_rollover(db, current_week, app, group_chat_id)
+        await perform_week_rollover(db, corridor, current_week, app)
         return "✅ Week rolled over manually!"
 
 
@@ -301,8 +389,8 @@ from src.week_manager import setup_week_rollover
 # After creating the Application:
 app = Application.builder().token(token).build()
 
-# Setup week rollover (in addition to reminders)
-setup_week_rollover(app, group_chat_id)
+# Setup week rollover of all corridors (in addition to reminders)
+setup_week_rollover(app)
 
 # Then start the bot
 app.run_polling()
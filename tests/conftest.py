@@ -0,0 +1,149 @@
+"""Shared pytest setup.
+
+Checks that need Postgres use the ``postgres`` fixture and are skipped when
+the database from .env isn't reachable (``make db-up``), or when there is
+no .env at all. Telegram is never contacted, so placeholder bot settings
+are enough.
+"""
+
+import asyncio
+import os
+import sys
+from dataclasses import dataclass
+from datetime import date, datetime
+from pathlib import Path
+from typing import List
+
+import pytest
+from pydantic import ValidationError
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+# The scripts import each other by module name
+sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "123:placeholder")
+os.environ.setdefault("TELEGRAM_CHAT_ID", "-100")
+
+try:
+    import src.config  # noqa: F401
+except ValidationError:
+    # No .env: an empty password lets the modules import; the postgres
+    # fixture skips unless the server lets us in without one
+    os.environ.setdefault("POSTGRES_PASSWORD", "")
+
+
+@pytest.fixture(scope="session")
+def postgres():
+    """Skip the test when the configured Postgres server isn't reachable."""
+    import psycopg2
+
+    from src.config import settings
+
+    try:
+        psycopg2.connect(
+            dbname="postgres",
+            user=settings.postgres_user,
+            password=settings.postgres_password,
+            host=settings.postgres_host,
+            port=settings.postgres_port,
+            connect_timeout=3,
+        ).close()
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"Postgres isn't reachable: {e}")
+
+
+@pytest.fixture
+def run_async():
+    """Run a coroutine in its own event loop, closing the async engine's connections afterwards."""
+    from src.database import async_engine
+
+    def run(coroutine):
+        async def main():
+            try:
+                return await coroutine
+            finally:
+                # The engine's connections belong to this loop
+                await async_engine.dispose()
+
+        return asyncio.run(main())
+
+    return run
+
+
+# Kept clear of real chats and residents
+SEED_CHAT_ID = -1009999999998
+SEED_TELEGRAM_IDS = [990000001, 990000002, 990000003]
+
+
+@dataclass
+class SeededWeek:
+    corridor_id: int
+    chat_id: int
+    week_id: int
+    person_ids: List[int]
+    telegram_ids: List[int]
+    task_type_ids: List[int]
+    instance_ids: List[int]  # in task type order
+
+
+def _delete_seed(db):
+    from sqlalchemy import delete, select
+
+    from src.models import Corridor, Person, Week
+
+    corridor_id = select(Corridor.id).where(Corridor.chat_id == SEED_CHAT_ID).scalar_subquery()
+    # Weeks first: their task instances reference the residents
+    db.execute(delete(Week).where(Week.corridor_id == corridor_id))
+    # The corridor takes its residents and task types with it
+    db.execute(delete(Corridor).where(Corridor.chat_id == SEED_CHAT_ID))
+    db.execute(delete(Person).where(Person.telegram_id.in_(SEED_TELEGRAM_IDS)))
+
+
+@pytest.fixture
+def seeded_week(postgres):
+    """A corridor with three residents, three task types and an open week (committed, deleted afterwards)."""
+    from sqlalchemy import select
+
+    from src.database import SessionLocal
+    from src.models import Corridor, Person, TaskInstance, TaskType, Week, insert_week_tasks_statement
+
+    with SessionLocal() as db:
+        _delete_seed(db)  # left over by an interrupted run
+        corridor = Corridor(name="Test corridor", chat_id=SEED_CHAT_ID)
+        db.add(corridor)
+        db.flush()
+        people = [
+            Person(corridor_id=corridor.id, telegram_id=telegram_id, name=name)
+            for telegram_id, name in zip(SEED_TELEGRAM_IDS, ["Alice", "Bob", "Carl"])
+        ]
+        task_types = [
+            TaskType(corridor_id=corridor.id, name=name, category=category)
+            for name, category in [("Toilet 1", "toilet"), ("Kitchen A", "kitchen"), ("Hallway", "common")]
+        ]
+        week = Week(
+            corridor_id=corridor.id, year=2026, week_number=43, start_date=date(2026, 10, 19),
+            deadline=datetime(2026, 10, 25, 23, 58, 59), closed=False,
+        )
+        db.add_all([*people, *task_types, week])
+        db.flush()
+        db.execute(insert_week_tasks_statement(week.id))
+        instances = dict(db.execute(
+            select(TaskInstance.task_type_id, TaskInstance.id).where(TaskInstance.week_id == week.id)
+        ).all())
+        seeded = SeededWeek(
+            corridor_id=corridor.id,
+            chat_id=SEED_CHAT_ID,
+            week_id=week.id,
+            person_ids=[person.id for person in people],
+            telegram_ids=SEED_TELEGRAM_IDS,
+            task_type_ids=[task_type.id for task_type in task_types],
+            instance_ids=[instances[task_type.id] for task_type in task_types],
+        )
+        db.commit()
+
+    yield seeded
+
+    with SessionLocal() as db:
+        _delete_seed(db)
+        db.commit()
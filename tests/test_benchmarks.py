@@ -0,0 +1,36 @@
+"""Benchmark assertions (``uv run pytest -m benchmark``).
+
+The measurements roll back everything they seed, so they run against the
+database from .env.
+"""
+
+import asyncio
+
+import pytest
+
+from benchmark_week_summary import MAX_SUMMARY_SECONDS, measure_summaries
+
+
+async def _measure_week_summaries():
+    from src.database import async_engine
+
+    try:
+        return await measure_summaries()
+    finally:
+        # The engine's connections belong to this test's event loop
+        await async_engine.dispose()
+
+
+@pytest.fixture(scope="module")
+def week_summaries(postgres):
+    return asyncio.run(_measure_week_summaries())
+
+
+@pytest.mark.benchmark
+def test_week_summary_query_count_is_constant(week_summaries):
+    assert len({queries for _, _, queries, _ in week_summaries}) == 1
+
+
+@pytest.mark.benchmark
+def test_week_summary_is_fast_on_the_largest_week(week_summaries):
+    assert max(elapsed for _, _, _, elapsed in week_summaries) <= MAX_SUMMARY_SECONDS
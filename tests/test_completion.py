@@ -0,0 +1,91 @@
+"""Concurrent taps on the same task: exactly one completion or amend wins."""
+
+import asyncio
+
+from sqlalchemy import func, select
+
+from src.completion import Amended, Completed, Rejected, amend_task, complete_task
+from src.database import get_async_db
+from src.models import CompletionLog, TaskInstance
+
+
+async def _in_own_session(operation, telegram_id, task_instance_id):
+    async with get_async_db() as db:
+        return await operation(db, telegram_id, task_instance_id)
+
+
+async def _log_actions(task_instance_id):
+    async with get_async_db() as db:
+        return list(await db.scalars(
+            select(CompletionLog.action)
+            .where(CompletionLog.task_instance_id == task_instance_id)
+            .order_by(CompletionLog.id)
+        ))
+
+
+async def _race(operation, telegram_ids, task_instance_id):
+    """Start the operation in one session per resident at once."""
+    return await asyncio.gather(*(
+        _in_own_session(operation, telegram_id, task_instance_id) for telegram_id in telegram_ids
+    ))
+
+
+def test_one_of_concurrent_completions_wins(seeded_week, run_async):
+    instance_id = seeded_week.instance_ids[0]
+
+    async def check():
+        results = await _race(complete_task, seeded_week.telegram_ids, instance_id)
+        async with get_async_db() as db:
+            completed_by = await db.scalar(select(TaskInstance.completed_by).filter_by(id=instance_id))
+        return results, completed_by, await _log_actions(instance_id)
+
+    results, completed_by, actions = run_async(check())
+
+    winners = [result for result in results if isinstance(result, Completed)]
+    assert len(winners) == 1
+    assert winners[0].completed_count == 1
+    assert [result for result in results if result is not winners[0]] == [Rejected("not_found")] * 2
+    assert completed_by in seeded_week.person_ids
+    assert actions == ["completed"]
+
+
+def test_completion_waits_for_a_concurrent_one_and_loses(seeded_week, run_async):
+    instance_id = seeded_week.instance_ids[1]
+    alice, bob, _ = seeded_week.telegram_ids
+
+    async def check():
+        async with get_async_db() as db:
+            first = await complete_task(db, alice, instance_id)
+            # Bob taps while Alice's transaction still holds the row
+            second = asyncio.create_task(_in_own_session(complete_task, bob, instance_id))
+            await asyncio.sleep(0.2)
+            assert not second.done()
+        return first, await second, await _log_actions(instance_id)
+
+    first, second, actions = run_async(check())
+
+    assert isinstance(first, Completed)
+    assert second == Rejected("not_found")
+    assert actions == ["completed"]
+
+
+def test_one_of_concurrent_amends_wins(seeded_week, run_async):
+    instance_id = seeded_week.instance_ids[2]
+    alice = seeded_week.telegram_ids[0]
+
+    async def check():
+        await _in_own_session(complete_task, alice, instance_id)
+        results = await _race(amend_task, seeded_week.telegram_ids, instance_id)
+        async with get_async_db() as db:
+            status = await db.scalar(select(TaskInstance.status).filter_by(id=instance_id))
+            logged = await db.scalar(select(func.count(CompletionLog.id)).filter_by(task_instance_id=instance_id))
+        return results, status, logged, await _log_actions(instance_id)
+
+    results, status, logged, actions = run_async(check())
+
+    winners = [result for result in results if isinstance(result, Amended)]
+    assert len(winners) == 1
+    assert winners[0].original_completer == "Alice"
+    assert [result for result in results if result is not winners[0]] == [Rejected("not_found")] * 2
+    assert status == "pending"
+    assert actions == ["completed", "amended"]
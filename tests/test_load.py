@@ -0,0 +1,69 @@
+"""The offline load test (scripts/load_test.py) as a latency regression check.
+
+Runs the scenario in a subprocess, since it points the bot at its own
+scratch database before the database engines are created, and fails when
+p50/p99 handler latency or queries per update exceed the thresholds.
+
+    uv run pytest -m loadtest
+"""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+LOAD_TEST = Path(__file__).parent.parent / "scripts" / "load_test.py"
+
+# ========== CONFIGURATION ==========
+
+RESIDENTS = 100
+CORRIDORS = 2
+CONCURRENCY = 10
+
+# About 3x what a single core measures, so only real regressions fail
+MAX_P50_MS = 300
+MAX_P99_MS = 1000
+MAX_QUERIES_PER_UPDATE = 2.0
+
+# ====================================
+
+
+@pytest.fixture(scope="module")
+def load_summary(postgres):
+    result = subprocess.run(
+        [
+            sys.executable, str(LOAD_TEST),
+            "--residents", str(RESIDENTS),
+            "--corridors", str(CORRIDORS),
+            "--concurrency", str(CONCURRENCY),
+            "--json",
+        ],
+        capture_output=True,
+        text=True,
+        timeout=600,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    # The bot prints its schedule to stdout too; the results are the last line
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.loadtest
+def test_every_update_is_processed(load_summary):
+    assert load_summary["updates"] > RESIDENTS * 5
+
+
+@pytest.mark.loadtest
+def test_p50_latency(load_summary):
+    assert load_summary["p50_ms"] <= MAX_P50_MS
+
+
+@pytest.mark.loadtest
+def test_p99_latency(load_summary):
+    assert load_summary["p99_ms"] <= MAX_P99_MS
+
+
+@pytest.mark.loadtest
+def test_queries_per_update(load_summary):
+    assert load_summary["queries_per_update"] <= MAX_QUERIES_PER_UPDATE
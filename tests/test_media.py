@@ -0,0 +1,41 @@
+"""Storing a task photo's file_id doesn't bump the catalogue version."""
+
+from types import SimpleNamespace
+
+from sqlalchemy import select
+
+from src import catalogue, media
+from src.catalogue import _read_version, get_catalogue, load_catalogue
+from src.database import get_async_db
+from src.models import TaskType
+
+
+def test_first_upload_patches_the_catalogue_without_a_version_bump(seeded_week, run_async, monkeypatch, tmp_path):
+    monkeypatch.setattr(media, "TASK_MEDIA_DIR", tmp_path)
+    (tmp_path / "toilet_1.jpg").write_bytes(b"jpeg")
+    sent = []
+
+    async def send_photo(photo, **kwargs):
+        sent.append(photo if isinstance(photo, str) else "upload")
+        return SimpleNamespace(photo=[SimpleNamespace(file_id="small"), SimpleNamespace(file_id="uploaded-id")])
+
+    async def check():
+        await load_catalogue()
+        async with get_async_db() as db:
+            version = await _read_version(db)
+            task_type = (await get_catalogue(db, seeded_week.corridor_id)).by_id[seeded_week.task_type_ids[0]]
+        assert await media.send_task_photo(send_photo, task_type)
+        async with get_async_db() as db:
+            stored = await db.scalar(select(TaskType.media_file_id).filter_by(id=task_type.id))
+            new_version = await _read_version(db)
+            # Sent by id the second time
+            patched = (await get_catalogue(db, seeded_week.corridor_id)).by_id[task_type.id]
+        assert await media.send_task_photo(send_photo, patched)
+        return version, new_version, stored, patched
+
+    version, new_version, stored, patched = run_async(check())
+
+    assert new_version == version
+    assert stored == patched.media_file_id == "uploaded-id"
+    assert catalogue._version == version
+    assert sent == ["upload", "uploaded-id"]
@@ -0,0 +1,51 @@
+"""Prebuilt menus are reused until the corridor's week-state version bumps."""
+
+from src.completion import complete_task
+from src.corridors import CorridorInfo
+from src.database import get_async_db
+from src.menus import CATEGORY_AMOUNTS, create_category_menu, create_task_menu
+from src.week_cache import bump_week_state_version, invalidate_current_week
+
+
+def _buttons(menu):
+    return [button.text for row in menu.inline_keyboard for button in row]
+
+
+def test_menus_are_rebuilt_when_the_week_state_version_bumps(seeded_week, run_async):
+    corridor = CorridorInfo(seeded_week.corridor_id, "Test corridor", seeded_week.chat_id, dict(CATEGORY_AMOUNTS))
+    alice = seeded_week.telegram_ids[0]
+    toilet_1 = seeded_week.instance_ids[0]
+
+    async def menus():
+        return await create_category_menu(corridor), await create_task_menu(corridor, "toilet")
+
+    async def check():
+        invalidate_current_week(corridor.id)
+        built = [await menus(), await menus()]
+        async with get_async_db() as db:
+            await complete_task(db, alice, toilet_1)
+        # Nothing bumped the version yet, so the old menus are still served
+        built.append(await menus())
+        bump_week_state_version(corridor.id)
+        built.append(await menus())
+        # Another corridor's bump leaves these menus alone; a global one doesn't
+        bump_week_state_version(corridor.id + 1)
+        built.append(await menus())
+        bump_week_state_version()
+        built.append(await menus())
+        return built
+
+    first, again, stale, rebuilt, other_bumped, globally_bumped = run_async(check())
+
+    assert again[0] is first[0] and again[1] is first[1]
+    assert stale[0] is first[0] and stale[1] is first[1]
+    assert _buttons(first[0]) == ["📦 Common (0/1)", "🍳 Kitchen (0/3)", "🚽 Toilet (0/2)", "« Back to Menu"]
+    assert _buttons(first[1]) == ["⏳ Toilet 1", "« Back to Categories"]
+
+    # The completion shows up, and the done toilet is no longer offered
+    assert _buttons(rebuilt[0]) == ["📦 Common (0/1)", "🍳 Kitchen (0/3)", "🚽 Toilet (1/2)", "« Back to Menu"]
+    assert rebuilt[1] is None
+
+    assert other_bumped[0] is rebuilt[0]
+    assert globally_bumped[0] is not rebuilt[0]
+    assert _buttons(globally_bumped[0]) == _buttons(rebuilt[0])
@@ -0,0 +1,68 @@
+"""The outbox: global rate limit with many supervisor workers, failures and digests."""
+
+import asyncio
+
+import pytest
+
+from src.config import settings
+from src.outbox import GLOBAL_MESSAGES_PER_SECOND, Outbox
+
+
+@pytest.mark.parametrize("workers", [1, 4, 30, 31, 64])
+def test_global_bucket_hands_out_tokens(monkeypatch, workers):
+    monkeypatch.setattr(settings, "workers", workers)
+    bucket = Outbox(bot=None)._global_bucket
+
+    async def acquire_twice():
+        # The second token needs a refill at the per-worker rate
+        await asyncio.wait_for(bucket.acquire(), timeout=1)
+        await asyncio.wait_for(bucket.acquire(), timeout=2 * workers / GLOBAL_MESSAGES_PER_SECOND + 1)
+
+    asyncio.run(acquire_twice())
+    assert bucket.rate == GLOBAL_MESSAGES_PER_SECOND / workers
+
+
+class FlakyBot:
+    """send_message fails with an unexpected error for texts starting with "boom"."""
+
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, chat_id, text, parse_mode=None):
+        if text.startswith("boom"):
+            raise ValueError("not a Telegram error")
+        self.sent.append((chat_id, text))
+
+
+def test_unexpected_error_drops_the_message_and_keeps_the_chat_going():
+    bot = FlakyBot()
+
+    async def deliver_both():
+        outbox = Outbox(bot)
+        first = await asyncio.wait_for(outbox.deliver(-100, "boom"), timeout=2)
+        second = await asyncio.wait_for(outbox.deliver(-100, "hello"), timeout=2)
+        return outbox, first, second
+
+    outbox, first, second = asyncio.run(deliver_both())
+    assert (first, second) == (False, True)
+    assert bot.sent == [(-100, "hello")]
+    assert outbox.failed == 1
+
+
+def test_sent_digests_are_forgotten():
+    bot = FlakyBot()
+
+    async def send_digests():
+        outbox = Outbox(bot)
+        for chat_id in (-100, -200):
+            outbox.send(chat_id, "Alice completed Toilet 1", coalesce_key="completed")
+            outbox.send(chat_id, "Bob completed Hallway", coalesce_key="completed")
+        await outbox.flush(timeout=2)
+        return outbox
+
+    outbox = asyncio.run(send_digests())
+    assert sorted(bot.sent) == [
+        (-200, "Alice completed Toilet 1\nBob completed Hallway"),
+        (-100, "Alice completed Toilet 1\nBob completed Hallway"),
+    ]
+    assert outbox._digests == {}
@@ -0,0 +1,110 @@
+"""The person_stats rows kept up by completions and amends match a rebuild from completion_log.
+
+Everything runs in one transaction that is rolled back, so the stored
+stats are left alone.
+"""
+
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import select
+
+from src.completion import Amended, Completed, amend_task, complete_task
+from src.database import AsyncSessionLocal
+from src.models import PersonStats, TaskInstance, Week, insert_week_tasks_statement
+from src.person_stats import rebuild_person_stats
+
+# last_completed_at comes from the instance (Python's clock) incrementally
+# and from completion_log (the transaction's start) in a rebuild
+CLOCK_TOLERANCE = timedelta(seconds=5)
+
+NO_STATS = (0, {}, 0, None)
+
+
+async def _stats(db, person_ids):
+    rows = await db.scalars(select(PersonStats).where(PersonStats.person_id.in_(person_ids)))
+    return {
+        row.person_id: (
+            (row.total_completions, row.category_counts, row.current_streak, row.last_week_start),
+            row.last_completed_at,
+        )
+        for row in rows
+    }
+
+
+async def _incremental_and_rebuilt(db, person_ids):
+    incremental = await _stats(db, person_ids)
+    savepoint = await db.begin_nested()
+    await rebuild_person_stats(db)
+    rebuilt = await _stats(db, person_ids)
+    await savepoint.rollback()
+    return incremental, rebuilt
+
+
+def _assert_agree(incremental, rebuilt, person_ids):
+    for person_id in person_ids:
+        # A rebuild has no row for someone without completions
+        stats, last_completed_at = incremental.get(person_id, (NO_STATS, None))
+        expected, expected_last_completed_at = rebuilt.get(person_id, (NO_STATS, None))
+        assert stats == expected, person_id
+        if expected_last_completed_at is None:
+            assert last_completed_at is None, person_id
+        else:
+            assert abs(last_completed_at - expected_last_completed_at) < CLOCK_TOLERANCE, person_id
+
+
+def test_incremental_stats_agree_with_a_rebuild(seeded_week, run_async):
+    alice, bob, carl = seeded_week.telegram_ids
+    toilet, kitchen, _ = seeded_week.task_type_ids
+
+    async def check():
+        async with AsyncSessionLocal() as db:
+            try:
+                # Two earlier weeks, so there is a streak to extend and break
+                instances = {}
+                for offset in (2, 1):
+                    start = date(2026, 10, 19) - timedelta(weeks=offset)
+                    week = Week(
+                        corridor_id=seeded_week.corridor_id, year=2026, week_number=43 - offset,
+                        start_date=start, deadline=datetime.combine(start + timedelta(days=6), datetime.min.time()),
+                        closed=True,
+                    )
+                    db.add(week)
+                    await db.flush()
+                    await db.execute(insert_week_tasks_statement(week.id))
+                    instances[43 - offset] = dict((await db.execute(
+                        select(TaskInstance.task_type_id, TaskInstance.id).filter_by(week_id=week.id)
+                    )).all())
+                instances[43] = dict(zip(seeded_week.task_type_ids, seeded_week.instance_ids))
+
+                steps = [
+                    (complete_task, alice, instances[41][toilet], Completed),
+                    (complete_task, alice, instances[42][toilet], Completed),
+                    (complete_task, alice, instances[43][kitchen], Completed),
+                    (complete_task, bob, instances[43][toilet], Completed),
+                    # Alice's only completion of the latest week
+                    (amend_task, alice, instances[43][kitchen], Amended),
+                    # Someone else undoes Bob's only completion
+                    (amend_task, carl, instances[43][toilet], Amended),
+                    (complete_task, alice, instances[43][kitchen], Completed),
+                    # A gap in the middle of Alice's streak
+                    (amend_task, bob, instances[42][toilet], Amended),
+                    (complete_task, carl, instances[42][kitchen], Completed),
+                ]
+                results = []
+                for operation, telegram_id, instance_id, expected in steps:
+                    assert isinstance(await operation(db, telegram_id, instance_id), expected)
+                    results.append(await _incremental_and_rebuilt(db, seeded_week.person_ids))
+                return results
+            finally:
+                await db.rollback()
+
+    results = run_async(check())
+
+    for incremental, rebuilt in results:
+        _assert_agree(incremental, rebuilt, seeded_week.person_ids)
+
+    alice_id = seeded_week.person_ids[0]
+    final, _ = results[-1]
+    assert final[alice_id][0] == (2, {"toilet": 1, "kitchen": 1}, 1, date(2026, 10, 19))
+    # The streak was three weeks before the gap
+    assert results[-3][0][alice_id][0][2] == 3
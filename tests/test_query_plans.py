@@ -0,0 +1,32 @@
+"""Query plan assertions (``uv run pytest -m benchmark``).
+
+The plans are taken on a dataset seeded in a rolled-back transaction, so
+they run against the database from .env.
+"""
+
+import asyncio
+
+import pytest
+
+from check_query_plans import CHECKS, explain_checks
+
+
+async def _explain_checks():
+    from src.database import async_engine
+
+    try:
+        return await explain_checks()
+    finally:
+        # The engine's connections belong to this test's event loop
+        await async_engine.dispose()
+
+
+@pytest.fixture(scope="module")
+def used_indexes(postgres):
+    return asyncio.run(_explain_checks())
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("description, index", [(description, index) for description, _, index in CHECKS])
+def test_lookup_uses_its_index(used_indexes, description, index):
+    assert index in used_indexes[description]
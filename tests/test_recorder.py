@@ -0,0 +1,97 @@
+"""Recorded updates keep no ids or names of residents."""
+
+import json
+
+import pytest
+from telegram import Update
+
+from src.recorder import UpdateRecorder
+
+GROUP = {"id": -100123, "type": "supergroup", "title": "Corridor 4"}
+ALICE = {"id": 555, "is_bot": False, "first_name": "Alice", "last_name": "Adams", "username": "alice"}
+BOB = {"id": 777, "is_bot": False, "first_name": "Bob", "username": "bob"}
+CARL = {"id": 888, "is_bot": False, "first_name": "Carl", "username": "carl"}
+
+JOIN = {
+    "update_id": 1,
+    "message": {
+        "message_id": 10, "date": 1760000000, "chat": GROUP, "from": ALICE,
+        "new_chat_members": [BOB, CARL],
+    },
+}
+LEAVE = {
+    "update_id": 2,
+    "message": {
+        "message_id": 11, "date": 1760000100, "chat": GROUP, "from": CARL,
+        "left_chat_member": CARL,
+    },
+}
+BOT = {"id": 999, "is_bot": True, "first_name": "Pablito", "username": "pablito_bot"}
+STATS_TEXT = "📊 Stats for Alice Adams\n\nHaven't contributed: Bob, Carl"
+CALLBACK = {
+    "update_id": 3,
+    "callback_query": {
+        "id": "42", "from": ALICE, "chat_instance": "-5551234", "data": "menu:stats",
+        "message": {
+            "message_id": 12, "date": 1760000200, "chat": GROUP, "from": BOT,
+            "text": STATS_TEXT,
+            "entities": [{"type": "bold", "offset": 3, "length": 21}],
+            "reply_markup": {"inline_keyboard": [[{"text": "« Back to Menu", "callback_data": "menu:main"}]]},
+        },
+    },
+}
+
+ORIGINALS = {
+    value
+    for identity in (GROUP, ALICE, BOB, CARL)
+    for field, value in identity.items()
+    if field in {"id", "first_name", "last_name", "username", "title"}
+}
+
+
+def leaf_values(data):
+    if isinstance(data, dict):
+        for value in data.values():
+            yield from leaf_values(value)
+    elif isinstance(data, list):
+        for item in data:
+            yield from leaf_values(item)
+    else:
+        yield data
+
+
+@pytest.mark.parametrize("data", [JOIN, LEAVE], ids=["join", "leave"])
+def test_join_and_leave_keep_no_ids_or_names(data):
+    recorder = UpdateRecorder("unused.jsonl", salt="test")
+    anonymized = recorder.anonymize(Update.de_json(data, None).to_dict())
+
+    assert not ORIGINALS & set(leaf_values(anonymized))
+    # Still a valid update that replays the same way
+    assert Update.de_json(json.loads(json.dumps(anonymized)), None).message.chat.id < 0
+
+
+def test_members_keep_consistent_pseudonyms():
+    recorder = UpdateRecorder("unused.jsonl", salt="test")
+    joined = recorder.anonymize(JOIN)["message"]["new_chat_members"]
+    left = recorder.anonymize(LEAVE)["message"]["left_chat_member"]
+
+    assert [member["first_name"] for member in joined] == ["Resident", "Resident"]
+    assert joined[1]["id"] == left["id"] == recorder.anonymize_id(CARL["id"])
+
+
+def test_callback_keeps_no_text_of_the_bots_message():
+    recorder = UpdateRecorder("unused.jsonl", salt="test")
+    anonymized = recorder.anonymize(Update.de_json(CALLBACK, None).to_dict())
+    message = anonymized["callback_query"]["message"]
+
+    assert not {"text", "caption", "entities"} & set(message)
+    assert not any(
+        isinstance(value, str) and name in value
+        for value in leaf_values(anonymized)
+        for name in ("Alice", "Adams", "Bob", "Carl")
+    )
+    # Replay still finds the message and its chat
+    replayed = Update.de_json(json.loads(json.dumps(anonymized)), None).callback_query
+    assert replayed.message.message_id == 12
+    assert replayed.message.chat.id == recorder.anonymize_id(GROUP["id"])
+    assert replayed.data == "menu:stats"
@@ -0,0 +1,125 @@
+"""Callback routing: every button the bot shows reaches its handler, unknown data reaches none."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.router import CallbackRouter
+
+CORRIDOR = SimpleNamespace(id=1, name="Corridor 4")
+
+# callback_data the bot puts on its buttons -> (route, parsed parameters)
+BUTTONS = {
+    "menu": ("menu", {}),
+    "help": ("help", {}),
+    "status": ("status", {}),
+    "tasks": ("tasks", {}),
+    "whooptedout": ("whooptedout", {}),
+    "mystats": ("mystats", {}),
+    "map": ("map", {}),
+    "optout:categories": ("optout:categories", {}),
+    "complete:categories": ("complete:categories", {}),
+    "amend:categories": ("amend:categories", {}),
+    "ask:categories": ("ask:categories", {}),
+    "complete:category:kitchen": ("complete:category:<category>", {"category": "kitchen"}),
+    "amend:category:toilet": ("amend:category:<category>", {"category": "toilet"}),
+    "ask:category:common": ("ask:category:<category>", {"category": "common"}),
+    "complete:task:42": ("complete:task:<task_instance_id:int>", {"task_instance_id": 42}),
+    "amend:task:7": ("amend:task:<task_instance_id:int>", {"task_instance_id": 7}),
+    "ask:task:1234": ("ask:task:<task_instance_id:int>", {"task_instance_id": 1234}),
+}
+
+UNKNOWN = ["", "nope", "menu:extra", "complete", "complete:task", "complete:task:abc", "complete:task:1:2", "status:"]
+
+
+@pytest.fixture(scope="module")
+def bot_router(postgres):
+    """The bot's own route table (registering its jobs needs the job store)."""
+    from src.bot import CorridorBot
+
+    return CorridorBot().router
+
+
+def test_bot_routes_are_all_covered(bot_router):
+    assert set(bot_router.routes) == {pattern for pattern, _ in BUTTONS.values()}
+
+
+@pytest.mark.parametrize("data", BUTTONS)
+def test_bot_router_resolves_each_button(bot_router, data):
+    route, params = bot_router.resolve(data)
+    assert (route.pattern, params) == BUTTONS[data]
+
+
+@pytest.mark.parametrize("data", UNKNOWN)
+def test_bot_router_resolves_no_unknown_data(bot_router, data):
+    assert bot_router.resolve(data) == (None, {})
+
+
+class Recorder:
+    """Router whose handlers and hooks record what they were called with."""
+
+    def __init__(self, corridor=CORRIDOR):
+        self.calls = []
+
+        async def resolve_corridor(update):
+            return corridor
+
+        async def record_hook(update, *args):
+            self.calls.append(("hook", args))
+
+        self.router = CallbackRouter(record_hook, resolve_corridor, record_hook)
+        for pattern, private, corridor_route in [
+            ("menu", False, False),
+            ("status", False, True),
+            ("mystats", True, True),
+            ("complete:task:<task_instance_id:int>", True, True),
+            ("complete:category:<category>", True, True),
+        ]:
+            self.router.add(pattern, self._handler(pattern), private=private, corridor=corridor_route)
+
+    def _handler(self, pattern):
+        async def handler(query, **params):
+            self.calls.append((pattern, params))
+        return handler
+
+    def dispatch(self, data, chat_type="private"):
+        update = SimpleNamespace(
+            callback_query=SimpleNamespace(data=data), effective_chat=SimpleNamespace(type=chat_type)
+        )
+        return asyncio.run(self.router.dispatch(update))
+
+
+@pytest.mark.parametrize("data, call", [
+    ("menu", ("menu", {})),
+    ("status", ("status", {"corridor": CORRIDOR})),
+    ("complete:task:42", ("complete:task:<task_instance_id:int>", {"task_instance_id": 42, "corridor": CORRIDOR})),
+    ("complete:category:kitchen", ("complete:category:<category>", {"category": "kitchen", "corridor": CORRIDOR})),
+])
+def test_dispatch_calls_the_handler_with_its_parameters(data, call):
+    recorder = Recorder()
+    assert recorder.dispatch(data) is True
+    assert recorder.calls == [call]
+    assert recorder.router.routes[call[0]].stats.calls == 1
+
+
+@pytest.mark.parametrize("data", UNKNOWN)
+def test_dispatch_ignores_unknown_data(data):
+    recorder = Recorder()
+    assert recorder.dispatch(data) is False
+    assert recorder.calls == []
+
+
+def test_private_route_in_a_group_redirects():
+    recorder = Recorder()
+    assert recorder.dispatch("complete:task:42", chat_type="supergroup") is True
+    assert recorder.calls == [("hook", ("Complete",))]
+
+
+def test_corridor_route_without_a_corridor_is_explained():
+    recorder = Recorder(corridor=None)
+    assert recorder.dispatch("status", chat_type="supergroup") is True
+    assert recorder.calls == [("hook", ())]
+    # Routes that don't need a corridor still run
+    assert recorder.dispatch("menu") is True
+    assert recorder.calls[-1] == ("menu", {})
@@ -0,0 +1,40 @@
+"""DeadlineTimer writes the job store off the event loop."""
+
+import asyncio
+import threading
+import time as clock
+from datetime import datetime
+
+from src import scheduler
+from src.scheduler import DeadlineTimer
+
+
+def test_timer_arms_in_a_worker_thread_and_ends_at_the_latest_deadline(monkeypatch):
+    writes = []
+
+    def slow_schedule_once(app, job_id, function, at):
+        clock.sleep(0.1)  # a blocking job store write
+        writes.append((at, threading.current_thread() is threading.main_thread()))
+
+    monkeypatch.setattr(scheduler, "schedule_once", slow_schedule_once)
+    monkeypatch.setattr(scheduler, "unschedule", lambda app, job_id: writes.append((None, False)))
+
+    async def arm():
+        timer = DeadlineTimer("test_deadline", None)
+        started = clock.monotonic()
+        timer.reset(object(), {1: datetime(2026, 10, 25, 23, 58, 59)})
+        timer.set(2, datetime(2026, 10, 20, 12, 0))
+        timer.set(3, datetime(2026, 10, 19, 8, 0))
+        blocked = clock.monotonic() - started
+        await asyncio.sleep(0.05)  # the first write is under way
+        timer.set(4, datetime(2026, 10, 19, 7, 0))
+        while not timer._arming.done():
+            await asyncio.sleep(0.01)
+        return blocked
+
+    blocked = asyncio.run(arm())
+
+    assert blocked < 0.05
+    # Deadlines set before the write started are written at once; one set
+    # during it is written right after
+    assert writes == [(datetime(2026, 10, 19, 8, 0), False), (datetime(2026, 10, 19, 7, 0), False)]
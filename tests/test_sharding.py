@@ -0,0 +1,83 @@
+"""Job run claims against the database from .env (``make migrate`` first).
+
+The tests add a corridor of their own and delete it, with its claims, at
+the end.
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+from sqlalchemy import delete
+
+RUN = datetime(2026, 10, 19, 10, 0)
+NEXT_RUN = datetime(2026, 10, 26, 10, 0)
+
+
+async def _with_corridor(check):
+    from src.database import async_engine, get_async_db
+    from src.models import Corridor
+
+    try:
+        async with get_async_db() as db:
+            corridor = Corridor(name="Claims test", chat_id=-1009999999999)
+            db.add(corridor)
+            await db.flush()
+            corridor_id = corridor.id
+        try:
+            return await check(corridor_id)
+        finally:
+            async with get_async_db() as db:
+                await db.execute(delete(Corridor).where(Corridor.id == corridor_id))
+    finally:
+        # The engine's connections belong to this test's event loop
+        await async_engine.dispose()
+
+
+def test_a_run_is_claimed_once(postgres):
+    from src.sharding import corridor_job_claim
+
+    async def check(corridor_id):
+        async with corridor_job_claim("test_job", corridor_id, RUN) as first:
+            pass
+        async with corridor_job_claim("test_job", corridor_id, RUN) as again:
+            pass
+        async with corridor_job_claim("test_job", corridor_id, NEXT_RUN) as next_run:
+            pass
+        async with corridor_job_claim("other_job", corridor_id, RUN) as other_job:
+            pass
+        return first, again, next_run, other_job
+
+    assert asyncio.run(_with_corridor(check)) == (True, False, True, True)
+
+
+def test_a_concurrent_claimant_gets_nothing(postgres):
+    from src.sharding import corridor_job_claims
+
+    async def check(corridor_id):
+        async def second():
+            async with corridor_job_claims("test_job", [corridor_id], RUN) as claimed:
+                return claimed
+
+        async with corridor_job_claims("test_job", [corridor_id], RUN) as first:
+            # Still running: the second claimant waits for this one to finish
+            other = asyncio.create_task(second())
+            await asyncio.sleep(0.2)
+            assert not other.done()
+        return corridor_id in first, await other
+
+    assert asyncio.run(_with_corridor(check)) == (True, set())
+
+
+def test_a_failed_run_can_be_claimed_again(postgres):
+    from src.sharding import corridor_job_claim
+
+    async def check(corridor_id):
+        with pytest.raises(RuntimeError):
+            async with corridor_job_claim("test_job", corridor_id, RUN):
+                raise RuntimeError("delivery failed")
+        async with corridor_job_claim("test_job", corridor_id, RUN) as retried:
+            return retried
+
+    assert asyncio.run(_with_corridor(check))
+
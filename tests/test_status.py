@@ -0,0 +1,73 @@
+"""The aggregated status queries agree with counting the week's task instances one by one."""
+
+from collections import Counter
+
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from src.completion import complete_task
+from src.database import get_async_db
+from src.models import Person, TaskInstance
+from src.status import get_open_weeks_progress, get_week_status
+
+
+async def _per_task(db, seeded_week):
+    """What /status used to compute: every instance loaded, completers looked up one by one."""
+    instances = (await db.scalars(
+        select(TaskInstance)
+        .filter_by(week_id=seeded_week.week_id)
+        .options(selectinload(TaskInstance.task_type))
+    )).all()
+    totals, completed, completions = Counter(), Counter(), set()
+    for instance in instances:
+        category = instance.task_type.category or "other"
+        totals[category] += 1
+        if instance.status == "completed":
+            completed[category] += 1
+            completions.add((instance.task_type.name, (await db.get(Person, instance.completed_by)).name))
+    contributors = {instance.completed_by for instance in instances if instance.status == "completed"}
+    residents = await db.scalars(
+        select(Person).filter_by(corridor_id=seeded_week.corridor_id, active=True).order_by(Person.name)
+    )
+    idle = [person.name for person in residents if person.id not in contributors]
+    return {category: (completed[category], totals[category]) for category in totals}, completions, idle
+
+
+def test_week_status_matches_the_per_task_result(seeded_week, run_async):
+    alice, bob, _ = seeded_week.telegram_ids
+
+    async def check():
+        async with get_async_db() as db:
+            results = []
+            for telegram_id, instance_id in [(alice, seeded_week.instance_ids[0]), (bob, seeded_week.instance_ids[1])]:
+                await complete_task(db, telegram_id, instance_id)
+                status = await get_week_status(db, seeded_week.week_id)
+                progress = (await get_open_weeks_progress(db, [seeded_week.corridor_id]))[seeded_week.corridor_id]
+                results.append((status, progress, await _per_task(db, seeded_week)))
+            return results
+
+    results = run_async(check())
+    for status, progress, (categories, completions, idle) in results:
+        assert {
+            category: (counts.completed, counts.instances) for category, counts in status.categories.items()
+        } == categories
+        assert set(status.recent_completions) == completions
+        assert status.completed_count == len(completions)
+        assert status.non_contributors == idle
+        assert progress.week_id == seeded_week.week_id
+        assert progress.completed_count == len(completions)
+        assert progress.non_contributors == idle
+    # Latest completion first
+    assert results[-1][0].recent_completions == [("Kitchen A", "Bob"), ("Toilet 1", "Alice")]
+
+
+def test_week_status_of_an_untouched_week(seeded_week, run_async):
+    async def check():
+        async with get_async_db() as db:
+            return await get_week_status(db, seeded_week.week_id), await _per_task(db, seeded_week)
+
+    status, (categories, completions, idle) = run_async(check())
+
+    assert {category: (c.completed, c.instances) for category, c in status.categories.items()} == categories
+    assert status.recent_completions == [] and completions == set()
+    assert status.non_contributors == idle == ["Alice", "Bob", "Carl"]
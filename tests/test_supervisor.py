@@ -0,0 +1,69 @@
+"""Polled updates reach the workers before Telegram is told they were received."""
+
+import asyncio
+
+from telegram import Update
+
+from src import supervisor
+from src.supervisor import WORKER_QUEUE_PATH, Supervisor
+
+BATCHES = [[1, 2, 3, 4], [5, 6]]
+
+# Update ids the workers took, in order
+taken = []
+
+
+class FakeBot:
+    """getUpdates returning BATCHES, then cancelling the poll."""
+
+    def __init__(self):
+        self.offsets = []
+        self.taken_at_offset = []
+
+    async def delete_webhook(self):
+        pass
+
+    async def get_updates(self, offset, **kwargs):
+        self.offsets.append(offset)
+        self.taken_at_offset.append(set(taken))
+        if len(self.offsets) > len(BATCHES):
+            raise asyncio.CancelledError
+        return [Update(update_id) for update_id in BATCHES[len(self.offsets) - 1]]
+
+
+def test_poll_confirms_a_batch_only_once_every_worker_took_it(monkeypatch):
+    monkeypatch.setattr(supervisor, "HAND_OFF_RETRY_SECONDS", 0.01)
+    taken.clear()
+    attempts = []
+
+    async def route(data):
+        return data["update_id"] % 2
+
+    async def post(index, path, data):
+        assert path == WORKER_QUEUE_PATH
+        attempts.append(data["update_id"])
+        if data["update_id"] == 3 and attempts.count(3) < 3:
+            return 502  # worker 1 restarting
+        taken.append(data["update_id"])
+        return 200
+
+    async def poll():
+        target = Supervisor(2)
+        target.bot = FakeBot()
+        target.route = route
+        target._post = post
+        try:
+            await target._poll()
+        except asyncio.CancelledError:
+            pass
+        return target.bot
+
+    bot = asyncio.run(poll())
+
+    assert bot.offsets == [None, 5, 7]
+    # Each getUpdates came after the previous batch was handed off completely
+    assert bot.taken_at_offset == [set(), {1, 2, 3, 4}, {1, 2, 3, 4, 5, 6}]
+    assert sorted(taken) == [1, 2, 3, 4, 5, 6]
+    assert attempts.count(3) == 3
+    # A worker's updates are handed off in order
+    assert [update_id for update_id in taken if update_id % 2] == [1, 3, 5]
@@ -0,0 +1,46 @@
+"""The week that follows a closed one (pure date arithmetic, no database)."""
+
+from datetime import date, datetime
+
+import pytest
+
+from src.week_manager import new_week_dates
+
+
+@pytest.mark.parametrize(
+    "previous_deadline, now, expected",
+    [
+        # Rolled over on time, late the same night, or the next morning
+        (datetime(2026, 10, 18, 23, 58, 59), datetime(2026, 10, 18, 23, 58, 59),
+         (2026, 43, date(2026, 10, 19), datetime(2026, 10, 25, 23, 58, 59))),
+        (datetime(2026, 10, 18, 23, 58, 59), datetime(2026, 10, 19, 0, 0, 30),
+         (2026, 43, date(2026, 10, 19), datetime(2026, 10, 25, 23, 58, 59))),
+        (datetime(2026, 10, 18, 23, 58, 59), datetime(2026, 10, 20, 9, 0),
+         (2026, 43, date(2026, 10, 19), datetime(2026, 10, 25, 23, 58, 59))),
+        # Closed early by hand: still the next week, not this one again
+        (datetime(2026, 10, 18, 23, 58, 59), datetime(2026, 10, 15, 12, 0),
+         (2026, 43, date(2026, 10, 19), datetime(2026, 10, 25, 23, 58, 59))),
+        # The ISO year differs from the calendar year around New Year
+        (datetime(2024, 12, 29, 23, 58, 59), datetime(2024, 12, 29, 23, 59, 30),
+         (2025, 1, date(2024, 12, 30), datetime(2025, 1, 5, 23, 58, 59))),
+        (datetime(2026, 12, 27, 23, 58, 59), datetime(2026, 12, 27, 23, 59, 30),
+         (2026, 53, date(2026, 12, 28), datetime(2027, 1, 3, 23, 58, 59))),
+        (datetime(2027, 1, 3, 23, 58, 59), datetime(2027, 1, 4, 0, 1),
+         (2027, 1, date(2027, 1, 4), datetime(2027, 1, 10, 23, 58, 59))),
+    ],
+)
+def test_next_week_follows_the_previous_deadline(previous_deadline, now, expected):
+    assert new_week_dates(previous_deadline, now) == expected
+
+
+def test_week_after_a_long_outage_starts_today():
+    # The successor's deadline passed while the bot was down
+    assert new_week_dates(datetime(2026, 10, 4, 23, 58, 59), datetime(2026, 10, 14, 8, 0)) == (
+        2026, 42, date(2026, 10, 14), datetime(2026, 10, 18, 23, 58, 59),
+    )
+
+
+def test_first_week_starts_today():
+    assert new_week_dates(None, datetime(2026, 10, 17, 15, 30)) == (
+        2026, 42, date(2026, 10, 17), datetime(2026, 10, 18, 23, 58, 59),
+    )